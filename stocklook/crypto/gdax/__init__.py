@@ -4,6 +4,7 @@ from stocklook.crypto.gdax.feeds.websocket_client import GdaxWebsocketClient
 from .account import GdaxAccount
 from .api import Gdax, GdaxAPIError
 from .book import GdaxOrderBook
+from .candle_store import GdaxCandleStore
 from .chartdata import GdaxChartData
 from .db import GdaxDatabase
 from .order import (GdaxOrder,
@@ -292,7 +293,8 @@ def get_buypoint(c: GdaxChartData):
               "watch for break out/down now.")
 
 
-def generate_candles(product, gdax=None, out_path=None, start=None, end=None, granularity=60*60*24):
+def generate_candles(product, gdax=None, out_path=None, start=None, end=None,
+                     granularity=60*60*24, store=None):
     """
     Generates a .csv file containing open, high, low, close & volume
     information for a given product.
@@ -303,6 +305,9 @@ def generate_candles(product, gdax=None, out_path=None, start=None, end=None, gr
     :param start:
     :param end:
     :param granularity:
+    :param store: (gdax.candle_store.GdaxCandleStore, default None)
+        None creates a default GdaxCandleStore so candles already
+        downloaded are read from disk.
     :return: (GdaxChartData, str)
         Returns the generated ChartData object along with the out_path.
     """
@@ -310,6 +315,9 @@ def generate_candles(product, gdax=None, out_path=None, start=None, end=None, gr
     if gdax is None:
         gdax = Gdax()
 
+    if store is None:
+        store = GdaxCandleStore(gdax)
+
     if out_path is None:
         import os
         from stocklook.config import config
@@ -326,7 +334,7 @@ def generate_candles(product, gdax=None, out_path=None, start=None, end=None, gr
         from stocklook.utils.timetools import now
         end = now()
 
-    data = GdaxChartData(gdax, product, start, end, granularity)
+    data = GdaxChartData(gdax, product, start, end, granularity, store=store)
     data.df.to_csv(out_path, index=False)
     get_buypoint(data)
 
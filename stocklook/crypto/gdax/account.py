@@ -137,7 +137,7 @@ class GdaxAccount:
         else:
             self.pair = '{}-{}'.format(self.currency, self.USD)
 
-    def get_history(self, paginate=True):
+    def get_history(self, paginate=True, since=None):
         """
         If an entry is the result of a trade (match, fee),
         the details field will contain additional information about the trade.
@@ -162,21 +162,18 @@ class GdaxAccount:
             collecting data into one list.
             False will only return the first page of data returned by the API.
 
+        :param since (int, default None)
+            A ledger entry id. Paging stops once entries at or
+            before this id are reached.
+
         :return:
         """
         ext = 'accounts/{}/ledger'.format(self.id)
-        res = self._gdax.get(ext)
 
         if not paginate:
-            return res.json()
-
-        data = list(res.json())
-        while 'cb-after' in res.headers:
-            p = {'after': res.headers['cb-after']}
-            res = self._gdax.get(ext, params=p)
-            data.extend(res.json())
+            return self._gdax.get(ext).json()
 
-        return data
+        return self._gdax.iter_pages(ext, since=since, since_key='id').all()
 
     def get_holds(self):
         """
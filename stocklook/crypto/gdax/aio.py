@@ -0,0 +1,366 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import json
+import asyncio
+import aiohttp
+from time import perf_counter
+from yarl import URL
+from stocklook.utils.timetools import timestamp_to_iso8601, timestamp_from_utc, timestamp_to_utc_int
+from .api import (Gdax, GdaxAPIError, CoinbaseExchangeAuth,
+                  GDAX_RATE_LIMITER, get_candle_windows, get_endpoint_class,
+                  get_endpoint_template)
+from .product import GdaxProducts
+from .retry import GDAX_RETRY_POLICY
+from .stats import GDAX_API_STATS
+import logging as lg
+logger = lg.getLogger(__name__)
+
+
+class AsyncGdax:
+    """
+    asyncio version of gdax.api.Gdax.
+
+    Methods mirror the blocking Gdax methods but are coroutines
+    returning the decoded JSON. Requests are signed with the same
+    CoinbaseExchangeAuth and spend from the same RateLimiter
+    so many requests can be awaited at once without
+    going over the API budget:
+
+        async with AsyncGdax(gdax=Gdax()) as g:
+            tickers = await asyncio.gather(*[g.get_ticker(p)
+                                             for p in GdaxProducts.LIST])
+    """
+    API_URL = Gdax.API_URL
+    API_URL_TESTING = Gdax.API_URL_TESTING
+
+    def __init__(self, key=None, secret=None, passphrase=None, gdax=None,
+                 pool_size=10, keep_alive=True, rate_limiter=None, timeout=30, stats=None,
+                 retry_policy=None):
+        """
+        :param key: (str, default None)
+        :param secret: (str, default None)
+        :param passphrase: (str, default None)
+
+        :param gdax: (gdax.api.Gdax, default None)
+            Credentials, base url and rate limiter are taken from this object
+            when provided. A default Gdax object is created to look up
+            credentials if they're not provided.
+
+        :param pool_size: (int, default 10)
+            The maximum number of simultaneous connections.
+
+        :param keep_alive: (bool, default True)
+            False closes connections after each request.
+
+        :param rate_limiter: (stocklook.utils.ratelimit.RateLimiter, default None)
+            None uses Gdax.rate_limiter or gdax.api.GDAX_RATE_LIMITER.
+
+        :param timeout: (int, default 30)
+            Seconds before a request is abandoned.
+
+        :param stats: (gdax.stats.GdaxAPIStats, default None)
+            None uses Gdax.stats or gdax.stats.GDAX_API_STATS.
+
+        :param retry_policy: (gdax.retry.GdaxRetryPolicy, default None)
+            None uses Gdax.retry_policy or gdax.retry.GDAX_RETRY_POLICY.
+        """
+        if gdax is None and not all([key, secret, passphrase]):
+            gdax = Gdax(key, secret, passphrase)
+
+        if gdax is not None:
+            key, secret, passphrase = gdax.api_key, gdax.api_secret, gdax.api_passphrase
+            if rate_limiter is None:
+                rate_limiter = gdax.rate_limiter
+            if stats is None:
+                stats = gdax.stats
+            if retry_policy is None:
+                retry_policy = gdax.retry_policy
+
+        self.api_key = key
+        self.api_secret = secret
+        self.api_passphrase = passphrase
+        self.base_url = (self.API_URL if gdax is None else gdax.base_url)
+        self.rate_limiter = (GDAX_RATE_LIMITER if rate_limiter is None else rate_limiter)
+        self.stats = (GDAX_API_STATS if stats is None else stats)
+        self.retry_policy = (GDAX_RETRY_POLICY if retry_policy is None else retry_policy)
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.wallet_auth = CoinbaseExchangeAuth(key, secret, passphrase)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def set_testing_url(self):
+        self.base_url = self.API_URL_TESTING
+
+    def set_production_url(self):
+        self.base_url = self.API_URL
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Returns the aiohttp.ClientSession, creating it
+        on first access. Must be accessed from within
+        the event loop that will be making requests.
+        :return:
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size,
+                                             force_close=not self.keep_alive)
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=timeout)
+        return self._session
+
+    async def close(self):
+        """
+        Closes the aiohttp.ClientSession and all pooled connections.
+        :return: None
+        """
+        if self._session is not None:
+            await self._session.close()
+        self._session = None
+
+    async def request(self, method, url_extension, params=None, json_data=None, with_headers=False):
+        """
+        Makes a signed request to the Gdax API.
+
+        :param method: ('get', 'delete', 'post')
+        :param url_extension: (str)
+        :param params: (dict, default None)
+            Query string parameters.
+        :param json_data: (dict, default None)
+            Serialized into the request body.
+        :param with_headers: (bool, default False)
+            True returns (data, headers) so callers
+            can read pagination headers.
+        :return:
+        """
+        endpoint_class = get_endpoint_class(url_extension, method)
+        stats = self.stats
+        record = stats.enabled
+        if record:
+            template = get_endpoint_template(url_extension)
+
+        url = URL(self.base_url + url_extension)
+        if params:
+            url = url.update_query({k: str(v) for k, v in params.items()
+                                    if v is not None})
+
+        body = (json.dumps(json_data) if json_data is not None else '')
+        attempt = 0
+
+        while True:
+            attempt += 1
+            waited = await self.rate_limiter.acquire_async(endpoint_class)
+
+            # Signed per attempt as the signature includes a timestamp.
+            headers = self.wallet_auth.get_headers(method.upper(), url.raw_path_qs, body)
+            headers = {k: (v.decode('utf8') if isinstance(v, bytes) else v)
+                       for k, v in headers.items()}
+
+            t = perf_counter()
+            try:
+                async with self.session.request(method, url, data=body or None,
+                                                headers=headers) as res:
+                    raw = await res.read()
+            except Exception as e:
+                if record:
+                    stats.record(method, template, waited, perf_counter() - t, error=e)
+                if not self.retry_policy.should_retry(attempt, method, json_data, error=e):
+                    raise
+                delay = self.retry_policy.get_delay(attempt)
+            else:
+                if record:
+                    stats.record(method, template, waited, perf_counter() - t, status=res.status)
+                if res.status == 200 or not self.retry_policy.should_retry(
+                        attempt, method, json_data, status=res.status):
+                    break
+                delay = self.retry_policy.get_delay(attempt, res.headers)
+
+            if record:
+                stats.record_retry(method, template)
+            logger.debug("{} {} failed, retrying in {:.2f}s".format(method, url, delay))
+            await asyncio.sleep(delay)
+
+        try:
+            t = perf_counter()
+            data = json.loads(raw.decode('utf8'))
+            if record:
+                stats.record_decode(method, template, perf_counter() - t)
+        except ValueError:
+            data = ''
+
+        if res.status != 200:
+            msg = '<{}>: method: {}:{}, {}'.format(res.status,
+                                                   method,
+                                                   res.url,
+                                                   data)
+            raise GdaxAPIError(msg)
+
+        if with_headers:
+            return data, res.headers
+        return data
+
+    async def get(self, url_extension, **kwargs):
+        return await self.request('get', url_extension, **kwargs)
+
+    async def post(self, url_extension, **kwargs):
+        return await self.request('post', url_extension, **kwargs)
+
+    async def delete(self, url_extension, **kwargs):
+        return await self.request('delete', url_extension, **kwargs)
+
+    async def get_paginated(self, url_extension, params=None, paginate=True):
+        """
+        Follows the cb-after header collecting every page into one list.
+        :param url_extension: (str)
+        :param params: (dict, default None)
+        :param paginate: (bool, default True)
+            False only returns the first page.
+        :return: (list)
+        """
+        data, headers = await self.get(url_extension, params=params, with_headers=True)
+        if not paginate:
+            return data
+
+        data = list(data)
+        while 'cb-after' in headers:
+            p = dict(params or {})
+            p['after'] = headers['cb-after']
+            page, headers = await self.get(url_extension, params=p, with_headers=True)
+            data.extend(page)
+
+        return data
+
+    async def get_current_user(self):
+        return await self.get('user')
+
+    async def get_orders(self, order_id=None, paginate=True, status='all'):
+        """
+        See gdax.api.Gdax.get_orders
+        """
+        if order_id:
+            return await self.get('orders/{}'.format(order_id))
+        return await self.get_paginated('orders', params=dict(status=status), paginate=paginate)
+
+    async def get_fills(self, order_id=None, product_id=None, paginate=True, params=None):
+        """
+        See gdax.api.Gdax.get_fills
+        """
+        params = dict(params or {})
+        if order_id:
+            params['order_id'] = order_id
+        if product_id:
+            params['product_id'] = product_id
+        return await self.get_paginated('fills', params=params or None, paginate=paginate)
+
+    async def get_book(self, product, level=2):
+        """
+        See gdax.api.Gdax.get_book
+        """
+        ext = 'products/{}/book'.format(product)
+        return await self.get(ext, params=dict(level=level))
+
+    async def get_ticker(self, product):
+        """
+        See gdax.api.Gdax.get_ticker
+        """
+        return await self.get('products/{}/ticker'.format(product))
+
+    async def get_trades(self, product):
+        return await self.get('products/{}/trades'.format(product))
+
+    async def get_24hr_stats(self, product):
+        self._validate_product(product)
+        return await self.get('products/{}/stats'.format(product))
+
+    async def get_candles(self, product, start, end, granularity=60, convert_dates=False):
+        """
+        See gdax.api.Gdax.get_candles
+        Longer ranges are split into windows (see gdax.api.get_candle_windows)
+        that are requested concurrently under the rate limiter.
+        The buckets are merged, de-duplicated by time and sorted newest first.
+        """
+        self._validate_product(product)
+
+        start = int(timestamp_to_utc_int(start))
+        end = int(timestamp_to_utc_int(end))
+        ext = 'products/{}/candles'.format(product)
+
+        async def fetch(window):
+            w_start, w_end = window
+            params = dict(start=timestamp_to_iso8601(timestamp_from_utc(w_start)),
+                          end=timestamp_to_iso8601(timestamp_from_utc(w_end)),
+                          granularity=granularity)
+            return await self.get(ext, params=params)
+
+        windows = get_candle_windows(start, end, granularity)
+        pages = await asyncio.gather(*[fetch(w) for w in windows])
+
+        # De-duplicate (windows may overlap on the edges)
+        # and sort by time newest first like the API does.
+        rows = {int(row[0]): row for page in pages for row in page}
+        res = [rows[t] for t in sorted(rows, reverse=True)]
+        for row in res:
+            row[0] = int(row[0])
+            if convert_dates:
+                row[0] = timestamp_from_utc(row[0])
+
+        return res
+
+    async def get_accounts(self, account_id=None):
+        """
+        See gdax.api.Gdax.get_accounts
+        """
+        if account_id is None:
+            return await self.get('accounts')
+        return await self.get('accounts/{}'.format(account_id))
+
+    async def get_account_history(self, account_id, paginate=True):
+        ext = 'accounts/{}/ledger'.format(account_id)
+        return await self.get_paginated(ext, paginate=paginate)
+
+    async def post_order(self, order_json):
+        """
+        See gdax.api.Gdax.post_order
+        """
+        return await self.post('orders', json_data=order_json)
+
+    async def cancel_order(self, order_id):
+        return await self.delete('orders/{}'.format(order_id))
+
+    async def cancel_all(self, product_id=None):
+        params = (dict(product_id=product_id) if product_id else None)
+        return await self.delete('orders', params=params)
+
+    def _validate_product(self, product):
+        if product not in GdaxProducts.LIST:
+            raise KeyError("Product not in GdaxProducts: "
+                           "{} ? {}".format(product, GdaxProducts.LIST))
@@ -95,7 +95,7 @@ How to determine an entry, target, and exit price:
 import os
 from stockstats import StockDataFrame
 import pandas as pd
-from stocklook.crypto.gdax import GdaxChartData, Gdax
+from stocklook.crypto.gdax import GdaxChartData, GdaxCandleStore, Gdax
 from stocklook.utils.timetools import now, now_minus, now_plus, timestamp_to_path
 from stocklook.config import config
 
@@ -381,7 +381,9 @@ def run_macd_rsi_decisions(data_dir, product, start, end, granularity, overwrite
     if os.path.exists(out_path) and not overwrite:
         df = pd.read_csv(out_path, parse_dates=['time'])
     else:
-        data = GdaxChartData(Gdax(), product, start, end, granularity=granularity)
+        gdax = Gdax()
+        store = GdaxCandleStore(gdax, directory=os.path.join(data_dir, 'candles'))
+        data = GdaxChartData(gdax, product, start, end, granularity=granularity, store=store)
         try:
             df = data.df
         except ValueError:
@@ -22,14 +22,23 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import numpy as np
 import pandas as pd
 import hmac, hashlib, time, requests, base64, json
+from threading import Lock, local
+from requests.adapters import HTTPAdapter
 from requests.auth import AuthBase
-from stocklook.utils import rate_limited
-from stocklook.utils.timetools import timestamp_to_iso8601, timestamp_from_utc, timeout_check
+from stocklook.utils.ratelimit import RateLimiter
+from stocklook.utils.timetools import (timestamp_to_iso8601, timestamp_from_utc,
+                                       timestamp_to_utc_int, timeout_check)
 from .account import GdaxAccount
+from .cache import GdaxResponseCache
+from .paginate import GdaxPaginator, map_parallel
 from .product import GdaxProduct, GdaxProducts
-from time import sleep
+from .retry import GDAX_RETRY_POLICY
+from .stats import GDAX_API_STATS
+from time import sleep, perf_counter
+from urllib.parse import urlsplit
 from warnings import warn
 import logging as lg
 logger = lg.getLogger(__name__)
@@ -39,39 +48,194 @@ class GdaxAPIError(Exception):
     pass
 
 
-@rate_limited(0.33)
-def gdax_call_api(url, method='get', **kwargs):
+# Endpoint classes used to pick a rate limit.
+PUBLIC = 'public'
+PRIVATE = 'private'
+ORDER = 'order'
+PUBLIC_ENDPOINTS = ['products', 'currencies', 'time']
+
+# The most buckets the candles endpoint returns per request.
+MAX_CANDLES = 300
+CANDLE_COLUMNS = ['time', 'low', 'high', 'open', 'close', 'volume']
+
+# Published GDAX limits: (requests per second, burst)
+# Order entry counts against the private budget as well.
+GDAX_RATE_LIMITS = {
+    PUBLIC: (3, 6),
+    PRIVATE: (5, 10),
+    ORDER: (5, 10, PRIVATE),
+}
+
+# Shared by every Gdax object unless one is given
+# as the limits are enforced per user/IP address.
+GDAX_RATE_LIMITER = RateLimiter(GDAX_RATE_LIMITS, default=PRIVATE)
+
+
+def get_endpoint_class(url_extension, method='get'):
+    """
+    Returns the rate limit class for a request.
+
+    :param url_extension: (str)
+        The url after Gdax.base_url like 'products/LTC-USD/book'
+    :param method: ('get', 'delete', 'post')
+    :return: (str)
+        gdax.api.PUBLIC, gdax.api.PRIVATE, or gdax.api.ORDER
+    """
+    root = url_extension.lstrip('/').split('/')[0].split('?')[0]
+    if root in PUBLIC_ENDPOINTS:
+        return PUBLIC
+    if root == 'orders' and method in ('post', 'delete'):
+        return ORDER
+    return PRIVATE
+
+
+def get_http_adapter(pool_size=10):
+    """
+    Returns a requests.adapters.HTTPAdapter holding a pool
+    of keep-alive connections. One adapter can be mounted on
+    many requests.Session objects (one per thread) so
+    that the threads share the same connections.
+
+    :param pool_size: (int, default 10)
+        The maximum number of connections kept open per host.
+        Threads block waiting for a free connection
+        rather than opening extra ones.
+    :return: (requests.adapters.HTTPAdapter)
     """
-    This method is rate limited to ~3 calls per second max.
+    return HTTPAdapter(pool_connections=pool_size,
+                       pool_maxsize=pool_size,
+                       pool_block=True)
+
+
+def get_candle_windows(start, end, granularity, max_candles=MAX_CANDLES):
+    """
+    Splits a start/end range into the fewest windows the
+    candles endpoint will serve in full.
+
+    :param start: (int) UTC seconds
+    :param end: (int) UTC seconds
+    :param granularity: (int) Seconds per bucket.
+    :param max_candles: (int, default gdax.api.MAX_CANDLES)
+    :return: (list)
+        [(start, end), (start, end)]
+    """
+    span = granularity * (max_candles - 1)
+    windows = list()
+    while start <= end:
+        w_end = min(start + span, end)
+        windows.append((start, w_end))
+        start = w_end + granularity
+    return windows
+
+
+def get_endpoint_template(url_extension):
+    """
+    Returns the url extension with ids swapped out for '{}'
+    so that requests to the same endpoint can be grouped.
+
+    Example:
+        get_endpoint_template('products/BTC-USD/book')
+        >>> 'products/{}/book'
+
+    :param url_extension: (str)
+    :return: (str)
+    """
+    parts = url_extension.lstrip('/').split('?')[0].split('/')
+    for idx, part in enumerate(parts):
+        if any(c.isdigit() for c in part) \
+                or (part.isupper() and part.upper() != part.lower()):
+            parts[idx] = '{}'
+    return '/'.join(parts)
+
+
+def _time_decode(res, stats, method, template):
+    """
+    Wraps Response.json so the time spent decoding
+    is recorded against the endpoint.
+    """
+    decode = res.json
+
+    def json(**kwargs):
+        t = perf_counter()
+        data = decode(**kwargs)
+        stats.record_decode(method, template, perf_counter() - t)
+        return data
+
+    res.json = json
+
+
+def gdax_call_api(url, method='get', session=None, limiter=None, endpoint_class=PRIVATE,
+                  stats=None, template=None, retry_policy=None, **kwargs):
+    """
+    This method is rate limited by endpoint class (see GDAX_RATE_LIMITS).
     It should handle ALL communication with the Gdax API.
     :param url:
     :param method: ('get', 'delete', 'post')
+    :param session: (requests.Session, default None)
+        A (pooled) session to send the request through.
+        None uses the module-level requests functions
+        which open a new connection on every call.
+    :param limiter: (stocklook.utils.ratelimit.RateLimiter, default None)
+        None uses gdax.api.GDAX_RATE_LIMITER.
+    :param endpoint_class: (str, default gdax.api.PRIVATE)
+        The limiter key to acquire before calling.
+    :param stats: (gdax.stats.GdaxAPIStats, default None)
+        Records limiter wait, time in flight, decode time,
+        status codes and retries when enabled.
+    :param template: (str, default None)
+        The endpoint template to record stats under.
+        None derives it from the url (see get_endpoint_template).
+    :param retry_policy: (gdax.retry.GdaxRetryPolicy, default None)
+        Decides which failures are retried and how long to wait.
+        None uses gdax.retry.GDAX_RETRY_POLICY.
     :param kwargs:
     :return:
     """
-    try:
-        if method == 'get':
-            res = requests.get(url, **kwargs)
-        elif method == 'delete':
-            res = requests.delete(url, **kwargs)
-        elif method == 'post':
-            res = requests.post(url, **kwargs)
+    if method not in ('get', 'delete', 'post'):
+        raise NotImplementedError("Method '{}' not available "
+                                  "for calling API.".format(method))
+    if limiter is None:
+        limiter = GDAX_RATE_LIMITER
+    if retry_policy is None:
+        retry_policy = GDAX_RETRY_POLICY
+
+    record = stats is not None and stats.enabled
+    if record and template is None:
+        template = get_endpoint_template(urlsplit(url).path)
+
+    caller = getattr((requests if session is None else session), method)
+    body = kwargs.get('json', kwargs.get('data', None))
+    attempt = 0
+
+    while True:
+        attempt += 1
+        waited = limiter.acquire(endpoint_class)
+        t = perf_counter()
+        try:
+            res = caller(url, **kwargs)
+        except Exception as e:
+            if record:
+                stats.record(method, template, waited, perf_counter() - t, error=e)
+            if not retry_policy.should_retry(attempt, method, body, error=e):
+                raise
+            delay = retry_policy.get_delay(attempt)
+            logger.debug("{} {} failed ({}), retrying in "
+                         "{:.2f}s".format(method, url, e, delay))
         else:
-            raise NotImplementedError("Method '{}' not available "
-                                      "for calling API.".format(method))
-    except Exception as e:
-        e = str(e)
-        retry = '11001' in e \
-                or 'unreachable host' in e \
-                or ('forcibly' in e
-                    and 'existing' in e)\
-                or '504' in e
-
-        if retry:
-            sleep(2)
-            return gdax_call_api(url, method=method, **kwargs)
-
-        raise
+            if record:
+                stats.record(method, template, waited, perf_counter() - t, status=res.status_code)
+            if res.status_code == 200 \
+                    or not retry_policy.should_retry(attempt, method, body, status=res.status_code):
+                break
+            delay = retry_policy.get_delay(attempt, res.headers)
+            logger.debug("{} {} returned {}, retrying in "
+                         "{:.2f}s".format(method, url, res.status_code, delay))
+        if record:
+            stats.record_retry(method, template)
+        sleep(delay)
+
+    if record:
+        _time_decode(res, stats, method, template)
 
     if res.status_code != 200:
         try:
@@ -99,8 +263,24 @@ class CoinbaseExchangeAuth(AuthBase):
         self.passphrase = passphrase
 
     def __call__(self, request):
+        headers = self.get_headers(request.method,
+                                   request.path_url,
+                                   request.body)
+        request.headers.update(headers)
+        return request
+
+    def get_headers(self, method, path_url, body=None):
+        """
+        Returns the signed headers for a request.
+        Used directly by clients that don't go through
+        the requests module (gdax.aio.AsyncGdax).
+
+        :param method: (str) GET, POST, DELETE
+        :param path_url: (str) The path and query string like /orders?status=open
+        :param body: (str, bytes, default None)
+        :return: (dict)
+        """
         timestamp = str(time.time())
-        body = request.body
 
         if isinstance(body, bytes):
             body = body.decode('utf-8')
@@ -108,22 +288,21 @@ class CoinbaseExchangeAuth(AuthBase):
             body = ''
 
         message = '{}{}{}{}'.format(timestamp,
-                                    request.method,
-                                    request.path_url,
+                                    method,
+                                    path_url,
                                     body)
 
         hmac_key = base64.b64decode(self.secret_key)
         signature = hmac.new(hmac_key, bytes(str(message).encode('utf8')), hashlib.sha256)
         signature_b64 = base64.standard_b64encode(signature.digest())
 
-        request.headers.update({
+        return {
             'CB-ACCESS-SIGN': signature_b64,
             'CB-ACCESS-TIMESTAMP': timestamp,
             'CB-ACCESS-KEY': self.api_key,
             'CB-ACCESS-PASSPHRASE': self.passphrase,
             'Content-Type': 'application/json'
-        })
-        return request
+        }
 
 
 class CoinbaseWebsocketFeedAuth(CoinbaseExchangeAuth):
@@ -150,7 +329,9 @@ class Gdax:
     API_URL = 'https://api.gdax.com/'
     API_URL_TESTING = 'https://public.sandbox.gdax.com'
 
-    def __init__(self, key=None, secret=None, passphrase=None, wallet_auth=None, coinbase_client=None):
+    def __init__(self, key=None, secret=None, passphrase=None, wallet_auth=None,
+                 coinbase_client=None, pool_size=10, keep_alive=True, rate_limiter=None,
+                 response_cache=None, stats=None, retry_policy=None):
         """
         The main interface to the Gdax Private API. Most of the API data
         gets broken down into other objects like GdaxAccount, GdaxProduct, GdaxDatabase,
@@ -178,6 +359,32 @@ class Gdax:
             None defaults to a gdax.api.CoinbaseExchangeAuth object.
         :param coinbase_client: (stocklook.crypto.coinbase_api.CoinbaseClient)
             An optionally pre-configured CoinbaseClient.
+
+        :param pool_size: (int, default 10)
+            The maximum number of pooled connections to the API.
+            All threads using this Gdax object share the pool.
+
+        :param keep_alive: (bool, default True)
+            True re-uses connections between requests.
+            False closes the connection after each request.
+
+        :param rate_limiter: (stocklook.utils.ratelimit.RateLimiter, default None)
+            None uses gdax.api.GDAX_RATE_LIMITER which is shared
+            by all Gdax objects.
+
+        :param response_cache: (gdax.cache.GdaxResponseCache, default None)
+            Caches public endpoint responses for a short time.
+            None creates a GdaxResponseCache with default TTLs.
+            False disables caching.
+
+        :param stats: (gdax.stats.GdaxAPIStats, default None)
+            Per-endpoint request instrumentation.
+            None uses gdax.stats.GDAX_API_STATS which is shared
+            by all Gdax objects and disabled until Gdax.stats.enable() is called.
+
+        :param retry_policy: (gdax.retry.GdaxRetryPolicy, default None)
+            Decides which failed requests are retried.
+            None uses gdax.retry.GDAX_RETRY_POLICY.
         """
         self.api_key = key
         self.api_secret = secret
@@ -198,6 +405,16 @@ class Gdax:
         self._coinbase_accounts = None
         self._db = None
 
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self._adapter = None
+        self._sessions = local()              # One requests.Session per thread sharing Gdax._adapter
+        self._session_lock = Lock()
+        self.rate_limiter = (GDAX_RATE_LIMITER if rate_limiter is None else rate_limiter)
+        self.response_cache = (GdaxResponseCache() if response_cache is None else response_cache)
+        self.stats = (GDAX_API_STATS if stats is None else stats)
+        self.retry_policy = (GDAX_RETRY_POLICY if retry_policy is None else retry_policy)
+
         if not all([key, secret, passphrase]):
             self._set_credentials()
 
@@ -437,7 +654,44 @@ class Gdax:
 
         return self._wallet_auth
 
-    def get(self, url_extension, **kwargs) -> requests.Response:
+    @property
+    def session(self) -> requests.Session:
+        """
+        Returns a requests.Session for the calling thread.
+        Each thread gets its own session (cookies & headers aren't shared)
+        but every session is mounted on the same pooled HTTPAdapter so
+        connections are kept alive and re-used across threads.
+        :return:
+        """
+        session = getattr(self._sessions, 'session', None)
+        if session is None:
+            with self._session_lock:
+                if self._adapter is None:
+                    self._adapter = get_http_adapter(self.pool_size)
+                adapter = self._adapter
+
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            if not self.keep_alive:
+                session.headers['Connection'] = 'close'
+            self._sessions.session = session
+
+        return session
+
+    def close(self):
+        """
+        Closes all pooled connections.
+        Sessions are rebuilt when the next request is made.
+        :return: None
+        """
+        with self._session_lock:
+            if self._adapter is not None:
+                self._adapter.close()
+            self._adapter = None
+            self._sessions = local()
+
+    def get(self, url_extension, cache=True, **kwargs) -> requests.Response:
         """
         Makes a GET request to the GDAX api using the base
         Gdax.API_URL along with the given extension:
@@ -447,14 +701,32 @@ class Gdax:
             contents = resp.json()
 
         :param url_extension: (str)
+        :param cache: (bool, default True)
+            True returns a recent response from Gdax.response_cache
+            if the endpoint is cacheable (see gdax.cache.GDAX_CACHE_TTLS).
         :param kwargs: requests.get(**kwargs)
         :return:
         """
         kwargs.update({
             'auth': kwargs.pop('auth', self.wallet_auth),
-            'method': 'get'
+            'method': 'get',
+            'session': kwargs.pop('session', None) or self.session,
+            'limiter': kwargs.pop('limiter', self.rate_limiter),
+            'endpoint_class': kwargs.pop('endpoint_class', get_endpoint_class(url_extension, 'get')),
+            'stats': kwargs.pop('stats', self.stats),
+            'retry_policy': kwargs.pop('retry_policy', self.retry_policy),
         })
-        return gdax_call_api(self.base_url + url_extension, **kwargs)
+        url = self.base_url + url_extension
+        template = get_endpoint_template(url_extension)
+        kwargs['template'] = template
+
+        if cache and self.response_cache:
+            params = kwargs.get('params', None) or {}
+            key = (url, tuple(sorted(dict(params).items())))
+            return self.response_cache.get(key, template,
+                                           lambda: gdax_call_api(url, **kwargs))
+
+        return gdax_call_api(url, **kwargs)
 
     def post(self, url_extension, **kwargs) -> requests.Response:
         """
@@ -467,7 +739,12 @@ class Gdax:
         """
         kwargs.update({
             'auth': kwargs.pop('auth', self.wallet_auth),
-            'method': 'post'
+            'method': 'post',
+            'session': kwargs.pop('session', None) or self.session,
+            'limiter': kwargs.pop('limiter', self.rate_limiter),
+            'endpoint_class': kwargs.pop('endpoint_class', get_endpoint_class(url_extension, 'post')),
+            'stats': kwargs.pop('stats', self.stats),
+            'retry_policy': kwargs.pop('retry_policy', self.retry_policy),
         })
         return gdax_call_api(self.base_url + url_extension, **kwargs)
 
@@ -486,7 +763,12 @@ class Gdax:
         """
         kwargs.update({
             'auth': kwargs.pop('auth', self.wallet_auth),
-            'method': 'delete'
+            'method': 'delete',
+            'session': kwargs.pop('session', None) or self.session,
+            'limiter': kwargs.pop('limiter', self.rate_limiter),
+            'endpoint_class': kwargs.pop('endpoint_class', get_endpoint_class(url_extension, 'delete')),
+            'stats': kwargs.pop('stats', self.stats),
+            'retry_policy': kwargs.pop('retry_policy', self.retry_policy),
         })
         return gdax_call_api(self.base_url + url_extension, **kwargs)
 
@@ -496,7 +778,27 @@ class Gdax:
         """
         return self.get('user').json()
 
-    def get_orders(self, order_id=None, paginate=True, status='all'):
+    def iter_pages(self, url_extension, params=None, since=None, since_key='id', prefetch=True):
+        """
+        Returns a GdaxPaginator that yields pages from a
+        paginated endpoint as they arrive.
+        See gdax.paginate.GdaxPaginator for details.
+
+        Example:
+            for page in Gdax.iter_pages('fills', params={'product_id': 'ETH-USD'}):
+                print(len(page))
+
+        :param url_extension: (str)
+        :param params: (dict, default None)
+        :param since: (int, str, default None)
+        :param since_key: (str, default 'id')
+        :param prefetch: (bool, default True)
+        :return: (gdax.paginate.GdaxPaginator)
+        """
+        return GdaxPaginator(self, url_extension, params=params, since=since,
+                             since_key=since_key, prefetch=prefetch)
+
+    def get_orders(self, order_id=None, paginate=True, status='all', since=None):
         """
         Returns a list containing data about orders.
 
@@ -514,6 +816,11 @@ class Gdax:
         :param status (str, default 'all')
             'open', 'pending', 'active'
 
+        :param since (str, datetime, default None)
+            A created_at time (ISO 8601 string, datetime or pandas.Timestamp,
+            naive times being UTC). Paging stops once orders
+            created at or before this time are reached.
+
         :return:
         """
         if order_id:
@@ -523,18 +830,12 @@ class Gdax:
             ext = 'orders'
 
         p = dict(status=status)
-        res = self.get(ext, params=p)
 
         if not paginate:
-            return res.json()
-
-        data = list(res.json())
-        while 'cb-after' in res.headers:
-            p = {'after': res.headers['cb-after']}
-            res = self.get(ext, params=p)
-            data.extend(res.json())
+            return self.get(ext, params=p).json()
 
-        return data
+        return GdaxPaginator(self, ext, params=p, since=since,
+                             since_key='created_at').all()
 
     def get_coinbase_accounts(self):
         """
@@ -544,7 +845,7 @@ class Gdax:
         """
         return self.get('coinbase-accounts').json()
 
-    def get_fills(self, order_id=None, product_id=None, paginate=True, params=None):
+    def get_fills(self, order_id=None, product_id=None, paginate=True, params=None, since=None, max_workers=4):
         """
         Get a list of recent fills.
 
@@ -568,8 +869,42 @@ class Gdax:
         Fills are returned sorted by descending trade_id from the largest trade_id to
         the smallest trade_id. The CB-BEFORE header will have this first trade id so that
         future requests using the cb-before parameter will fetch fills with a greater trade id (newer fills).
+
+        :param product_id: (str, list, default None)
+            A list of products are fetched in parallel and
+            returned together in one list.
+
+        :param since: (int, dict, default None)
+            A trade_id. Paging stops once fills at or
+            before this trade_id are reached.
+            Trade ids are per product so when fetching several
+            products this must be a {product_id: trade_id} dict
+            (products without an entry are fetched in full).
+
+        :param max_workers: (int, default 4)
+            The number of threads used when fetching multiple products.
         :return:
         """
+        if isinstance(product_id, (list, tuple)):
+            if since is not None and not isinstance(since, dict):
+                if len(product_id) > 1:
+                    raise ValueError("Trade ids are per product: since must be a "
+                                     "{product_id: trade_id} dict when fetching "
+                                     "several products.")
+                since = {p: since for p in product_id}
+
+            def fetch(p):
+                return self.get_fills(order_id=order_id, product_id=p, paginate=paginate,
+                                      params=dict(params or {}),
+                                      since=(since or {}).get(p, None))
+            data = list()
+            for chunk in map_parallel(fetch, product_id, max_workers=max_workers):
+                data.extend(chunk)
+            return data
+
+        if isinstance(since, dict):
+            since = since.get(product_id, None)
+
         if params is None:
             params = dict()
         ext = 'fills'
@@ -583,19 +918,13 @@ class Gdax:
         if not params:
             params = None
 
-        res = self.get(ext, params=params)
         if not paginate:
-            return res.json()
+            return self.get(ext, params=params).json()
 
-        data = list(res.json())
-        while 'cb-after' in res.headers:
-            p = {'after': res.headers['cb-after']}
-            res = self.get(ext, params=p)
-            data.extend(res.json())
+        return GdaxPaginator(self, ext, params=params, since=since,
+                             since_key='trade_id').all()
 
-        return data
-
-    def get_book(self, product, level=2):
+    def get_book(self, product, level=2, cache=True):
         """
         Returns a dictionary from the Gdax Order Book like this:
             {
@@ -616,11 +945,15 @@ class Gdax:
             1	    Only the best bid and ask
             2	    Top 50 bids and asks (aggregated)
             3	    Full order book (non aggregated)
+
+        :param cache: (bool, default True)
+            False always fetches a fresh book. Level 3 snapshots are used
+            to (re)build books from the websocket so they're never cached.
         :return:
         """
         ext = 'products/{}/book'.format(product)
         params = dict(level=level)
-        return self.get(ext, params=params).json()
+        return self.get(ext, params=params, cache=(cache and level != 3)).json()
 
     def get_ticker(self, product):
         """
@@ -662,7 +995,8 @@ class Gdax:
         ext = 'products/{}/trades'.format(product)
         return self.get(ext).json()
 
-    def get_candles(self, product, start, end, granularity=60, convert_dates=False, to_frame=False):
+    def get_candles(self, product, start, end, granularity=60, convert_dates=False,
+                    to_frame=False, max_workers=4):
         """
         Historic rates for a product.
         Rates are returned in grouped buckets based on requested granularity.
@@ -679,6 +1013,13 @@ class Gdax:
         Historical rates should not be polled frequently.
         If you need real-time information, use the trade and book endpoints along with the websocket feed.
 
+        The API returns at most 300 buckets per request so longer ranges are split
+        into windows (see gdax.api.get_candle_windows) that are requested in parallel.
+        The buckets are merged, de-duplicated by time and sorted newest first.
+
+        :param max_workers: (int, default 4)
+            The number of windows requested at the same time.
+
         :return:
         Each bucket is an array of the following information:
         time               bucket start time
@@ -690,26 +1031,37 @@ class Gdax:
         """
         self._validate_product(product)
 
-        if not isinstance(start, str):
-            start = timestamp_to_iso8601(start)
+        start = int(timestamp_to_utc_int(start))
+        end = int(timestamp_to_utc_int(end))
+        ext = 'products/{}/candles'.format(product)
 
-        if not isinstance(end, str):
-            end = timestamp_to_iso8601(end)
+        def fetch(window):
+            w_start, w_end = window
+            params = dict(start=timestamp_to_iso8601(timestamp_from_utc(w_start)),
+                          end=timestamp_to_iso8601(timestamp_from_utc(w_end)),
+                          granularity=granularity)
+            return self.get(ext, params=params).json()
 
-        ext = 'products/{}/candles'.format(product)
-        params = dict(start=start,
-                      end=end,
-                      granularity=granularity)
+        windows = get_candle_windows(start, end, granularity)
+        pages = map_parallel(fetch, windows, max_workers=max_workers)
 
-        res = self.get(ext, params=params).json()
+        data = np.array([row for page in pages for row in page], dtype=np.float64)
+        data = data.reshape(-1, len(CANDLE_COLUMNS))
 
-        if convert_dates:
-            for row in res:
-                row[0] = timestamp_from_utc(row[0])
+        # De-duplicate (windows may overlap on the edges)
+        # and sort by time newest first like the API does.
+        _, idx = np.unique(data[:, 0], return_index=True)
+        data = data[idx[::-1]]
+        times = data[:, 0].astype(np.int64)
 
         if to_frame:
-            columns = ['time', 'low', 'high', 'open', 'close', 'volume']
-            res = pd.DataFrame(columns=columns, data=res, index=range(len(res)))
+            res = pd.DataFrame(data=data, columns=CANDLE_COLUMNS, index=range(len(data)))
+            res['time'] = (pd.to_datetime(times, unit='s') if convert_dates else times)
+            return res
+
+        res = data.tolist()
+        for row, t in zip(res, times.tolist()):
+            row[0] = (timestamp_from_utc(t) if convert_dates else t)
 
         return res
 
@@ -840,14 +1192,34 @@ class Gdax:
         """
         return self.post('orders', json=order_json).json()
 
-    def get_account_ledger_history(self, paginate=True):
+    def cancel_order(self, order_id):
+        """
+        Cancels a previously placed order.
+        :param order_id: (str)
+        :return: (list)
+            Contains the cancelled order id.
+        """
+        ext = 'orders/{}'.format(order_id)
+        return self.delete(ext).json()
+
+    def cancel_all(self, product_id=None):
+        """
+        Cancels all open orders (optionally for one product only).
+        :param product_id: (str, default None)
+        :return: (list)
+            Contains the cancelled order ids.
+        """
+        params = (dict(product_id=product_id) if product_id else None)
+        return self.delete('orders', params=params).json()
+
+    def get_account_ledger_history(self, paginate=True, max_workers=4):
         """
         Returns a pandas.DataFrame containing historical transactions for each GdaxAccount
         assigned to the user.
 
         NOTE: if paginate is set to true this method can take a long time
         to complete as each account may make multiple API calls to gather
-        the data.
+        the data. Accounts are fetched in parallel on up to max_workers threads.
 
         [
             {
@@ -866,10 +1238,11 @@ class Gdax:
         :return:
         """
         data = []
-        for account in self.accounts.values():
-            if account.currency == account.USD:
-                continue
-            chunk = account.get_history(paginate=paginate)
+        accounts = [a for a in self.accounts.values()
+                    if a.currency != a.USD]
+        chunks = map_parallel(lambda a: a.get_history(paginate=paginate),
+                              accounts, max_workers=max_workers)
+        for chunk in chunks:
             data.extend(chunk)
 
         for record in data:
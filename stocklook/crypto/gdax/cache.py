@@ -0,0 +1,163 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from collections import OrderedDict
+from threading import Lock, Event
+from time import monotonic
+
+
+# Seconds to cache each public endpoint template.
+# Endpoints not listed here are never cached.
+GDAX_CACHE_TTLS = {
+    'products': 300,
+    'currencies': 300,
+    'products/{}/ticker': 1,
+    'products/{}/book': 1,
+    'products/{}/trades': 1,
+    'products/{}/stats': 10,
+}
+
+
+class _Flight:
+    """
+    A request in progress that other
+    threads can wait on.
+    """
+    __slots__ = ['event', 'result', 'error']
+
+    def __init__(self):
+        self.event = Event()
+        self.result = None
+        self.error = None
+
+
+class GdaxResponseCache:
+    """
+    A thread-safe LRU cache of API responses with a TTL per endpoint template.
+
+    Concurrent requests for the same key are coalesced: the first
+    caller makes the request and the rest wait for (and share) its response.
+    """
+    def __init__(self, ttls=None, max_size=256):
+        """
+        :param ttls: (dict, default None)
+            {endpoint_template: seconds}
+            None uses gdax.cache.GDAX_CACHE_TTLS.
+
+        :param max_size: (int, default 256)
+            The maximum number of responses kept. The least
+            recently used response is dropped first.
+        """
+        self.ttls = dict(GDAX_CACHE_TTLS if ttls is None else ttls)
+        self.max_size = max_size
+        self._data = OrderedDict()   # key: (expires, response)
+        self._flights = dict()       # key: _Flight
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get_ttl(self, template):
+        return self.ttls.get(template, 0)
+
+    def get(self, key, template, func):
+        """
+        Returns the cached result for key or calls func()
+        to get (and cache) a new one.
+
+        :param key: (hashable)
+            Identifies the request (url + params).
+        :param template: (str)
+            The endpoint template used to look up the TTL.
+        :param func: (callable)
+            Makes the request when there's no fresh result.
+        :return:
+        """
+        ttl = self.get_ttl(template)
+        if ttl <= 0:
+            return func()
+
+        with self._lock:
+            item = self._data.get(key, None)
+            if item is not None:
+                expires, result = item
+                if expires > monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._data[key]
+
+            flight = self._flights.get(key, None)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            result = func()
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            flight.result = result
+            with self._lock:
+                self._data[key] = (monotonic() + ttl, result)
+                self._data.move_to_end(key)
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+            return result
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return dict(hits=self.hits,
+                        misses=self.misses,
+                        coalesced=self.coalesced,
+                        evictions=self.evictions,
+                        size=len(self._data))
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.coalesced = 0
+            self.evictions = 0
@@ -0,0 +1,294 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import numpy as np
+import pandas as pd
+from time import time
+from datetime import datetime
+from threading import Lock
+from stocklook.config import config
+from stocklook.utils.timetools import timestamp_to_utc_int, timestamp_from_utc
+from .api import CANDLE_COLUMNS
+import logging as lg
+logger = lg.getLogger(__name__)
+
+
+def merge_intervals(intervals):
+    """
+    Merges overlapping or touching [start, end] intervals.
+    :param intervals: (list)
+    :return: (list)
+    """
+    merged = list()
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def month_ranges(start, end):
+    """
+    Splits UTC seconds start/end into calendar months.
+    :param start: (int)
+    :param end: (int)
+    :return: (list)
+        [('2017-10', month_start, month_end), ...]
+        month_end is the first second of the next month.
+    """
+    ranges = list()
+    dt = datetime.utcfromtimestamp(start).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while True:
+        m_start = int((dt - datetime(1970, 1, 1)).total_seconds())
+        if m_start > end:
+            break
+        if dt.month == 12:
+            nxt = dt.replace(year=dt.year + 1, month=1)
+        else:
+            nxt = dt.replace(month=dt.month + 1)
+        m_end = int((nxt - datetime(1970, 1, 1)).total_seconds())
+        ranges.append((dt.strftime('%Y-%m'), m_start, m_end))
+        dt = nxt
+    return ranges
+
+
+class GdaxCandleStore:
+    """
+    A local columnar store of Gdax candles.
+
+    Candles are kept in one .npy file per product, granularity and month:
+        {directory}/{product}/{granularity}/{YYYY-MM}.npy
+    Each file holds a float64 array with CANDLE_COLUMNS sorted by time
+    (oldest first) and is memory-mapped when read. A small
+    {YYYY-MM}.cov.npy file records the time ranges already requested
+    from the API so ranges without trades aren't requested again.
+
+    GdaxCandleStore.get_candles has the same signature and return values as
+    Gdax.get_candles but only asks the API for the missing intervals:
+
+        store = GdaxCandleStore(gdax)
+        df = store.get_candles('ETH-USD', now_minus(weeks=4), now(), 60*5, to_frame=True)
+    """
+    def __init__(self, gdax=None, directory=None):
+        """
+        :param gdax: (gdax.api.Gdax, default None)
+            Used to download missing candles.
+            None creates a default Gdax object when first needed.
+
+        :param directory: (str, default None)
+            None defaults to DATA_DIRECTORY/candles
+            from stocklook.config.config.
+        """
+        if directory is None:
+            directory = os.path.join(config['DATA_DIRECTORY'], 'candles')
+        self._gdax = gdax
+        self.directory = directory
+        self._lock = Lock()
+        self.fetches = 0
+
+    @property
+    def gdax(self):
+        if self._gdax is None:
+            from .api import Gdax
+            self._gdax = Gdax()
+        return self._gdax
+
+    def get_path(self, product, granularity, month):
+        return os.path.join(self.directory, product, str(granularity), '{}.npy'.format(month))
+
+    @staticmethod
+    def _coverage_path(path):
+        return path[:-4] + '.cov.npy'
+
+    @staticmethod
+    def _load(path, mmap=True):
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode=('r' if mmap else None))
+
+    @staticmethod
+    def _save(path, array):
+        d = os.path.dirname(path)
+        if not os.path.exists(d):
+            os.makedirs(d)
+        tmp = path + '.tmp.npy'
+        np.save(tmp, array)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _bounds(start, end, granularity):
+        """
+        Returns the first and last bucket times within start/end.
+        """
+        start = int(timestamp_to_utc_int(start))
+        end = int(timestamp_to_utc_int(end))
+        start += -start % granularity
+        end -= end % granularity
+        return start, end
+
+    def get_coverage(self, product, granularity, month):
+        path = self._coverage_path(self.get_path(product, granularity, month))
+        cov = self._load(path, mmap=False)
+        if cov is None:
+            return list()
+        return cov.tolist()
+
+    def get_missing(self, product, start, end, granularity=60):
+        """
+        Returns the [start, end] intervals (UTC seconds) within
+        start/end that haven't been downloaded yet.
+        :return: (list)
+        """
+        start, end = self._bounds(start, end, granularity)
+        if start > end:
+            return list()
+
+        covered = list()
+        for month, m_start, m_end in month_ranges(start, end):
+            covered.extend(self.get_coverage(product, granularity, month))
+
+        missing, cursor = list(), start
+        for c_start, c_end in merge_intervals(covered):
+            if c_end < cursor:
+                continue
+            if c_start > end:
+                break
+            if c_start > cursor:
+                missing.append((cursor, min(c_start - granularity, end)))
+            cursor = max(cursor, c_end + granularity)
+        if cursor <= end:
+            missing.append((cursor, end))
+        return missing
+
+    def read(self, product, start, end, granularity=60):
+        """
+        Returns candles on disk between start and end
+        as a float64 array sorted oldest first.
+        Nothing is downloaded.
+        :return: (numpy.ndarray)
+        """
+        start, end = self._bounds(start, end, granularity)
+        chunks = list()
+        for month, m_start, m_end in month_ranges(start, end):
+            data = self._load(self.get_path(product, granularity, month))
+            if data is None or not len(data):
+                continue
+            t = data[:, 0]
+            lo = np.searchsorted(t, start, side='left')
+            hi = np.searchsorted(t, end, side='right')
+            if hi > lo:
+                chunks.append(np.asarray(data[lo:hi]))
+
+        if not chunks:
+            return np.empty((0, len(CANDLE_COLUMNS)), dtype=np.float64)
+        return np.concatenate(chunks)
+
+    def write(self, product, granularity, data, covered=None):
+        """
+        Merges candles into the month files replacing
+        existing candles with the same time.
+
+        :param data: (numpy.ndarray)
+            Rows of CANDLE_COLUMNS in any order.
+        :param covered: (list, default None)
+            [start, end] intervals that were requested to get the data.
+        :return: None
+        """
+        data = np.asarray(data, dtype=np.float64).reshape(-1, len(CANDLE_COLUMNS))
+        covered = list(covered or [])
+        times = [int(t) for t in data[:, 0]]
+        bounds = [c for iv in covered for c in iv] + times[:1] + times[-1:]
+        if not bounds:
+            return
+
+        with self._lock:
+            for month, m_start, m_end in month_ranges(min(bounds), max(bounds)):
+                path = self.get_path(product, granularity, month)
+                mask = (data[:, 0] >= m_start) & (data[:, 0] < m_end)
+                new = data[mask]
+                m_cov = [[max(s, m_start), min(e, m_end - 1)] for s, e in covered
+                         if s < m_end and e >= m_start]
+                if not len(new) and not m_cov:
+                    continue
+
+                if len(new):
+                    old = self._load(path, mmap=False)
+                    if old is not None:
+                        # New rows first so np.unique keeps them over old rows.
+                        new = np.concatenate([new, old])
+                    _, idx = np.unique(new[:, 0], return_index=True)
+                    self._save(path, new[idx])
+
+                if m_cov:
+                    cov = self.get_coverage(product, granularity, month) + m_cov
+                    cov = np.array(merge_intervals(cov), dtype=np.int64)
+                    self._save(self._coverage_path(path), cov)
+
+    def sync(self, product, start, end, granularity=60):
+        """
+        Downloads and stores any missing candles between start and end.
+        :return: (int)
+            The number of candles downloaded.
+        """
+        missing = self.get_missing(product, start, end, granularity)
+        if not missing:
+            return 0
+
+        # The latest bucket is still forming so it's
+        # never marked as covered and gets requested again.
+        last_final = int(time()) - granularity
+        last_final -= last_final % granularity + granularity
+
+        total = 0
+        for m_start, m_end in missing:
+            rows = self.gdax.get_candles(product, m_start, m_end, granularity)
+            self.fetches += 1
+            covered = ([[m_start, min(m_end, last_final)]]
+                       if m_start <= last_final else None)
+            self.write(product, granularity, rows, covered=covered)
+            total += len(rows)
+            logger.debug("{} {}: stored {} candles "
+                         "{} - {}".format(product, granularity, len(rows), m_start, m_end))
+        return total
+
+    def get_candles(self, product, start, end, granularity=60, convert_dates=False, to_frame=False):
+        """
+        Same as Gdax.get_candles but answered from disk,
+        downloading only the intervals that aren't stored yet.
+        :return:
+        """
+        self.sync(product, start, end, granularity)
+        data = self.read(product, start, end, granularity)[::-1]
+        times = data[:, 0].astype(np.int64)
+
+        if to_frame:
+            res = pd.DataFrame(data=data, columns=CANDLE_COLUMNS, index=range(len(data)))
+            res['time'] = (pd.to_datetime(times, unit='s') if convert_dates else times)
+            return res
+
+        res = data.tolist()
+        for row, t in zip(res, times.tolist()):
+            row[0] = (timestamp_from_utc(t) if convert_dates else t)
+        return res
@@ -57,8 +57,21 @@ class GdaxChartData:
     VELOCITY = 'velocity'
     VOLUME = 'volume'
 
-    def __init__(self, gdax, product, start, end, granularity=60*60, df=None):
+    def __init__(self, gdax, product, start, end, granularity=60*60, df=None, store=None):
+        """
+        :param gdax: (gdax.api.Gdax)
+        :param product: (str)
+        :param start: (datetime)
+        :param end: (datetime)
+        :param granularity: (int, default 3600)
+        :param df: (pandas.DataFrame, default None)
+            Pre-loaded candles.
+        :param store: (gdax.candle_store.GdaxCandleStore, default None)
+            Candles are read from (and saved to) this store
+            when provided rather than downloaded every time.
+        """
         self.gdax = gdax
+        self.store = store
         self.product = product
         self.start = start
         self.end = end
@@ -108,12 +121,13 @@ class GdaxChartData:
 
     def get_candles(self):
         from stocklook.quant import RSI
-        df = self.gdax.get_candles(self.product,
-                                   self.start,
-                                   self.end,
-                                   self.granularity,
-                                   convert_dates=True,
-                                   to_frame=True)
+        source = (self.gdax if self.store is None else self.store)
+        df = source.get_candles(self.product,
+                                self.start,
+                                self.end,
+                                self.granularity,
+                                convert_dates=True,
+                                to_frame=True)
 
         close = df[self.CLOSE]
         df.loc[:, self.SMA5] = close.rolling(5).mean()
@@ -610,14 +610,8 @@ class GdaxOHLCViewer:
             gaps = self.get_time_gaps()
 
         for start, end in gaps:
-            _, max = self.get_time_bump(start, end, bump_start=False)
-            if max < end:
-                df = DataFrame()
-                while max < end:
-                    df = df.append(self.request_ohlc(start, max))
-                    start, max = self.get_time_bump(start, end)
-            else:
-                df = self.request_ohlc(start, end)
+            # Gdax.get_candles splits long gaps into windows itself.
+            df = self.request_ohlc(start, end)
 
             if df.empty:
                 logger.info("Failed 2nd time on gap {}: "
@@ -643,58 +637,28 @@ class GdaxOHLCViewer:
                         "no data for {} "
                         "pair.".format(self.pair))
             start = n - DateOffset(months=months)
-            end = start + DateOffset(days=self.MAX_SPAN)
         else:
             # Existing database/table/dates
             start = Timestamp(max_time) + DateOffset(seconds=self.GRANULARITY)
-
-            end = start + DateOffset(days=self.MAX_SPAN)
-            if end > n:
-                end = n
             logger.info("Existing OHLC start: {} "
-                        "end: {}".format(start, end))
-
-        total, n = 0, now_local()
-        empties = 0
-
-        while end < n:
+                        "end: {}".format(start, n))
 
-            df = self.request_ohlc(start, end, convert_dates=False)
-            df = self.slice_frame(df)
+        # Gdax.get_candles splits the range into
+        # windows and requests them in parallel.
+        total = 0
+        df = self.request_ohlc(start, n, convert_dates=False)
+        df = self.slice_frame(df)
 
-            if df.empty:
-                logger.info("Got empty data set for "
-                            "start: {} and end: "
-                            "{}".format(start, end))
-                empties += 1
-
-            else:
-                total += df.index.size
-                self.load_df(df,
-                             thread=thread,
-                             raise_on_error=raise_on_error)
-            '''
-            # Bump start/end times by the difference
-            # between now and the end time or by the
-            # max span allowed for the granularity.
-            diff = n - end
-            secs = diff.total_seconds()
-            if secs < span_secs:
-                bump = DateOffset(seconds=secs)
-            else:
-                bump = DateOffset(days=self.MAX_SPAN)
-
-            start += bump
-            end += bump
-            '''
-
-            start, end = self.get_time_bump(start, end,
-                                            now_time=n,
-                                            bump_start=True)
+        if df.empty:
+            logger.info("Got empty data set for "
+                        "start: {} and end: "
+                        "{}".format(start, n))
+        else:
+            total += df.index.size
+            self.load_df(df,
+                         thread=thread,
+                         raise_on_error=raise_on_error)
 
-            logger.info('{}: {} - '
-                        '{}'.format(self.pair,
-                                    start, end))
         sess.commit()
         sess.close()
         logger.info("OHLC sync complete for "
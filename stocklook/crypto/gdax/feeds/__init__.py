@@ -1,6 +1,7 @@
 from .db_feed import GdaxDatabaseFeed
 from .book_feed import GdaxBookFeed
 from .websocket_client import GdaxWebsocketClient
+from .engine import GdaxFeedEngine
 from stocklook.utils.timetools import timestamp_to_local
 from .db_loader import GdaxDatabaseLoader
 
@@ -79,3 +80,12 @@ class GdaxTradeFeed(GdaxDatabaseFeed):
         """
         from stocklook.crypto.gdax.tables import GdaxSQLFeedEntry
         super(GdaxTradeFeed, self).__init__(GdaxSQLFeedEntry, **kwargs)
+from .decoder import GdaxMessageDecoder
+from .buffer import GdaxMessageBuffer
+from .hub import GdaxFeedHub, GdaxFeedHubClient
+from .recorder import GdaxFeedRecorder, GdaxFeedReader, GdaxFeedReplay
+from .book_view import GdaxBookView
+from .l2_book_feed import GdaxL2BookFeed
+from .book_manager import GdaxBookManager
+from .impact import GdaxImpactEstimator
+from .auditor import GdaxBookAuditor
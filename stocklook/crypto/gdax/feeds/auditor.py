@@ -0,0 +1,257 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from threading import Thread, Event, Lock
+from time import time
+from stocklook.crypto.gdax.feeds.book_feed import BOOK_LIVE
+import logging as lg
+logger = lg.getLogger(__name__)
+
+
+def compare_levels(side, remote, local, size_tolerance=1e-8):
+    """
+    Compares one side of a level 2 book from the REST API with
+    the same price range of a local book.
+
+    :param side: (str) 'buy' (bids) or 'sell' (asks).
+    :param remote: (list) [price, size, ...] rows, best first.
+    :param local: (list) (price, size) levels, best first.
+    :param size_tolerance: (float, default 1e-8)
+        Size differences this small are ignored.
+    :return: (dict)
+        levels: remote levels compared, missing: remote levels the local book lacks,
+        extra: local levels the remote book lacks, changed: levels whose size differs,
+        size: the remote size compared and size_diff: the sum of absolute differences.
+    """
+    remote = {float(r[0]): float(r[1]) for r in remote}
+    if remote:
+        # Only compare the range the exchange returned.
+        bound = min(remote) if side == 'buy' else max(remote)
+        if side == 'buy':
+            local = {p: s for p, s in local if p >= bound}
+        else:
+            local = {p: s for p, s in local if p <= bound}
+    else:
+        local = dict(local)
+
+    missing = extra = changed = 0
+    size_diff = 0.0
+    for price, size in remote.items():
+        have = local.get(price, None)
+        if have is None:
+            missing += 1
+            size_diff += size
+        elif abs(have - size) > size_tolerance:
+            changed += 1
+            size_diff += abs(have - size)
+    for price, size in local.items():
+        if price not in remote:
+            extra += 1
+            size_diff += size
+
+    return dict(levels=len(remote), missing=missing, extra=extra, changed=changed,
+                size=sum(remote.values()), size_diff=size_diff)
+
+
+class GdaxBookAuditor:
+    """
+    Periodically checks GdaxBookFeed books against the exchange's
+    level 2 book (GET /products/<product-id>/book?level=2) on a
+    background thread and resyncs a product whose book has drifted.
+
+        auditor = GdaxBookAuditor(manager, interval=30).start()
+        ...
+        auditor.get_stats()['BTC-USD']['drift']
+
+    Drift is the size that differs between the two books
+    (levels missing, extra or a different size) as a fraction of
+    the exchange's size over the price range it returned. Books are
+    only compared when their sequences are within sequence_tolerance
+    messages of each other, and a product is only resynced after
+    max_drift is exceeded on confirm audits in a row, so messages in
+    flight while the snapshot is fetched don't trigger resyncs.
+
+    The REST request is made on the auditor's thread. The local
+    levels are read from the feed's top_n view snapshot when it has
+    one; otherwise the best levels are copied under the feed's lock,
+    which holds up its messages for about as long as that copy takes.
+    """
+    def __init__(self, feeds, gdax=None, interval=60, depth=50, sequence_tolerance=200,
+                 max_drift=0.01, confirm=2):
+        """
+        :param feeds: (GdaxBookFeed, list, gdax.feeds.GdaxBookManager)
+            The book(s) to audit.
+        :param gdax: (gdax.api.Gdax, default None)
+            None uses each feed's own client.
+        :param interval: (int, default 60)
+            Seconds between audits of every product.
+        :param depth: (int, default 50)
+            Levels compared per side (the REST API returns 50).
+        :param sequence_tolerance: (int, default 200)
+            Audits where the local book's sequence differs from the
+            exchange's by more than this are skipped.
+        :param max_drift: (float, default 0.01)
+            The drift (fraction) that counts as a mismatch.
+        :param confirm: (int, default 2)
+            Consecutive mismatches before a product is resynced.
+        """
+        if hasattr(feeds, 'books'):
+            feeds = list(feeds.books.values())
+        elif not isinstance(feeds, (list, tuple)):
+            feeds = [feeds]
+        self.feeds = list(feeds)
+        self.gdax = gdax
+        self.interval = interval
+        self.depth = depth
+        self.sequence_tolerance = sequence_tolerance
+        self.max_drift = max_drift
+        self.confirm = confirm
+        self.thread = None
+        self._stop = Event()
+        self._lock = Lock()
+        self.stats = {f.product_id: self._new_stats() for f in self.feeds}
+
+    @staticmethod
+    def _new_stats():
+        return dict(audits=0, skipped=0, errors=0, mismatches=0, consecutive=0, resyncs=0,
+                    drift=None, max_drift=0.0, sequence_lag=None, last=None, audited=None)
+
+    def start(self):
+        """
+        Audits on a background thread until GdaxBookAuditor.close is called.
+        :return: (GdaxBookAuditor)
+        """
+        if self.thread is None:
+            self._stop.clear()
+            self.thread = Thread(target=self.run, daemon=True)
+            self.thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self.thread is not None:
+            self.thread.join(5)
+            self.thread = None
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            for feed in self.feeds:
+                if self._stop.is_set():
+                    break
+                try:
+                    self.audit(feed)
+                except Exception as e:
+                    logger.warning("{} audit failed: {}".format(feed.product_id, e))
+                    with self._lock:
+                        self.stats[feed.product_id]['errors'] += 1
+
+    def get_local_levels(self, feed):
+        """
+        Returns (sequence, bids, asks) of the feed's best depth levels as
+        (price, size) lists, best first, or None when the book isn't live.
+        """
+        if feed.state != BOOK_LIVE:
+            return None
+        view = feed.view
+        if view is not None and view.n >= self.depth:
+            snap = feed.get_snapshot()
+            return (snap.sequence,
+                    list(zip(snap.bids[0][:self.depth].tolist(), snap.bids[1][:self.depth].tolist())),
+                    list(zip(snap.asks[0][:self.depth].tolist(), snap.asks[1][:self.depth].tolist())))
+
+        with feed._sync_lock:
+            if feed.state != BOOK_LIVE:
+                return None
+            return (feed._sequence,
+                    [(p, level.size) for p, level in feed._bids.nlargest(self.depth)],
+                    [(p, level.size) for p, level in feed._asks.nsmallest(self.depth)])
+
+    def audit(self, feed):
+        """
+        Compares one feed's book with the exchange's and
+        resyncs it when it has drifted.
+        :return: (dict, None) The comparison or None when skipped.
+        """
+        gdax = (self.gdax if self.gdax is not None else feed._client)
+        # A cached book would be older than the feed and skipped.
+        remote = gdax.get_book(feed.product_id, level=2, cache=False)
+        local = self.get_local_levels(feed)
+        stats = self.stats[feed.product_id]
+
+        with self._lock:
+            if local is None:
+                stats['skipped'] += 1
+                return None
+            sequence, bids, asks = local
+            lag = sequence - remote['sequence']
+            stats['sequence_lag'] = lag
+            if abs(lag) > self.sequence_tolerance:
+                stats['skipped'] += 1
+                return None
+
+            result = dict(sequence=sequence, sequence_lag=lag,
+                          bids=compare_levels('buy', remote['bids'][:self.depth], bids),
+                          asks=compare_levels('sell', remote['asks'][:self.depth], asks))
+            size = result['bids']['size'] + result['asks']['size']
+            diff = result['bids']['size_diff'] + result['asks']['size_diff']
+            drift = result['drift'] = (diff / size if size else float(bool(diff)))
+
+            stats['audits'] += 1
+            stats['drift'] = drift
+            stats['max_drift'] = max(stats['max_drift'], drift)
+            stats['last'] = result
+            stats['audited'] = time()
+            if drift <= self.max_drift:
+                stats['consecutive'] = 0
+                return result
+            stats['mismatches'] += 1
+            stats['consecutive'] += 1
+            resync = stats['consecutive'] >= self.confirm
+            if resync:
+                stats['consecutive'] = 0
+                stats['resyncs'] += 1
+
+        logger.warning("{} book drift {:.3%} at sequence {}{}".format(
+            feed.product_id, drift, sequence, (', resyncing.' if resync else '')))
+        if resync:
+            with feed._sync_lock:
+                if feed.state == BOOK_LIVE:
+                    feed.resync()
+        return result
+
+    def get_stats(self):
+        """
+        :return: (dict) {product_id: {audits, skipped, errors, mismatches, consecutive
+            (mismatches), resyncs, drift, max_drift, sequence_lag, last, audited,
+            missed_matches (see GdaxBookFeed.match)}}
+        """
+        with self._lock:
+            stats = {p: dict(s) for p, s in self.stats.items()}
+        for feed in self.feeds:
+            stats[feed.product_id]['missed_matches'] = feed.missed_matches
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            for p in self.stats:
+                self.stats[p] = self._new_stats()
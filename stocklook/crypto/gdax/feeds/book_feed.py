@@ -27,18 +27,297 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 import pickle
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from itertools import islice
+from threading import Thread, Lock
+from time import sleep, perf_counter
 from bintrees import RBTree
+import numpy as np
 from stocklook.crypto.gdax.feeds.websocket_client import GdaxWebsocketClient
+from stocklook.crypto.gdax.feeds.book_view import GdaxBookView
+import logging as lg
+logger = lg.getLogger(__name__)
+
+# GdaxBookFeed.state
+BOOK_EMPTY = 'empty'
+BOOK_SYNCING = 'syncing'
+BOOK_LIVE = 'live'
+
+# The full channel's messages; others (e.g. level2 or ticker
+# messages from a GdaxFeedHub) are ignored.
+FULL_TYPES = frozenset(['received', 'open', 'done', 'match', 'change', 'activate'])
+
+# GdaxBookFeed backends
+RBTREE = 'rbtree'
+ARRAY = 'array'
+
+
+class GdaxBookOrder:
+    """
+    An order resting in a GdaxBookFeed.
+    Fields can also be read like a dictionary (order['size']).
+    """
+    __slots__ = ['id', 'side', 'price', 'size', 'level']
+
+    def __init__(self, order_id, side, price, size, level=None):
+        self.id = order_id
+        self.side = side
+        self.price = price
+        self.size = size
+        self.level = level
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return 'GdaxBookOrder({}, {}, {}, {})'.format(self.id, self.side, self.price, self.size)
+
+
+class GdaxPriceLevel:
+    """
+    The orders at one price in time priority (FIFO) with their total size.
+    Orders are removed or resized in O(1) by id.
+    """
+    __slots__ = ['price', 'orders', 'size']
+    ORDERS_CLASS = OrderedDict
+
+    def __init__(self, price):
+        self.price = price
+        self.orders = self.ORDERS_CLASS()     # order_id: GdaxBookOrder
+        self.size = 0.0
+
+    def append(self, order):
+        order.level = self
+        self.orders[order.id] = order
+        self.size += order.size
+
+    def remove(self, order_id):
+        order = self.orders.pop(order_id)
+        if self.orders:
+            self.size -= order.size
+        else:
+            # Don't carry float error into the next order here.
+            self.size = 0.0
+        return order
+
+    def resize(self, order_id, size):
+        order = self.orders[order_id]
+        self.size += size - order.size
+        order.size = size
+
+    def __iter__(self):
+        return iter(self.orders.values())
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.orders)
+        try:
+            return next(islice(self.orders.values(), i, None))
+        except StopIteration:
+            raise IndexError(i)
+
+    def __repr__(self):
+        return 'GdaxPriceLevel({}, {} orders, size={})'.format(self.price, len(self.orders), self.size)
+
+
+class GdaxCompactPriceLevel(GdaxPriceLevel):
+    """
+    A GdaxPriceLevel holding its orders in a plain dict
+    (which keeps insertion order) using less than half the memory
+    of an OrderedDict per order.
+    """
+    __slots__ = []
+    ORDERS_CLASS = dict
+
+
+class GdaxPriceArray:
+    """
+    Price levels of one side of the book keyed by integer ticks:
+    a sorted list of ticks searched with bisect plus a dict of levels.
+
+    Implements the parts of bintrees.RBTree GdaxBookFeed uses
+    (prices are given and returned as floats).
+    """
+    __slots__ = ['tick', 'ticks', 'levels']
+
+    def __init__(self, tick=1e-8):
+        """
+        :param tick: (float, default 1e-8)
+            The price increment; prices are stored as multiples of it.
+        """
+        self.tick = tick
+        self.ticks = list()
+        self.levels = dict()            # ticks: GdaxPriceLevel
+
+    def _key(self, price):
+        return round(price / self.tick)
+
+    def get(self, price, default=None):
+        return self.levels.get(self._key(price), default)
+
+    def __getitem__(self, price):
+        return self.levels[self._key(price)]
+
+    def __contains__(self, price):
+        return self._key(price) in self.levels
+
+    def insert(self, price, level):
+        key = self._key(price)
+        if key not in self.levels:
+            insort(self.ticks, key)
+        self.levels[key] = level
+
+    def remove(self, price):
+        key = self._key(price)
+        del self.levels[key]
+        del self.ticks[bisect_left(self.ticks, key)]
+
+    def min_key(self):
+        try:
+            return self.levels[self.ticks[0]].price
+        except IndexError:
+            raise ValueError("Empty book")
+
+    def max_key(self):
+        try:
+            return self.levels[self.ticks[-1]].price
+        except IndexError:
+            raise ValueError("Empty book")
+
+    def __iter__(self):
+        levels = self.levels
+        return iter([levels[k].price for k in self.ticks])
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def _item(self, i):
+        if i < 0 or i >= len(self.ticks):
+            raise KeyError(i)
+        level = self.levels[self.ticks[i]]
+        return level.price, level
+
+    def prev_item(self, price):
+        """
+        The (price, level) below an existing price.
+        """
+        key = self._key(price)
+        if key not in self.levels:
+            raise KeyError(price)
+        return self._item(bisect_left(self.ticks, key) - 1)
+
+    def succ_item(self, price):
+        """
+        The (price, level) above an existing price.
+        """
+        key = self._key(price)
+        if key not in self.levels:
+            raise KeyError(price)
+        return self._item(bisect_left(self.ticks, key) + 1)
+
+    def floor_item(self, price):
+        return self._item(bisect_right(self.ticks, self._key(price)) - 1)
+
+    def ceiling_item(self, price):
+        return self._item(bisect_left(self.ticks, self._key(price)))
+
+    def nsmallest(self, n):
+        levels = self.levels
+        return [(levels[k].price, levels[k]) for k in self.ticks[:n]]
+
+    def nlargest(self, n):
+        levels = self.levels
+        return [(levels[k].price, levels[k]) for k in reversed(self.ticks[-n:])]
+
+
+class BookSide:
+    """
+    NumPy arrays for one side of a BookSnapshot, best price first:
+    prices, sizes and the cumulative size and notional (price * size)
+    from the best price out.
+    """
+    __slots__ = ['side', 'rows', 'prices', 'sizes', 'cum_size', 'cum_notional', '_keys']
+
+    def __init__(self, side, rows):
+        """
+        :param side: (str) 'buy' (bids) or 'sell' (asks).
+        :param rows: (list) [price, size, ...] rows, best first.
+        """
+        self.side = side
+        self.rows = rows
+        self.prices = np.fromiter((r[0] for r in rows), dtype=np.float64, count=len(rows))
+        self.sizes = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+        self.cum_size = np.cumsum(self.sizes)
+        self.cum_notional = np.cumsum(self.prices * self.sizes)
+        # Ascending keys to search: bids are stored highest first.
+        self._keys = (-self.prices if side == 'buy' else self.prices)
+
+    def count_to(self, price):
+        """
+        The number of rows at prices as good as or better than price.
+        """
+        key = (-price if self.side == 'buy' else price)
+        return int(np.searchsorted(self._keys, key, side='right'))
+
+    def depth_to(self, price):
+        """
+        The total size at prices as good as or better than price.
+        """
+        n = self.count_to(price)
+        return (float(self.cum_size[n - 1]) if n else 0)
+
+    def walls(self, size, within_percent):
+        """
+        Rows of at least size within within_percent of the best price.
+        """
+        if not len(self.prices):
+            return []
+        best = self.prices[0]
+        if self.side == 'buy':
+            n = self.count_to(best - best * within_percent)
+        else:
+            n = self.count_to(best + best * within_percent)
+        return [self.rows[i] for i in np.flatnonzero(self.sizes[:n] >= size)]
+
+    def vwap(self, size):
+        """
+        The average price paid (or received) trading size
+        against this side, or None if it isn't deep enough.
+        """
+        if size <= 0 or not len(self.cum_size) or size > self.cum_size[-1]:
+            return None
+        n = int(np.searchsorted(self.cum_size, size))
+        notional = (self.cum_notional[n - 1] if n else 0.0)
+        filled = (self.cum_size[n - 1] if n else 0.0)
+        notional += (size - filled) * self.prices[n]
+        return float(notional / size)
 
 
 class BookSnapshot:
     """
     Wraps a dictionary outputted by BookFeed
     with helper methods to access bids/asks/walls/etc.
+
+    Calculations use NumPy arrays (see BookSide) built once
+    per refresh rather than looping over the levels.
     """
     def __init__(self, book_dict, book_feed):
         self.book_dict = book_dict
         self.book_feed = book_feed
+        self._sides = None
 
     @property
     def d(self):
@@ -71,8 +350,31 @@ class BookSnapshot:
             self.refresh()
         return self.book_dict['asks']
 
+    @property
+    def bid_side(self):
+        """
+        :return: (BookSide)
+        """
+        return self._get_sides()[0]
+
+    @property
+    def ask_side(self):
+        """
+        :return: (BookSide)
+        """
+        return self._get_sides()[1]
+
+    def _get_sides(self):
+        if self._sides is None:
+            self._sides = (BookSide('buy', self.bids), BookSide('sell', self.asks))
+        return self._sides
+
     def calculate_wall_size(self, walls=None, min_size=20, within_percent=0.01, measure_size=7):
-        if measure_size >0:
+        """
+        Returns the average size of the measure_size smallest walls,
+        or None when there are no walls.
+        """
+        if measure_size < 0:
             measure_size = -measure_size
 
         if walls is None:
@@ -81,31 +383,21 @@ class BookSnapshot:
         elif len(walls) == 2:
             walls = walls[0] + walls[1]
 
-        wall_sort = sorted(walls, key=lambda x: x[1], reverse=True)[measure_size:]
-        return sum([w[1] for w in wall_sort]) / len(wall_sort)
+        if not len(walls) or not measure_size:
+            return None
 
-    def calculate_bid_depth(self, to_price):
-        depth = 0
-
-        for price, size, o_id in self.bids:
-            if price < to_price:
-                break
-            depth += size
+        sizes = np.sort(np.fromiter((w[1] for w in walls), dtype=np.float64, count=len(walls)))
+        return float(sizes[:measure_size].mean())
 
-        return depth
+    def calculate_bid_depth(self, to_price):
+        return self.bid_side.depth_to(to_price)
 
     def calculate_ask_depth(self, to_price):
-        depth = 0
-
-        for price, size, o_id in self.asks:
-            if price > to_price:
-                break
-            depth += size
-
-        return depth
+        return self.ask_side.depth_to(to_price)
 
     def refresh(self):
         self.book_dict = self.book_feed.get_current_book()
+        self._sides = None
         self.bids.reverse()
 
     def get_spread_wall(self, wall_qty=50):
@@ -116,29 +408,63 @@ class BookSnapshot:
                self.get_ask_walls(size, within_percent)
 
     def get_bid_walls(self, size, within_percent=0.01):
-        bids = self.bids
-        price = float(bids[0][0])
-        price -= (price*within_percent)
-
-        return [b for b in bids
-                if b[0] >= price
-                and b[1] >= size]
+        return self.bid_side.walls(size, within_percent)
 
     def get_ask_walls(self, size, within_percent=0.01):
-        asks = self.asks
-        price = float(asks[0][0])
-        price += (price * within_percent)
-
-        return [a for a in asks
-                if a[0] >=price
-                and a[1] >= size]
+        return self.ask_side.walls(size, within_percent)
 
     def get_spread(self):
-        return self.asks[0] - self.bids[0]
+        return self.asks[0][0] - self.bids[0][0]
+
+    def get_vwap(self, side, size):
+        """
+        The average price of a market order of size.
+        :param side: (str) 'buy' walks the asks, 'sell' walks the bids.
+        :param size: (float)
+        :return: (float, None) None if the book isn't deep enough.
+        """
+        return (self.ask_side if side == 'buy' else self.bid_side).vwap(size)
 
 
 class GdaxBookFeed(GdaxWebsocketClient):
-    def __init__(self, product_id='LTC-USD', log_to=None, gdax=None, auth=True):
+    """
+    Maintains a level 3 order book for one product from the full channel.
+
+    The book is (re)built without dropping the socket: on the first
+    message or a sequence gap the feed starts syncing, buffering
+    messages while a level 3 snapshot is fetched on a background thread.
+    The snapshot is then loaded and buffered messages newer than it are
+    applied before the book goes live again.
+    Messages for other products are ignored so each product's
+    sequence is tracked (and resynced) on its own.
+
+    A book registered with a GdaxFeedHub (or owned by a GdaxBookManager)
+    leaves gap detection and the connection to the hub, which
+    calls GdaxBookFeed.resync when messages were missed.
+    """
+    DECODE_FIELDS = ['type', 'sequence', 'product_id', 'order_id', 'side', 'price', 'size',
+                     'remaining_size', 'maker_order_id', 'new_size']
+
+    def __init__(self, product_id='LTC-USD', log_to=None, gdax=None, auth=True,
+                 backend=RBTREE, tick=1e-8, top_n=None):
+        """
+        :param product_id: (str, default 'LTC-USD')
+        :param log_to: (file, default None) Pickles every message to the file.
+        :param gdax: (gdax.api.Gdax, default None) Fetches snapshots.
+        :param auth: (bool, default True)
+        :param backend: (str, default 'rbtree')
+            'rbtree' stores price levels in a bintrees.RBTree.
+            'array' stores them in a GdaxPriceArray, which is faster and
+            smaller when bintrees has no C extension.
+        :param tick: (float, default 1e-8)
+            The price increment used by the 'array' backend.
+        :param top_n: (int, default None)
+            Keeps a GdaxBookView of the best top_n levels per side
+            (see GdaxBookFeed.get_top_book). None doesn't.
+        """
+        if backend not in (RBTREE, ARRAY):
+            raise ValueError("backend must be '{}' or '{}', not {}".format(RBTREE, ARRAY, backend))
+        self._level_class = (GdaxCompactPriceLevel if backend == ARRAY else GdaxPriceLevel)
 
         if gdax is None:
             from stocklook.crypto.gdax.api import Gdax
@@ -151,6 +477,10 @@ class GdaxBookFeed(GdaxWebsocketClient):
                                            api_passphrase=gdax.api_passphrase)
         self._asks = None
         self._bids = None
+        self._orders = dict()           # order_id: GdaxBookOrder
+        self.backend = backend
+        self.tick = tick
+        self.view = (GdaxBookView(top_n) if top_n else None)
         self._client = gdax
         self._sequence = -1
         self._log_to = log_to
@@ -159,6 +489,20 @@ class GdaxBookFeed(GdaxWebsocketClient):
         self._current_ticker = None
         self._key_errs = 0
         self.message_count = 0
+        self.state = BOOK_EMPTY
+        self._pending = list()
+        self._sync_lock = Lock()
+        self._sync_started = None
+        # Seconds before refetching a snapshot, doubling per attempt.
+        self.snapshot_retry = 1.0
+        self.max_snapshot_retry = 30.0
+        # The most messages buffered while syncing.
+        self.max_pending = 100000
+        self.pending_dropped = 0
+        self.gaps = 0
+        self.resyncs = 0
+        self.resync_seconds = 0.0
+        self.missed_matches = 0
 
     @property
     def product_id(self):
@@ -173,62 +517,180 @@ class GdaxBookFeed(GdaxWebsocketClient):
         if self._log_to:
             pickle.dump(message, self._log_to)
 
+        if message.get('type', None) not in FULL_TYPES:
+            return
+
         try:
             sequence = message['sequence']
         except KeyError:
-            print("Error: {}".format(message))
+            # The message can't be placed so the book may be missing it.
+            logger.warning("{} message without a sequence, "
+                           "resyncing: {}".format(self.product_id, message))
             self._key_errs += 1
-            if self._key_errs >= 3:
-                print("3 errors retrieving sequence. Restarting....")
-                self.close()
-                self._key_errs = 0
-                self.start()
+            with self._sync_lock:
+                if self.state == BOOK_LIVE:
+                    self.resync()
             return
 
-        if self._sequence == -1:
-            self._asks = RBTree()
-            self._bids = RBTree()
-            res = self._client.get_book(self.product_id, level=3)
-            for bid in res['bids']:
-                self.add({
-                    'id': bid[2],
-                    'side': 'buy',
-                    'price': float(bid[0]),
-                    'size': float(bid[1])
-                })
-            for ask in res['asks']:
-                self.add({
-                    'id': ask[2],
-                    'side': 'sell',
-                    'price': float(ask[0]),
-                    'size': float(ask[1])
-                })
-            self._sequence = res['sequence']
-
-        if sequence <= self._sequence:
-            # ignore older messages (e.g. before order book
-            # initialization from getProductOrderBook)
+        product_id = message.get('product_id', None)
+        if product_id is not None and product_id != self.product_id:
             return
-        elif sequence > self._sequence + 1:
-            print('Error: messages missing ({} - {}). '
-                  'Re-initializing websocket.'.format(sequence, self._sequence))
-            self.close()
-            self.start()
+
+        with self._sync_lock:
+            if self.state != BOOK_LIVE:
+                self._buffer(message)
+                if self.state == BOOK_EMPTY:
+                    self.resync()
+                return
+
+            if sequence <= self._sequence:
+                # ignore older messages (e.g. before order book
+                # initialization from getProductOrderBook)
+                return
+            elif sequence > self._sequence + 1 and self.hub is None:
+                logger.warning("{} messages missing ({} - {}), "
+                               "resyncing.".format(self.product_id, self._sequence, sequence))
+                self.gaps += 1
+                self._buffer(message)
+                self.resync()
+                return
+
+            self._apply(message)
+
+    def _buffer(self, message):
+        # Called holding _sync_lock while syncing.
+        pending = self._pending
+        if len(pending) >= self.max_pending:
+            # Drop the oldest half: a snapshot newer than them is needed anyway.
+            n = len(pending) // 2
+            del pending[:n]
+            self.pending_dropped += n
+            logger.warning("{} sync buffer full, dropped {} messages".format(self.product_id, n))
+        pending.append(message)
+
+    def resync(self):
+        """
+        Starts rebuilding the book from a snapshot fetched on a
+        background thread. Messages received meanwhile are buffered.
+        """
+        if self.state == BOOK_SYNCING:
             return
+        self.state = BOOK_SYNCING
+        self._sync_started = perf_counter()
+        Thread(target=self._sync, daemon=True).start()
+
+    def _sync(self):
+        attempt = 0
+        while not self.stop:
+            if attempt:
+                sleep(min(self.snapshot_retry * 2 ** (attempt - 1), self.max_snapshot_retry))
+            attempt += 1
+            try:
+                res = self._client.get_book(self.product_id, level=3)
+            except Exception as e:
+                logger.warning("{} snapshot failed: {}".format(self.product_id, e))
+                continue
 
-        msg_type = message['type']
-        if msg_type == 'open':
-            self.add(message)
-        elif msg_type == 'done' and 'price' in message:
-            self.remove(message)
-        elif msg_type == 'match':
-            self.match(message)
-            self._current_ticker = message
-        elif msg_type == 'change':
-            self.change(message)
+            # Built without the lock so messages keep being buffered meanwhile.
+            trees = self._build(res)
+            snapshot_seq = res['sequence']
+
+            with self._sync_lock:
+                if self.state != BOOK_SYNCING:
+                    return
+                pending = self._pending
+                if pending and pending[0]['sequence'] > snapshot_seq + 1:
+                    # The snapshot is older than the buffered
+                    # messages and can't be bridged: fetch another.
+                    logger.info("{} snapshot {} is older than buffered message {}, "
+                                "refetching".format(self.product_id, snapshot_seq,
+                                                    pending[0]['sequence']))
+                    continue
+
+                self._install(trees, snapshot_seq)
+                pending = [m for m in pending if m['sequence'] > snapshot_seq]
+                for i, m in enumerate(pending):
+                    if m['sequence'] > self._sequence + 1:
+                        # A gap within the buffer.
+                        self.gaps += 1
+                        self._pending = pending[i:]
+                        break
+                    self._apply(m)
+                else:
+                    self._pending = list()
+                    self.state = BOOK_LIVE
+                    self.resyncs += 1
+                    self.resync_seconds = perf_counter() - self._sync_started
+                    return
 
+    def _load(self, res):
+        """
+        Replaces the book with a level 3 snapshot.
+        """
+        self._install(self._build(res), res['sequence'])
+
+    def _build(self, res):
+        asks = self._new_tree()
+        bids = self._new_tree()
+        orders = dict()
+        new_level = self._level_class
+
+        for key, side, tree in (('bids', 'buy', bids), ('asks', 'sell', asks)):
+            last, level = None, None
+            for price, size, order_id in res[key]:
+                if price != last:
+                    # Snapshots are sorted by price.
+                    last = price
+                    p = float(price)
+                    level = tree.get(p)
+                    if level is None:
+                        level = new_level(p)
+                        tree.insert(p, level)
+                o = GdaxBookOrder(order_id, side, level.price, float(size))
+                level.append(o)
+                orders[order_id] = o
+        return asks, bids, orders
+
+    def _install(self, trees, sequence):
+        self._asks, self._bids, self._orders = trees
         self._sequence = sequence
 
+        view = self.view
+        if view is not None:
+            view.version += 1
+            view.bids.load(level for price, level in self._bids.nlargest(view.n))
+            view.asks.load(level for price, level in self._asks.nsmallest(view.n))
+            view.sequence = self._sequence
+            view.version += 1
+
+    def _new_tree(self):
+        if self.backend == ARRAY:
+            return GdaxPriceArray(self.tick)
+        return RBTree()
+
+    def _apply(self, message):
+        view = self.view
+        if view is not None:
+            # Odd while the view changes, see GdaxBookView.snapshot
+            view.version += 1
+        try:
+            msg_type = message['type']
+            if msg_type == 'open':
+                self.add(message)
+            elif msg_type == 'done' and 'price' in message:
+                self.remove(message)
+            elif msg_type == 'match':
+                self.match(message)
+                self._current_ticker = message
+            elif msg_type == 'change':
+                self.change(message)
+
+            self._sequence = message['sequence']
+        finally:
+            if view is not None:
+                view.sequence = self._sequence
+                view.version += 1
+
         # bid = self.get_bid()
         # bids = self.get_bids(bid)
         # bid_depth = sum([b['size'] for b in bids])
@@ -238,75 +700,96 @@ class GdaxBookFeed(GdaxWebsocketClient):
         # print('bid: %f @ %f - ask: %f @ %f' % (bid_depth, bid, ask_depth, ask))
 
     def on_error(self, e):
-        self._sequence = -1
+        logger.warning("{} error: {} - rebuilding the book.".format(self.product_id, e))
+        with self._sync_lock:
+            self._sequence = -1
+            self.state = BOOK_EMPTY
+            self._pending = list()
+        if self.hub is not None:
+            # The hub owns the connection.
+            self.resync()
+            return
         self.close()
         self.start()
 
     def add(self, order):
-        order = {
-            'id': order.get('order_id') or order['id'],
-            'side': order['side'],
-            'price': float(order['price']),
-            'size': float(order.get('size') or order['remaining_size'])
-        }
-        if order['side'] == 'buy':
-            bids = self.get_bids(order['price'])
-            if bids is None:
-                bids = [order]
-            else:
-                bids.append(order)
-            self.set_bids(order['price'], bids)
+        o = GdaxBookOrder(order.get('order_id') or order['id'],
+                          order['side'],
+                          float(order['price']),
+                          float(order.get('size') or order['remaining_size']))
+        tree = (self._bids if o.side == 'buy' else self._asks)
+        level = tree.get(o.price)
+        if level is None:
+            level = self._level_class(o.price)
+            tree.insert(o.price, level)
+            level.append(o)
+            if self.view is not None:
+                self.view.get_side(o.side).insert(level)
         else:
-            asks = self.get_asks(order['price'])
-            if asks is None:
-                asks = [order]
+            # Share the level's float.
+            o.price = level.price
+            level.append(o)
+            self._touch(o.side, level)
+        self._orders[o.id] = o
+
+    def _touch(self, side, level):
+        # Updates the view if the level is in it.
+        if self.view is not None:
+            view = self.view.get_side(side)
+            if view.inside(level.price):
+                view.update(level)
+
+    def _discard(self, o):
+        level = o.level
+        level.remove(o.id)
+        if level:
+            self._touch(o.side, level)
+            return
+
+        tree = (self._bids if o.side == 'buy' else self._asks)
+        tree.remove(level.price)
+        if self.view is not None:
+            view = self.view.get_side(o.side)
+            if view.inside(level.price):
+                next_level = None
+                if view.length == view.n:
+                    next_level = self._get_worse_level(o.side, view.last_price)
+                view.delete(level.price, next_level)
+
+    def _get_worse_level(self, side, price):
+        """
+        Returns the best level beyond a price (which may
+        no longer be in the book) or None.
+        """
+        tree = (self._bids if side == 'buy' else self._asks)
+        try:
+            if side == 'buy':
+                item = (tree.prev_item(price) if price in tree else tree.floor_item(price))
             else:
-                asks.append(order)
-            self.set_asks(order['price'], asks)
+                item = (tree.succ_item(price) if price in tree else tree.ceiling_item(price))
+        except KeyError:
+            return None
+        return item[1]
 
     def remove(self, order):
-        price = float(order['price'])
-        if order['side'] == 'buy':
-            bids = self.get_bids(price)
-            if bids is not None:
-                bids = [o for o in bids if o['id'] != order['order_id']]
-                if len(bids) > 0:
-                    self.set_bids(price, bids)
-                else:
-                    self.remove_bids(price)
-        else:
-            asks = self.get_asks(price)
-            if asks is not None:
-                asks = [o for o in asks if o['id'] != order['order_id']]
-                if len(asks) > 0:
-                    self.set_asks(price, asks)
-                else:
-                    self.remove_asks(price)
+        o = self._orders.pop(order['order_id'], None)
+        if o is not None:
+            self._discard(o)
 
     def match(self, order):
-        size = float(order['size'])
-        price = float(order['price'])
-
-        if order['side'] == 'buy':
-            bids = self.get_bids(price)
-            if not bids:
-                return
-            assert bids[0]['id'] == order['maker_order_id']
-            if bids[0]['size'] == size:
-                self.set_bids(price, bids[1:])
-            else:
-                bids[0]['size'] -= size
-                self.set_bids(price, bids)
+        o = self._orders.get(order['maker_order_id'], None)
+        if o is None:
+            # Makers rest on the book: the book has drifted
+            # (see gdax.feeds.auditor.GdaxBookAuditor).
+            self.missed_matches += 1
+            return
+        size = o.size - float(order['size'])
+        if size <= 0:
+            del self._orders[o.id]
+            self._discard(o)
         else:
-            asks = self.get_asks(price)
-            if not asks:
-                return
-            assert asks[0]['id'] == order['maker_order_id']
-            if asks[0]['size'] == size:
-                self.set_asks(price, asks[1:])
-            else:
-                asks[0]['size'] -= size
-                self.set_asks(price, asks)
+            o.level.resize(o.id, size)
+            self._touch(o.side, o.level)
 
     def change(self, order):
         try:
@@ -314,28 +797,10 @@ class GdaxBookFeed(GdaxWebsocketClient):
         except KeyError:
             return
 
-        price = float(order['price'])
-
-        if order['side'] == 'buy':
-            bids = self.get_bids(price)
-            if bids is None or not any(o['id'] == order['order_id'] for o in bids):
-                return
-            index = [b['id'] for b in bids].index(order['order_id'])
-            bids[index]['size'] = new_size
-            self.set_bids(price, bids)
-        else:
-            asks = self.get_asks(price)
-            if asks is None or not any(o['id'] == order['order_id'] for o in asks):
-                return
-            index = [a['id'] for a in asks].index(order['order_id'])
-            asks[index]['size'] = new_size
-            self.set_asks(price, asks)
-
-        tree = self._asks if order['side'] == 'sell' else self._bids
-        node = tree.get(price)
-
-        if node is None or not any(o['id'] == order['order_id'] for o in node):
-            return
+        o = self._orders.get(order['order_id'], None)
+        if o is not None:
+            o.level.resize(o.id, new_size)
+            self._touch(o.side, o.level)
 
     def get_current_ticker(self):
         return self._current_ticker
@@ -354,11 +819,9 @@ class GdaxBookFeed(GdaxWebsocketClient):
                 this_ask = self._asks[ask]
             except KeyError:
                 continue
-            for order in this_ask:
-                bit = [order['price'],
-                       order['size'],
-                       order['id']]
-                result['asks'].append(bit)
+            # Copied: the level can change while we read it.
+            for order in list(this_ask):
+                result['asks'].append([order.price, order.size, order.id])
         for bid in self._bids:
             try:
                 # There can be a race condition here,
@@ -368,16 +831,41 @@ class GdaxBookFeed(GdaxWebsocketClient):
             except KeyError:
                 continue
 
-            for order in this_bid:
-                result['bids'].append([order['price'], order['size'], order['id']])
+            for order in list(this_bid):
+                result['bids'].append([order.price, order.size, order.id])
         return result
 
+    def get_top_book(self):
+        """
+        Returns the best top_n levels per side without walking the book.
+        :return: (dict) {'sequence': int, 'bids': (prices, sizes, counts), 'asks': (...)}
+            NumPy arrays, best first, that keep changing as messages arrive.
+            Other threads should use GdaxBookFeed.get_snapshot.
+        """
+        if self.view is None:
+            raise ValueError("GdaxBookFeed was created without top_n.")
+        return {'sequence': self._sequence,
+                'bids': self.view.bids.get_arrays(),
+                'asks': self.view.asks.get_arrays()}
+
+    def get_snapshot(self):
+        """
+        Returns an immutable, sequence stamped copy of the top_n view
+        that is safe to read from any thread without blocking the feed.
+        :return: (gdax.feeds.book_view.GdaxBookViewSnapshot)
+        """
+        if self.view is None:
+            raise ValueError("GdaxBookFeed was created without top_n.")
+        return self.view.snapshot()
+
     def get_orders_matching_ids(self, order_ids):
-        return [a for a in self._asks
-                if a['id'] in order_ids] +\
-               [b for b in self._bids
-                if b['id'] in order_ids
-        ]
+        return [self._orders[i] for i in order_ids if i in self._orders]
+
+    def get_order(self, order_id):
+        """
+        :return: (GdaxBookOrder, None)
+        """
+        return self._orders.get(order_id, None)
 
     def get_ask(self):
         return self._asks.min_key()
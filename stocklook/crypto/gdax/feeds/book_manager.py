@@ -0,0 +1,111 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from stocklook.crypto.gdax.feeds.hub import GdaxFeedHub
+from stocklook.crypto.gdax.feeds.book_feed import GdaxBookFeed
+
+
+class GdaxBookManager(GdaxFeedHub):
+    """
+    Maintains level 3 books for many products over one
+    full channel subscription.
+
+    Each product gets its own GdaxBookFeed that is never started
+    itself, registered for its product like any GdaxFeedHub consumer:
+    the manager tracks each product's sequence and resyncs (in the
+    background) only the book of a product with a gap. Errors
+    resync the book rather than reconnecting.
+
+        manager = GdaxBookManager(['BTC-USD', 'ETH-USD'], gdax=gdax, top_n=50)
+        manager.start()
+        ...
+        manager.get_ask('ETH-USD')
+        manager['BTC-USD'].get_snapshot()
+    """
+    def __init__(self, products, gdax=None, backend='rbtree', tick=1e-8, top_n=None, **kwargs):
+        """
+        :param products: (list) ['BTC-USD', 'ETH-USD', ...]
+        :param gdax: (gdax.api.Gdax, default None) Fetches snapshots.
+        :param backend: (str, default 'rbtree') See GdaxBookFeed.
+        :param tick: (float, default 1e-8) See GdaxBookFeed.
+        :param top_n: (int, default None) See GdaxBookFeed.
+        :param kwargs: GdaxFeedHub(**kwargs)
+        """
+        if gdax is None:
+            from stocklook.crypto.gdax.api import Gdax
+            gdax = Gdax()
+        if hasattr(products, 'title'):
+            products = [products]
+        kwargs.setdefault('channels', ['full'])
+        super(GdaxBookManager, self).__init__(products=list(products), **kwargs)
+        self.gdax = gdax
+        self.books = {p: GdaxBookFeed(p, gdax=gdax, auth=False, backend=backend,
+                                      tick=tick, top_n=top_n)
+                      for p in self.products}
+        for p, book in self.books.items():
+            self.register(book, products=[p])
+
+    def close(self):
+        super(GdaxBookManager, self).close()
+        for book in self.books.values():
+            # Ends background resyncs.
+            book.stop = True
+
+    def start(self):
+        for book in self.books.values():
+            book.stop = False
+        super(GdaxBookManager, self).start()
+
+    def get_book(self, product_id):
+        """
+        :return: (gdax.feeds.book_feed.GdaxBookFeed)
+        """
+        return self.books[product_id]
+
+    __getitem__ = get_book
+
+    def get_current_book(self, product_id):
+        return self.books[product_id].get_current_book()
+
+    def get_snapshot(self, product_id):
+        return self.books[product_id].get_snapshot()
+
+    def get_bid(self, product_id):
+        return self.books[product_id].get_bid()
+
+    def get_ask(self, product_id):
+        return self.books[product_id].get_ask()
+
+    def get_current_ticker(self, product_id):
+        return self.books[product_id].get_current_ticker()
+
+    def get_sync_stats(self):
+        """
+        :return: (dict) product_id: dict(state, sequence, gaps, resyncs, resync_seconds,
+            missed_matches)
+        """
+        return {p: dict(state=b.state, sequence=b._sequence,
+                        gaps=self.product_gaps.get(p, 0) + b.gaps,
+                        resyncs=b.resyncs, resync_seconds=b.resync_seconds,
+                        missed_matches=b.missed_matches)
+                for p, b in self.books.items()}
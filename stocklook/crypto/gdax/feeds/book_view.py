@@ -0,0 +1,255 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from bisect import bisect_left
+from time import time, sleep
+import numpy as np
+
+
+class GdaxBookSideView:
+    """
+    The best n price levels of one side of a book as NumPy arrays
+    (best first), kept up to date level by level.
+
+    Prices are also kept as a list of keys (negated for bids so both
+    sides ascend) that is searched with bisect, which is much cheaper
+    than a NumPy call for every message.
+    """
+    def __init__(self, side, n):
+        self.side = side
+        self.n = n
+        self.sign = (-1.0 if side == 'buy' else 1.0)
+        self.keys = list()
+        self.prices = np.zeros(n, dtype=np.float64)
+        self.sizes = np.zeros(n, dtype=np.float64)
+        self.counts = np.zeros(n, dtype=np.int64)
+        self.bound = float('inf')       # the worst key while the view is full
+
+    @property
+    def length(self):
+        return len(self.keys)
+
+    def _set_bound(self):
+        self.bound = (self.keys[-1] if len(self.keys) >= self.n else float('inf'))
+
+    def inside(self, price):
+        """
+        True if a level at this price belongs in the view.
+        """
+        return self.sign * price <= self.bound
+
+    def load(self, levels):
+        """
+        Fills the view from levels (best first).
+        """
+        self.keys = list()
+        for level in levels:
+            if len(self.keys) >= self.n:
+                break
+            self._set(len(self.keys), level)
+            self.keys.append(self.sign * level.price)
+        self._set_bound()
+
+    def _set(self, i, level):
+        self.prices[i] = level.price
+        self.sizes[i] = level.size
+        self.counts[i] = len(level)
+
+    def update(self, level):
+        """
+        A level's size or order count changed.
+        """
+        key = self.sign * level.price
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            self.sizes[i] = level.size
+            self.counts[i] = len(level)
+
+    def insert(self, level):
+        """
+        A level was added to the book.
+        """
+        key = self.sign * level.price
+        if key > self.bound:
+            return
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            self._set(i, level)
+            return
+        end = min(len(keys), self.n - 1)
+        for a in (self.prices, self.sizes, self.counts):
+            a[i + 1:end + 1] = a[i:end]
+        keys.insert(i, key)
+        del keys[self.n:]
+        self._set(i, level)
+        self._set_bound()
+
+    def delete(self, price, next_level=None):
+        """
+        A level was removed from the book.
+        :param next_level: (GdaxPriceLevel, default None)
+            The best level left outside a full view; it moves into the view.
+        """
+        key = self.sign * price
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i >= len(keys) or keys[i] != key:
+            return
+        full = (len(keys) == self.n)
+        n = len(keys)
+        for a in (self.prices, self.sizes, self.counts):
+            a[i:n - 1] = a[i + 1:n]
+        del keys[i]
+        if full and next_level is not None:
+            self._set(len(keys), next_level)
+            keys.append(self.sign * next_level.price)
+        self._set_bound()
+
+    @property
+    def last_price(self):
+        return (self.sign * self.keys[-1] if self.keys else None)
+
+    def get_arrays(self):
+        """
+        :return: (tuple) prices, sizes, counts (best first).
+        """
+        n = len(self.keys)
+        return self.prices[:n], self.sizes[:n], self.counts[:n]
+
+
+class GdaxBookView:
+    """
+    An aggregated (level 2) view of the best n levels on each
+    side of a GdaxBookFeed, updated as messages touch those levels
+    so it can be read without walking the level 3 book.
+
+        feed = GdaxBookFeed('BTC-USD', top_n=50)
+        prices, sizes, counts = feed.view.bids.get_arrays()
+
+    The arrays are the view's own and change as messages arrive.
+    Readers on other threads should use GdaxBookView.snapshot.
+
+    The writer makes version odd while it changes the view and even
+    again when it's done (a sequence lock), so readers can copy the
+    arrays and know the copy is consistent without blocking the writer.
+    """
+    def __init__(self, n=50):
+        """
+        :param n: (int, default 50) Levels kept per side.
+        """
+        self.n = n
+        self.bids = GdaxBookSideView('buy', n)
+        self.asks = GdaxBookSideView('sell', n)
+        self.version = 0
+        self.sequence = -1
+        self._snapshot = None
+
+    @property
+    def updates(self):
+        """
+        The number of changes (messages) applied to the view.
+        """
+        return self.version // 2
+
+    def snapshot(self, retries=1000):
+        """
+        Returns an immutable GdaxBookViewSnapshot of the view.
+        The same snapshot is returned until the view changes.
+        Never blocks the writer; retries when it copied mid-change.
+        """
+        snap = self._snapshot
+        version = self.version
+        if snap is not None and snap.version == version:
+            return snap
+
+        for _ in range(retries):
+            version = self.version
+            if version % 2:
+                # Let the writer finish.
+                sleep(0)
+                continue
+            sequence = self.sequence
+            bids = tuple(a.copy() for a in self.bids.get_arrays())
+            asks = tuple(a.copy() for a in self.asks.get_arrays())
+            if self.version == version:
+                snap = GdaxBookViewSnapshot(self, version, sequence, bids, asks)
+                self._snapshot = snap
+                return snap
+        raise RuntimeError("The book view changed during {} attempts to copy it.".format(retries))
+
+    def get_side(self, side):
+        return (self.bids if side == 'buy' else self.asks)
+
+    def to_dict(self):
+        """
+        Returns the view like GET /products/<product-id>/book?level=2
+        ([price, size, num-orders] rows, best first) with floats.
+        """
+        return {key: [[p, s, int(c)] for p, s, c in zip(*view.get_arrays())]
+                for key, view in (('bids', self.bids), ('asks', self.asks))}
+
+
+class GdaxBookViewSnapshot:
+    """
+    An immutable copy of a GdaxBookView stamped with the sequence
+    of the last message it includes.
+
+        snap = feed.get_snapshot()
+        prices, sizes, counts = snap.bids
+        messages, ms = snap.get_staleness()
+    """
+    __slots__ = ['view', 'version', 'sequence', 'created', 'bids', 'asks']
+
+    def __init__(self, view, version, sequence, bids, asks):
+        for a in bids + asks:
+            a.flags.writeable = False
+        self.view = view
+        self.version = version
+        self.sequence = sequence
+        self.created = time()
+        self.bids = bids
+        self.asks = asks
+
+    def get_staleness(self):
+        """
+        :return: (tuple)
+            The number of messages applied to the book since the
+            snapshot was taken and, if any, the milliseconds since then.
+        """
+        messages = self.view.updates - self.version // 2
+        if not messages:
+            return 0, 0.0
+        return messages, (time() - self.created) * 1000
+
+    @property
+    def best_bid(self):
+        return (self.bids[0][0] if len(self.bids[0]) else None)
+
+    @property
+    def best_ask(self):
+        return (self.asks[0][0] if len(self.asks[0]) else None)
+
+    def __repr__(self):
+        return 'GdaxBookViewSnapshot(sequence={}, bid={}, ask={})'.format(
+            self.sequence, self.best_bid, self.best_ask)
@@ -0,0 +1,221 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from collections import deque
+from threading import Condition
+from time import perf_counter
+
+# What GdaxMessageBuffer.put does when the buffer is full.
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+DROP_BY_TYPE = 'drop_by_type'
+POLICIES = [BLOCK, DROP_OLDEST, DROP_BY_TYPE]
+
+# Shed first by the drop_by_type policy.
+SHED_TYPES = ('heartbeat', 'ticker')
+
+
+class GdaxMessageBuffer:
+    """
+    A bounded FIFO between the thread (or event loop) reading a
+    websocket and the thread running on_message so that a slow
+    handler doesn't stop the socket from being read.
+
+    When the buffer is full:
+        block:        put waits for room (pushing back on the socket).
+        drop_oldest:  the oldest message is discarded.
+        drop_by_type: a message of a SHED_TYPES type is discarded
+                      (the new one, or else the oldest buffered one),
+                      otherwise the oldest message.
+
+    Counters for sizing the buffer are available from
+    GdaxMessageBuffer.get_stats():
+        high_water: the most messages buffered at once.
+        lag:        seconds the oldest buffered message has waited.
+        max_lag:    the longest a message waited before being handled.
+        dropped:    messages discarded (total and by type).
+    """
+    def __init__(self, capacity=10000, policy=BLOCK, shed_types=SHED_TYPES):
+        """
+        :param capacity: (int, default 10000)
+            The most messages to hold.
+        :param policy: (str, default 'block')
+            'block', 'drop_oldest' or 'drop_by_type'.
+        :param shed_types: (tuple, default ('heartbeat', 'ticker'))
+            Message types discarded first by the drop_by_type policy.
+        """
+        if policy not in POLICIES:
+            raise ValueError("policy must be one of {}, not {}".format(POLICIES, policy))
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.capacity = capacity
+        self.policy = policy
+        self.shed_types = tuple(shed_types)
+        self.closed = False
+        self._items = deque()           # (enqueue time, message)
+        self._cond = Condition()
+        self.reset_stats()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, msg, block=True, timeout=None):
+        """
+        Adds a message, making room according to the policy.
+
+        :param msg: (dict)
+        :param block: (bool, default True)
+            False returns immediately when the block policy has no room.
+        :param timeout: (float, default None)
+            The most seconds the block policy waits for room.
+        :return: (bool)
+            False if the message wasn't added because the buffer
+            is closed or the block policy ran out of time.
+            Messages discarded by the drop policies return True.
+        """
+        with self._cond:
+            if self.closed:
+                return False
+
+            if len(self._items) >= self.capacity:
+                if self.policy == BLOCK:
+                    if not block:
+                        return False
+                    self.blocked += 1
+                    if not self._cond.wait_for(self._has_room, timeout) or self.closed:
+                        return False
+                elif self._make_room(msg):
+                    # The new message was shed.
+                    return True
+
+            self._items.append((perf_counter(), msg))
+            self.puts += 1
+            size = len(self._items)
+            if size > self.high_water:
+                self.high_water = size
+            self._cond.notify_all()
+        return True
+
+    def _has_room(self):
+        return self.closed or len(self._items) < self.capacity
+
+    def _make_room(self, msg):
+        """
+        Discards one message.
+        :return: (bool) True if the new message was discarded.
+        """
+        if self.policy == DROP_BY_TYPE:
+            if msg.get('type', None) in self.shed_types:
+                self._count_drop(msg)
+                return True
+            for i, (t, old) in enumerate(self._items):
+                if old.get('type', None) in self.shed_types:
+                    del self._items[i]
+                    self._count_drop(old)
+                    return False
+
+        t, old = self._items.popleft()
+        self._count_drop(old)
+        return False
+
+    def _count_drop(self, msg):
+        msg_type = msg.get('type', None)
+        self.dropped += 1
+        self.dropped_by_type[msg_type] = self.dropped_by_type.get(msg_type, 0) + 1
+
+    def get(self, timeout=None):
+        """
+        Removes and returns the oldest message.
+        :param timeout: (float, default None)
+            The most seconds to wait for a message.
+        :return: (dict, None)
+            None when the wait timed out or the buffer was closed.
+        """
+        with self._cond:
+            if not self._cond.wait_for(self._has_items, timeout) or not self._items:
+                return None
+            t, msg = self._items.popleft()
+            lag = perf_counter() - t
+            if lag > self.max_lag:
+                self.max_lag = lag
+            self.gets += 1
+            self._cond.notify_all()
+        return msg
+
+    def _has_items(self):
+        return self.closed or bool(self._items)
+
+    @property
+    def lag(self):
+        """
+        Seconds the oldest buffered message has been waiting.
+        """
+        try:
+            return perf_counter() - self._items[0][0]
+        except IndexError:
+            return 0.0
+
+    def open(self):
+        with self._cond:
+            self.closed = False
+
+    def close(self):
+        """
+        Wakes up every waiting put/get.
+        Buffered messages are kept until GdaxMessageBuffer.clear.
+        """
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+            self._cond.notify_all()
+
+    def get_stats(self):
+        with self._cond:
+            return dict(size=len(self._items),
+                        capacity=self.capacity,
+                        policy=self.policy,
+                        high_water=self.high_water,
+                        puts=self.puts,
+                        gets=self.gets,
+                        blocked=self.blocked,
+                        dropped=self.dropped,
+                        dropped_by_type=dict(self.dropped_by_type),
+                        lag=self.lag,
+                        max_lag=self.max_lag)
+
+    def reset_stats(self):
+        self.high_water = len(self._items)
+        self.puts = 0
+        self.gets = 0
+        self.blocked = 0
+        self.dropped = 0
+        self.dropped_by_type = dict()
+        self.max_lag = 0.0
+
+    def __repr__(self):
+        return 'GdaxMessageBuffer({}/{}, policy={!r})'.format(
+            len(self._items), self.capacity, self.policy)
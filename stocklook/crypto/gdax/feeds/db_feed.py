@@ -278,6 +278,11 @@ class GdaxDatabaseFeed(GdaxWebsocketClient):
         print("Initial Error: {}\n Cause: {}\nContext: {}\n"
               "- attempting to recover.".format(e, e.__cause__, e.__context__))
 
+        if self.hub is not None:
+            # The hub owns the connection.
+            self.resync()
+            return
+
         try:
             self.close()
         except Exception as e:
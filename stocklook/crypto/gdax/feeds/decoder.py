@@ -0,0 +1,133 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import json
+
+# Fastest first.
+JSON_BACKENDS = ['orjson', 'ujson', 'json']
+
+# Decoding strategies
+FULL = 'full'
+SUBSET = 'subset'
+
+
+def get_json_loads(backend=None):
+    """
+    Returns (name, loads) for the fastest JSON library
+    available or the one requested.
+
+    :param backend: (str, default None)
+        'orjson', 'ujson' or 'json'.
+        None picks the first one installed from JSON_BACKENDS.
+    :raises ImportError: when the requested backend isn't installed.
+    :return: (tuple)
+    """
+    names = (JSON_BACKENDS if backend is None else [backend])
+    for name in names:
+        if name == 'json':
+            return name, json.loads
+        try:
+            module = __import__(name)
+        except ImportError:
+            if backend is not None:
+                raise
+            continue
+        return name, module.loads
+    return 'json', json.loads
+
+
+class GdaxMessageDecoder:
+    """
+    Decodes websocket frames into dictionaries.
+
+    Uses orjson or ujson when installed and falls back to the
+    standard library json module.
+
+    Subscribers that only need a few fields can register them.
+    With the 'subset' strategy those fields are sliced straight out of
+    flat frames without decoding the rest. On full channel frames
+    (see gdax/scripts/benchmark_decoder.py) that only beats the stdlib
+    decoder for two or three fields and never beats orjson, so
+    it must be asked for. Either way the result contains
+    at least the registered fields.
+    """
+    def __init__(self, backend=None, fields=None, strategy=FULL):
+        """
+        :param backend: (str, default None)
+            'orjson', 'ujson' or 'json'. None picks the fastest installed.
+        :param fields: (list, default None)
+            The fields a subscriber needs. None decodes every field.
+        :param strategy: (str, default 'full')
+            'full' or 'subset'.
+        """
+        self.backend, self.loads = get_json_loads(backend)
+        self.fields = (list(fields) if fields else None)
+        if strategy == SUBSET and not self.fields:
+            raise ValueError("The subset strategy requires fields.")
+        self.strategy = strategy
+        self._keys = [('"{}":'.format(f), f) for f in (self.fields or [])]
+        self.decode = (self._decode_subset if strategy == SUBSET else self.loads)
+
+    def _decode_subset(self, raw):
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf8')
+        if '[' in raw or '\\' in raw or raw.find('{', 1) != -1:
+            # Nested or escaped content isn't safe to slice.
+            return self.loads(raw)
+
+        find = raw.find
+        msg = dict()
+        for pattern, field in self._keys:
+            i = find(pattern)
+            if i < 0:
+                continue
+            i += len(pattern)
+            while raw[i] == ' ':
+                i += 1
+            c = raw[i]
+            if c == '"':
+                j = find('"', i + 1)
+                msg[field] = raw[i + 1:j]
+                continue
+
+            j = find(',', i)
+            if j < 0:
+                j = find('}', i)
+            value = raw[i:j].rstrip()
+            if c == 'n':
+                msg[field] = None
+            elif c == 't':
+                msg[field] = True
+            elif c == 'f':
+                msg[field] = False
+            elif '.' in value or 'e' in value or 'E' in value:
+                msg[field] = float(value)
+            else:
+                msg[field] = int(value)
+
+        if 'type' not in msg:
+            raise ValueError("Not a Gdax message: {}".format(raw[:100]))
+        return msg
+
+    def __repr__(self):
+        return 'GdaxMessageDecoder(backend={!r}, strategy={!r})'.format(self.backend, self.strategy)
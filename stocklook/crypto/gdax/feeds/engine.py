@@ -0,0 +1,271 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import json
+import random
+import asyncio
+from threading import Thread, Event
+import logging as lg
+logger = lg.getLogger(__name__)
+
+
+class GdaxFeedEngine:
+    """
+    Runs many GdaxWebsocketClient feeds (GdaxBookFeed, GdaxDatabaseFeed, ...)
+    on one asyncio event loop instead of one thread per feed.
+
+    Feeds keep their hooks: on_message, on_close and on_error
+    are called as before and on_open is called once the feed is
+    subscribed, again after every reconnect. All run on the
+    engine's loop thread.
+    Calling feed.start() or feed.close() on a feed attached to an
+    engine (re)connects or disconnects it within the engine.
+
+        engine = GdaxFeedEngine().start()
+        for product in ('BTC-USD', 'ETH-USD', 'LTC-USD'):
+            engine.add(GdaxBookFeed(product, gdax=gdax))
+        ...
+        engine.stop()
+
+    Connections are kept alive with pings every ping_interval seconds
+    and re-opened with exponential backoff (plus jitter)
+    when they drop.
+
+    NOTE: on_message runs on the event loop so a slow
+    handler delays every feed on the engine unless the feed
+    has a gdax.feeds.buffer.GdaxMessageBuffer.
+    """
+    def __init__(self, loop=None, ping_interval=30, backoff=0.5, max_backoff=30.0,
+                 max_decode_errors=3):
+        """
+        :param loop: (asyncio.AbstractEventLoop, default None)
+            An event loop to run the feeds on.
+            None creates a new loop that GdaxFeedEngine.start runs on a thread.
+        :param ping_interval: (int, default 30)
+            Seconds between keepalive pings. The connection is
+            re-opened if a ping isn't answered within half this time.
+        :param backoff: (float, default 0.5)
+            Seconds to wait before the first reconnect.
+        :param max_backoff: (float, default 30.0)
+            The most seconds to wait between reconnects.
+        :param max_decode_errors: (int, default 3)
+            Consecutive undecodable messages before feed.on_error is called.
+        """
+        self._own_loop = loop is None
+        self.loop = (asyncio.new_event_loop() if loop is None else loop)
+        self.ping_interval = ping_interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_decode_errors = max_decode_errors
+        self.feeds = list()
+        self._tasks = dict()            # feed: asyncio.Task
+        self._sockets = dict()          # feed: aiohttp.ClientWebSocketResponse
+        self._session = None
+        self._thread = None
+        self._ready = Event()
+
+    @property
+    def running(self):
+        return self.loop.is_running()
+
+    def start(self):
+        """
+        Runs the engine's own event loop on a background thread.
+        Does nothing when the engine was given a running loop.
+        :return: (GdaxFeedEngine)
+        """
+        if self._own_loop and self._thread is None:
+            self._thread = Thread(target=self.run_forever, daemon=True)
+            self._thread.start()
+            self._ready.wait(5)
+        return self
+
+    def run_forever(self):
+        """
+        Runs the engine's event loop on the calling thread until
+        GdaxFeedEngine.stop is called.
+        """
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._ready.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self._shutdown())
+            self.loop.close()
+
+    def stop(self):
+        """
+        Closes every feed and stops the event loop.
+        """
+        for feed in list(self.feeds):
+            self.remove(feed)
+        if self._own_loop:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            if self._thread is not None:
+                self._thread.join(10)
+                self._thread = None
+
+    async def _shutdown(self):
+        tasks = [t for t in self._tasks.values() if not t.done()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def add(self, feed):
+        """
+        Attaches a GdaxWebsocketClient to the engine and starts it.
+        :param feed: (gdax.feeds.websocket_client.GdaxWebsocketClient)
+        :return: feed
+        """
+        feed.engine = self
+        if feed not in self.feeds:
+            self.feeds.append(feed)
+        feed.start()
+        return feed
+
+    def remove(self, feed):
+        """
+        Closes a feed and detaches it from the engine.
+        """
+        feed.close()
+        try:
+            self.feeds.remove(feed)
+        except ValueError:
+            pass
+
+    def restart(self, feed):
+        """
+        Drops the feed's connection so that it
+        reconnects (after a backoff).
+        """
+        self.loop.call_soon_threadsafe(self._drop, feed)
+
+    # Called by GdaxWebsocketClient.start/close
+
+    def start_feed(self, feed):
+        self.loop.call_soon_threadsafe(self._spawn, feed)
+
+    def stop_feed(self, feed):
+        self.loop.call_soon_threadsafe(self._cancel, feed)
+
+    def _spawn(self, feed):
+        self._cancel(feed)
+        self._tasks[feed] = self.loop.create_task(self._run(feed))
+
+    def _cancel(self, feed):
+        task = self._tasks.pop(feed, None)
+        if task is not None and not task.done():
+            task.cancel()
+
+    def _drop(self, feed):
+        ws = self._sockets.get(feed, None)
+        if ws is not None:
+            self.loop.create_task(ws.close())
+
+    def get_delay(self, attempt):
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def _run(self, feed):
+        import aiohttp
+        url = feed.url.rstrip('/')
+        attempt = 0
+
+        while not feed.stop:
+            try:
+                session = await self._get_session()
+                async with session.ws_connect(url, heartbeat=self.ping_interval,
+                                              max_msg_size=0) as ws:
+                    self._sockets[feed] = ws
+                    for params in feed.get_subscribe_messages():
+                        await ws.send_str(json.dumps(params))
+                    try:
+                        feed.on_open()
+                    except Exception as e:
+                        logger.exception(e)
+                    await self._listen(feed, ws)
+                    attempt = 0
+            except asyncio.CancelledError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                logger.warning("{} connection error: {}".format(url, e))
+            except Exception as e:
+                # e.g. a failing recorder or on_error: reconnect
+                # rather than ending the feed's task.
+                logger.exception("{} feed error: {}".format(url, e))
+            finally:
+                self._sockets.pop(feed, None)
+
+            if feed.stop:
+                break
+            attempt += 1
+            feed.reconnects += 1
+            delay = self.get_delay(attempt)
+            logger.info("{} closed, reconnecting in {:.2f}s".format(url, delay))
+            await asyncio.sleep(delay)
+
+    async def _listen(self, feed, ws):
+        import aiohttp
+        decode_errs = 0
+
+        async for m in ws:
+            if m.type != aiohttp.WSMsgType.TEXT:
+                if m.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+                continue
+
+            try:
+                msg = feed.decoder.decode(m.data)
+            except ValueError as e:
+                decode_errs += 1
+                logger.warning("Ignored decode error: {}".format(e))
+                if decode_errs >= self.max_decode_errors:
+                    decode_errs = 0
+                    feed.on_error(e)
+                continue
+            decode_errs = 0
+
+            feed.message_count += 1
+            if feed.recorder is not None:
+                feed.recorder.write(m.data, msg)
+            if feed.buffer is None:
+                try:
+                    feed.on_message(msg)
+                except Exception as e:
+                    logger.exception(e)
+                    feed.on_error(e)
+            elif not feed.buffer.put(msg, block=False) and not feed.buffer.closed:
+                # Full: stop reading this socket until there's room.
+                await self.loop.run_in_executor(None, feed.buffer.put, msg)
+
+            if feed.stop:
+                break
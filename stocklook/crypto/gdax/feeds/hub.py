@@ -0,0 +1,351 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from queue import Full
+from threading import Thread, Lock
+from multiprocessing.connection import Listener, Client
+from stocklook.crypto.gdax.feeds.websocket_client import GdaxWebsocketClient
+from stocklook.crypto.gdax.feeds.book_feed import FULL_TYPES
+from stocklook.crypto.gdax.feeds.buffer import GdaxMessageBuffer, DROP_OLDEST
+import logging as lg
+logger = lg.getLogger(__name__)
+
+
+class GdaxHubConsumer:
+    """
+    A consumer registered with GdaxFeedHub.register.
+    """
+    __slots__ = ['target', 'products', 'types', 'deliver', 'delivered', 'dropped', 'errors']
+
+    def __init__(self, target, products=None, types=None):
+        self.target = target
+        self.products = (set(products) if products else None)
+        self.types = (set(types) if types else None)
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+
+        if hasattr(target, 'on_message'):
+            self.deliver = target.on_message
+        elif hasattr(target, 'put_nowait'):
+            self.deliver = self._put
+        elif callable(target):
+            self.deliver = target
+        else:
+            raise TypeError("A consumer must be callable, a queue or "
+                            "have an on_message method, not {}".format(target))
+
+    def _put(self, msg):
+        try:
+            self.target.put_nowait(msg)
+        except Full:
+            self.dropped += 1
+
+    def wants(self, msg):
+        return (self.products is None or msg.get('product_id', None) in self.products) \
+               and (self.types is None or msg.get('type', None) in self.types)
+
+    def resync(self):
+        resync = getattr(self.target, 'resync', None)
+        if resync is not None:
+            resync()
+
+    def on_error(self, e):
+        on_error = getattr(self.target, 'on_error', None)
+        if on_error is not None:
+            on_error(e)
+
+    def get_stats(self):
+        return dict(delivered=self.delivered, dropped=self.dropped, errors=self.errors)
+
+
+class GdaxFeedHub(GdaxWebsocketClient):
+    """
+    Holds one websocket subscription and hands every decoded
+    message to any number of consumers:
+
+        - callables: called with each message.
+        - queues: messages are put without waiting (dropped when full).
+        - feeds: objects with an on_message method, like a GdaxBookFeed
+          or GdaxDatabaseFeed that is never started itself.
+        - other processes: see GdaxFeedHub.listen and GdaxFeedHubClient.
+
+        hub = GdaxFeedHub(products=['BTC-USD', 'ETH-USD'], channels=['full'])
+        hub.register(book_feed, products=['BTC-USD'])
+        hub.register(db_queue, types=['match'])
+        hub.start()
+
+    Consumers can be registered at any time and from any thread.
+    The hub owns the connection and, subscribed to the full channel,
+    tracks the sequence of each product's full channel messages once
+    (see GdaxFeedHub.sequences and GdaxFeedHub.product_gaps):
+    on a gap, consumers of that product have their resync() called
+    before the message is delivered. A consumer whose on_message raises
+    gets on_error called; registered feeds resync rather than
+    reconnecting themselves (their hub attribute is set).
+    """
+    def __init__(self, products=None, channels=None, **kwargs):
+        """
+        :param products: (list, default None)
+            Every product any consumer needs.
+        :param channels: (list, default None)
+            Every channel any consumer needs.
+        :param kwargs: GdaxWebsocketClient(**kwargs)
+        """
+        super(GdaxFeedHub, self).__init__(products=products, channels=channels, **kwargs)
+        self._consumers = tuple()
+        self._lock = Lock()
+        self._listener = None
+        self._remotes = list()
+        self.sequences = dict()         # product_id: last sequence
+        self.product_gaps = dict()      # product_id: gaps
+        self.gaps = 0
+        # Only the full channel numbers every message of a product;
+        # sparse channels (ticker, matches) skip sequences by design.
+        names = [(c if isinstance(c, str) else c.get('name', None)) for c in (channels or [])]
+        self.tracks_sequences = (not names or 'full' in names)
+
+    @property
+    def consumers(self):
+        return list(self._consumers)
+
+    def register(self, consumer, products=None, types=None):
+        """
+        Adds a consumer.
+        :param consumer: (callable, queue.Queue, GdaxWebsocketClient)
+        :param products: (list, default None)
+            Products to receive. None receives every product.
+        :param types: (list, default None)
+            Message types to receive. None receives every type.
+        :return: (gdax.feeds.hub.GdaxHubConsumer)
+        """
+        if products:
+            missing = set(products).difference(self.products)
+            if missing:
+                raise ValueError("The hub isn't subscribed to {}".format(sorted(missing)))
+        c = GdaxHubConsumer(consumer, products=products, types=types)
+        if isinstance(consumer, GdaxWebsocketClient):
+            consumer.hub = self
+        with self._lock:
+            # Copied so on_message can iterate without locking.
+            self._consumers = self._consumers + (c,)
+        return c
+
+    def unregister(self, consumer):
+        """
+        Removes a consumer (or the GdaxHubConsumer returned by register).
+        """
+        with self._lock:
+            removed = [c for c in self._consumers
+                       if c is consumer or c.target is consumer]
+            self._consumers = tuple(c for c in self._consumers if c not in removed)
+        for c in removed:
+            if getattr(c.target, 'hub', None) is self:
+                c.target.hub = None
+
+    def on_message(self, msg):
+        product_id = msg.get('product_id', None)
+        sequence = msg.get('sequence', None)
+        if sequence is not None and product_id is not None and self.tracks_sequences \
+                and msg.get('type', None) in FULL_TYPES:
+            last = self.sequences.get(product_id, None)
+            if last is None or sequence > last:
+                self.sequences[product_id] = sequence
+            if last is not None and sequence > last + 1:
+                self.gaps += 1
+                self.product_gaps[product_id] = self.product_gaps.get(product_id, 0) + 1
+                logger.warning("{} sequence gap: {} -> {}".format(product_id, last, sequence))
+                self.resync(product_id)
+
+        for c in self._consumers:
+            if not c.wants(msg):
+                continue
+            try:
+                c.deliver(msg)
+                c.delivered += 1
+            except Exception as e:
+                c.errors += 1
+                logger.exception("Consumer {} failed: {}".format(c.target, e))
+                c.on_error(e)
+
+    def resync(self, product_id=None):
+        """
+        Calls resync() on the consumers of a product
+        (or every consumer) after messages were missed.
+        :param product_id: (str, default None) None resyncs every consumer.
+        """
+        for c in self._consumers:
+            if product_id is None or c.products is None or product_id in c.products:
+                try:
+                    c.resync()
+                except Exception as e:
+                    logger.exception("Consumer {} resync failed: {}".format(c.target, e))
+
+    def reconnect(self):
+        """
+        Drops and re-opens the hub's connection.
+        Consumers (and processes) stay registered.
+        """
+        if self.engine is not None:
+            self.engine.restart(self)
+            return
+        GdaxWebsocketClient.close(self)
+        GdaxWebsocketClient.start(self)
+
+    def on_open(self):
+        logger.info("Hub subscribed to {}".format(self.products))
+
+    def on_error(self, e):
+        logger.warning("Hub error: {} - reconnecting.".format(e))
+        self.reconnect()
+
+    def on_close(self):
+        logger.info("Hub closed")
+
+    def listen(self, address=('localhost', 0), authkey=None, capacity=10000):
+        """
+        Accepts consumers from other processes (see GdaxFeedHubClient).
+        Each connection gets a GdaxMessageBuffer (dropping the oldest
+        messages when full) so a slow process can't hold up the hub.
+
+        :param address: (tuple, str, default ('localhost', 0))
+            A (host, port) or a unix socket path. Port 0 picks a free port.
+        :param authkey: (bytes, default None)
+            Clients must use the same key. None doesn't authenticate.
+        :param capacity: (int, default 10000)
+            The most messages buffered for each connection.
+        :return: The address being listened on.
+        """
+        if self._listener is not None:
+            return self._listener.address
+        self._listener = Listener(address, authkey=authkey)
+        t = Thread(target=self._accept, args=(self._listener, capacity), daemon=True)
+        t.start()
+        return self._listener.address
+
+    def _accept(self, listener, capacity):
+        while True:
+            try:
+                conn = listener.accept()
+                products, types = conn.recv()
+            except (OSError, EOFError) as e:
+                if self._listener is not listener:
+                    break
+                logger.warning("Hub connection failed: {}".format(e))
+                continue
+
+            buffer = GdaxMessageBuffer(capacity=capacity, policy=DROP_OLDEST)
+            try:
+                consumer = self.register(buffer.put, products=products, types=types)
+            except ValueError as e:
+                logger.warning("Hub connection refused: {}".format(e))
+                conn.close()
+                continue
+            with self._lock:
+                self._remotes.append((conn, buffer))
+            t = Thread(target=self._send, args=(conn, buffer, consumer), daemon=True)
+            t.start()
+
+    def _send(self, conn, buffer, consumer):
+        try:
+            while not buffer.closed:
+                msg = buffer.get(timeout=1)
+                if msg is not None:
+                    conn.send(msg)
+        except (OSError, EOFError, ValueError) as e:
+            logger.info("Hub connection closed: {}".format(e))
+        finally:
+            self.unregister(consumer)
+            buffer.close()
+            conn.close()
+            with self._lock:
+                self._remotes = [r for r in self._remotes if r[0] is not conn]
+
+    def close(self):
+        super(GdaxFeedHub, self).close()
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.close()
+        for conn, buffer in list(self._remotes):
+            buffer.close()
+
+
+class GdaxFeedHubClient:
+    """
+    Receives messages from a GdaxFeedHub in another process.
+
+        client = GdaxFeedHubClient(address, products=['BTC-USD'])
+        for msg in client:
+            ...
+
+    or drives a feed that is never started itself:
+
+        client.run(GdaxBookFeed('BTC-USD'))
+    """
+    def __init__(self, address, authkey=None, products=None, types=None):
+        """
+        :param address: The address returned by GdaxFeedHub.listen.
+        :param authkey: (bytes, default None)
+        :param products: (list, default None) None receives every product.
+        :param types: (list, default None) None receives every message type.
+        """
+        self.address = address
+        self.authkey = authkey
+        self.products = products
+        self.types = types
+        self.conn = None
+
+    def connect(self):
+        if self.conn is None:
+            self.conn = Client(self.address, authkey=self.authkey)
+            self.conn.send((self.products, self.types))
+        return self
+
+    def recv(self, timeout=None):
+        """
+        :param timeout: (float, default None)
+        :return: (dict, None) None when the timeout passed.
+        """
+        self.connect()
+        if timeout is not None and not self.conn.poll(timeout):
+            return None
+        return self.conn.recv()
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.recv()
+            except (EOFError, OSError):
+                break
+
+    def run(self, feed):
+        """
+        Calls feed.on_message for each message until the hub disconnects.
+        """
+        for msg in self:
+            feed.on_message(msg)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,252 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from time import time
+import numpy as np
+import logging as lg
+logger = lg.getLogger(__name__)
+
+
+class GdaxImpact:
+    """
+    The expected cost of a market order against the book.
+
+    avg_price is the size weighted average fill price, worst_price
+    the last price touched and levels the number of price levels
+    consumed. slippage is the fraction avg_price is worse than
+    best_price. filled is False when the book (or the part of it
+    that's known) is too thin for the whole order, in which case
+    size/funds are what would fill.
+    """
+    __slots__ = ['side', 'size', 'funds', 'best_price', 'avg_price',
+                 'worst_price', 'levels', 'slippage', 'filled']
+
+    def __init__(self, side, size, funds, best_price, avg_price, worst_price, levels, filled):
+        self.side = side
+        self.size = size
+        self.funds = funds
+        self.best_price = best_price
+        self.avg_price = avg_price
+        self.worst_price = worst_price
+        self.levels = levels
+        self.filled = filled
+        if avg_price is None:
+            self.slippage = None
+        elif side == 'buy':
+            self.slippage = (avg_price - best_price) / best_price
+        else:
+            self.slippage = (best_price - avg_price) / best_price
+
+    def __repr__(self):
+        return 'GdaxImpact(side={!r}, size={}, avg_price={}, worst_price={}, ' \
+               'levels={}, slippage={:.4%}, filled={})'.format(
+                self.side, self.size, self.avg_price, self.worst_price,
+                self.levels, self.slippage or 0, self.filled)
+
+
+class GdaxDepthSide:
+    """
+    Aggregated price levels for one side of a book, best first,
+    with the cumulative size and notional (price * size) from the
+    best price out. Estimates are binary searches over those.
+    """
+    __slots__ = ['side', 'prices', 'sizes', 'cum_size', 'cum_notional', '_avg']
+
+    def __init__(self, side, prices, sizes):
+        """
+        :param side: (str) 'buy' (bids) or 'sell' (asks).
+        :param prices: (numpy.ndarray) Level prices, best first.
+        :param sizes: (numpy.ndarray) Level sizes.
+        """
+        self.side = side
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.sizes = np.asarray(sizes, dtype=np.float64)
+        self.cum_size = np.cumsum(self.sizes)
+        self.cum_notional = np.cumsum(self.prices * self.sizes)
+        # Average fill price sweeping 1, 2, ... levels, searched
+        # ascending: it only gets worse further from the best price.
+        avg = self.cum_notional / np.where(self.cum_size > 0, self.cum_size, 1)
+        self._avg = (-avg if side == 'buy' else avg)
+
+    @classmethod
+    def from_rows(cls, side, rows):
+        """
+        Aggregates [price, size, ...] rows (levels or orders,
+        in any order, numbers or strings) into a GdaxDepthSide.
+        """
+        prices = np.fromiter((float(r[0]) for r in rows), dtype=np.float64, count=len(rows))
+        sizes = np.fromiter((float(r[1]) for r in rows), dtype=np.float64, count=len(rows))
+        prices, idx = np.unique(prices, return_inverse=True)
+        sizes = np.bincount(idx, weights=sizes, minlength=len(prices))
+        if side == 'buy':
+            prices, sizes = prices[::-1], sizes[::-1]
+        return cls(side, prices, sizes)
+
+    @property
+    def depth(self):
+        return (float(self.cum_size[-1]) if len(self.cum_size) else 0.0)
+
+    def estimate(self, size=None, funds=None):
+        """
+        Estimates trading size (or spending funds) against this side.
+        :param size: (float, default None)
+        :param funds: (float, default None) Used when size is None.
+        :return: (GdaxImpact, None) None when the side is empty.
+        """
+        if not len(self.prices):
+            return None
+        side = ('sell' if self.side == 'buy' else 'buy')
+        cum = (self.cum_size if size is not None else self.cum_notional)
+        want = (size if size is not None else funds)
+        n = int(np.searchsorted(cum, want))
+        filled = n < len(cum)
+        if not filled:
+            n -= 1
+            want = cum[n]
+
+        size_before = (self.cum_size[n - 1] if n else 0.0)
+        notional_before = (self.cum_notional[n - 1] if n else 0.0)
+        price = self.prices[n]
+        if size is not None:
+            size = float(want)
+            funds = float(notional_before + (size - size_before) * price)
+        else:
+            funds = float(want)
+            size = float(size_before + (funds - notional_before) / price)
+
+        return GdaxImpact(side, size, funds, float(self.prices[0]),
+                          (funds / size if size else float(price)),
+                          float(price), n + 1, filled)
+
+    def max_size(self, slippage):
+        """
+        Returns the largest size that fills at an average price
+        within slippage (a fraction) of the best price.
+        """
+        if not len(self.prices):
+            return 0.0
+        best = self.prices[0]
+        if self.side == 'buy':
+            limit = best * (1 - slippage)
+        else:
+            limit = best * (1 + slippage)
+        key = (-limit if self.side == 'buy' else limit)
+        n = int(np.searchsorted(self._avg, key, side='right'))
+        if n == 0:
+            # Not even the best level (a negative slippage).
+            return 0.0
+        if n >= len(self.prices):
+            return self.depth
+
+        # Part of the next level: solve (N + p * x) / (S + x) == limit.
+        s = self.cum_size[n - 1]
+        price = self.prices[n]
+        x = (limit * s - self.cum_notional[n - 1]) / (price - limit)
+        return float(s + max(0.0, x))
+
+
+class GdaxImpactEstimator:
+    """
+    Estimates market order fills (average and worst price, levels
+    consumed) against a book feed's current depth.
+
+        impact = GdaxImpactEstimator(GdaxBookFeed('BTC-USD', top_n=200))
+        impact.book_feed.start()
+        ...
+        impact.estimate('sell', size=25).avg_price
+        impact.max_size('buy', slippage=0.002)
+
+    With a GdaxBookFeed that keeps a top_n view the depth is taken
+    from its snapshots, which only change when the book does, so
+    estimates run in microseconds and never see more than top_n levels.
+    Otherwise (a full GdaxBookFeed, GdaxL2BookFeed or anything with
+    get_current_book) the whole book is copied at most once per max_age
+    seconds, which can take a few hundred milliseconds on a full L3 book.
+    """
+    def __init__(self, book_feed, max_age=1.0):
+        """
+        :param book_feed: (gdax.feeds.book_feed.GdaxBookFeed, gdax.feeds.GdaxL2BookFeed)
+        :param max_age: (float, default 1.0)
+            Seconds to reuse a copy of a book without a top_n view.
+        """
+        self.book_feed = book_feed
+        self.max_age = max_age
+        self.bids = None
+        self.asks = None
+        self.sequence = None
+        self.loaded = 0
+        self._source = None
+
+    def refresh(self, force=False):
+        """
+        Reloads the depth arrays if the book has changed
+        (top_n views) or they are older than max_age.
+        """
+        view = getattr(self.book_feed, 'view', None)
+        if view is not None:
+            snap = self.book_feed.get_snapshot()
+            if force or snap is not self._source:
+                self._source = snap
+                self.sequence = snap.sequence
+                self.bids = GdaxDepthSide('buy', snap.bids[0], snap.bids[1])
+                self.asks = GdaxDepthSide('sell', snap.asks[0], snap.asks[1])
+                self.loaded = time()
+        elif force or self.bids is None or time() - self.loaded >= self.max_age:
+            self.load_book(self.book_feed.get_current_book())
+
+    def load_book(self, book):
+        """
+        Loads the depth arrays from a book dictionary
+        (GdaxBookFeed.get_current_book, Gdax.get_book(level=2), ...).
+        """
+        self.sequence = book.get('sequence', None)
+        self.bids = GdaxDepthSide.from_rows('buy', book['bids'])
+        self.asks = GdaxDepthSide.from_rows('sell', book['asks'])
+        self.loaded = time()
+
+    def get_side(self, side):
+        """
+        Returns the GdaxDepthSide a side's market orders fill against:
+        asks for 'buy' and bids for 'sell'.
+        """
+        self.refresh()
+        return (self.asks if side == 'buy' else self.bids)
+
+    def estimate(self, side, size=None, funds=None):
+        """
+        :param side: (str) 'buy' or 'sell'.
+        :param size: (float, default None) The order size.
+        :param funds: (float, default None)
+            The amount to spend (buy) or receive (sell) when size is None.
+        :return: (GdaxImpact, None) None when that side of the book is empty.
+        """
+        if size is None and funds is None:
+            raise ValueError("Either size or funds is required.")
+        return self.get_side(side).estimate(size, funds)
+
+    def max_size(self, side, slippage):
+        """
+        Returns the largest market order size that is expected
+        to fill within slippage (0.001 = 0.1%) of the best price.
+        """
+        return self.get_side(side).max_size(slippage)
@@ -0,0 +1,189 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from bisect import bisect_left
+from threading import Lock
+from stocklook.crypto.gdax.feeds.websocket_client import GdaxWebsocketClient
+import logging as lg
+logger = lg.getLogger(__name__)
+
+
+class GdaxL2BookSide:
+    """
+    The aggregated levels of one side of a book in parallel lists
+    sorted best first: integer tick keys (negated for bids so both
+    sides ascend) searched with bisect, float prices and sizes.
+    """
+    __slots__ = ['side', 'sign', 'tick', 'keys', 'prices', 'sizes']
+
+    def __init__(self, side, tick=1e-8):
+        self.side = side
+        self.sign = (-1 if side == 'buy' else 1)
+        self.tick = tick
+        self.keys = list()
+        self.prices = list()
+        self.sizes = list()
+
+    def load(self, rows):
+        """
+        :param rows: (list) [price, size] pairs, best first.
+        """
+        self.keys = [self.sign * round(float(p) / self.tick) for p, s in rows]
+        self.prices = [float(p) for p, s in rows]
+        self.sizes = [float(s) for p, s in rows]
+
+    def update(self, price, size):
+        """
+        Sets the size at a price; 0 removes the level.
+        """
+        price = float(price)
+        size = float(size)
+        key = self.sign * round(price / self.tick)
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if size:
+                self.sizes[i] = size
+            else:
+                del keys[i]
+                del self.prices[i]
+                del self.sizes[i]
+        elif size:
+            keys.insert(i, key)
+            self.prices.insert(i, price)
+            self.sizes.insert(i, size)
+
+    def get_size(self, price):
+        key = self.sign * round(float(price) / self.tick)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.sizes[i]
+        return 0.0
+
+    @property
+    def best(self):
+        return (self.prices[0] if self.prices else None)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class GdaxL2BookFeed(GdaxWebsocketClient):
+    """
+    Maintains an aggregated (price, size) order book for one product
+    from the level2 channel: a snapshot message followed by l2update
+    messages that set the size at a price.
+
+    Much lighter than GdaxBookFeed (no full channel, no REST level 3
+    snapshot, no order ids) for consumers like BookSnapshot and
+    GdaxMarketMaker that only use price and size per level.
+    get_current_book rows are [price, size, None].
+
+    The level2 channel has no sequence numbers; a reconnect
+    sends a fresh snapshot which replaces the book.
+    Registered with a GdaxFeedHub, an error reconnects the hub
+    rather than opening a second socket.
+    """
+    def __init__(self, product_id='LTC-USD', url="wss://ws-feed.gdax.com", tick=1e-8, **kwargs):
+        """
+        :param product_id: (str, default 'LTC-USD')
+        :param url: (str, default "wss://ws-feed.gdax.com")
+        :param tick: (float, default 1e-8)
+            The price increment; prices are keyed as multiples of it.
+        :param kwargs: GdaxWebsocketClient(**kwargs)
+        """
+        kwargs.setdefault('channels', ['level2', 'matches'])
+        super(GdaxL2BookFeed, self).__init__(url=url, products=product_id, **kwargs)
+        self.tick = tick
+        self._bids = GdaxL2BookSide('buy', tick)
+        self._asks = GdaxL2BookSide('sell', tick)
+        self._lock = Lock()
+        self._current_ticker = None
+        self.ready = False
+        self.updates = 0
+        self.snapshots = 0
+
+    @property
+    def product_id(self):
+        return self.products[0]
+
+    def on_message(self, message):
+        msg_type = message.get('type', None)
+        if message.get('product_id', self.product_id) != self.product_id:
+            return
+
+        if msg_type == 'l2update':
+            if not self.ready:
+                # Sent before our snapshot.
+                return
+            with self._lock:
+                for side, price, size in message['changes']:
+                    (self._bids if side == 'buy' else self._asks).update(price, size)
+                self.updates += 1
+        elif msg_type == 'snapshot':
+            with self._lock:
+                self._bids.load(message['bids'])
+                self._asks.load(message['asks'])
+                self.ready = True
+                self.snapshots += 1
+        elif msg_type == 'match':
+            self._current_ticker = message
+        elif msg_type == 'error':
+            logger.error("{}: {}".format(self.product_id, message))
+
+    def on_error(self, e):
+        self.ready = False
+        if self.hub is not None:
+            # Only a new subscription sends a new snapshot.
+            logger.warning("{} error: {} - reconnecting the hub.".format(self.product_id, e))
+            self.hub.reconnect()
+            return
+        super(GdaxL2BookFeed, self).on_error(e)
+
+    def get_current_ticker(self):
+        return self._current_ticker
+
+    def get_current_book(self):
+        """
+        Returns the book in the same layout as GdaxBookFeed.get_current_book
+        (asks and bids both in ascending price order).
+        The level2 channel has no sequence numbers so 'sequence'
+        is None; 'updates' is the number of l2updates applied.
+        """
+        with self._lock:
+            asks = [[p, s, None] for p, s in zip(self._asks.prices, self._asks.sizes)]
+            bids = [[p, s, None] for p, s in zip(reversed(self._bids.prices),
+                                                  reversed(self._bids.sizes))]
+            return {'sequence': None, 'updates': self.updates, 'asks': asks, 'bids': bids}
+
+    def get_bid(self):
+        return self._bids.best
+
+    def get_ask(self):
+        return self._asks.best
+
+    def get_bid_size(self, price):
+        return self._bids.get_size(price)
+
+    def get_ask_size(self, price):
+        return self._asks.get_size(price)
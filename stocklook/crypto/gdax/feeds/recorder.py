@@ -0,0 +1,371 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import json
+import zlib
+import gzip
+import heapq
+from threading import Thread, Lock
+from time import time, gmtime, strftime, sleep, perf_counter
+import logging as lg
+logger = lg.getLogger(__name__)
+
+SEGMENT_EXT = '.jsonl.gz'
+INDEX_EXT = '.idx'
+INDEX_FIELDS = ['offset', 'count', 'first_sequence', 'last_sequence', 'first_time', 'last_time']
+
+
+def get_segment_name(product_id, received):
+    """
+    Returns the file name of the segment holding
+    a frame received at the given time (one per product per UTC hour).
+    """
+    return '{}_{}{}'.format(product_id, strftime('%Y%m%d%H', gmtime(received)), SEGMENT_EXT)
+
+
+class _Segment:
+    """
+    One open segment file.
+
+    Frames are written as "<received time>\t<raw frame>" lines into
+    gzip members of up to block_size frames. Each finished member is
+    added to the segment's index so readers can seek straight to it.
+    """
+    def __init__(self, path, block_size):
+        self.path = path
+        self.block_size = block_size
+        self.fh = open(path, 'ab')
+        self.index = open(path[:-len(SEGMENT_EXT)] + INDEX_EXT, 'a')
+        self._z = None
+        self._block = None
+
+    def write(self, received, sequence, raw):
+        if self._z is None:
+            self._z = zlib.compressobj(6, zlib.DEFLATED, 31)
+            self._block = [self.fh.tell(), 0, sequence, sequence, received, received]
+        b = self._block
+        b[1] += 1
+        if sequence is not None:
+            if b[2] is None:
+                b[2] = sequence
+            b[3] = sequence
+        b[5] = received
+        self.fh.write(self._z.compress('{:.6f}\t{}\n'.format(received, raw).encode('utf8')))
+        if b[1] >= self.block_size:
+            self.end_block()
+
+    def end_block(self):
+        if self._z is None:
+            return
+        self.fh.write(self._z.flush())
+        self.fh.flush()
+        self.index.write(json.dumps(dict(zip(INDEX_FIELDS, self._block))) + '\n')
+        self.index.flush()
+        self._z = None
+        self._block = None
+
+    def close(self):
+        self.end_block()
+        self.fh.close()
+        self.index.close()
+
+
+class GdaxFeedRecorder:
+    """
+    Records raw websocket frames with their receive time into
+    compressed, append-only segment files:
+
+        <directory>/<product_id>/<product_id>_<YYYYmmddHH>.jsonl.gz
+        <directory>/<product_id>/<product_id>_<YYYYmmddHH>.idx
+
+    Segments are gzip files made of independent members of block_size
+    frames. The .idx file lists each member's file offset, frame count
+    and first/last sequence and receive time, see GdaxFeedReader.
+
+    Attach it to a feed to record the frames exactly as received:
+
+        feed = GdaxBookFeed('BTC-USD', recorder=GdaxFeedRecorder('data'))
+
+    or register it with a GdaxFeedHub (messages are re-encoded).
+    Frames without a product_id (subscriptions, errors) aren't recorded.
+    """
+    def __init__(self, directory, block_size=1000):
+        """
+        :param directory: (str)
+            The folder to write segments into (created if missing).
+        :param block_size: (int, default 1000)
+            Frames per gzip member; the granularity of seeking.
+            An unfinished member is lost if the process dies.
+        """
+        self.directory = directory
+        self.block_size = block_size
+        self.count = 0
+        self._segments = dict()         # product_id: (segment name, _Segment)
+        self._lock = Lock()
+
+    def write(self, raw, msg, received=None):
+        """
+        Records one frame.
+        :param raw: (str, bytes) The frame as received.
+        :param msg: (dict) The decoded frame.
+        :param received: (float, default None) Epoch seconds, None is now.
+        """
+        product_id = msg.get('product_id', None)
+        if product_id is None:
+            return
+        if received is None:
+            received = time()
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf8')
+
+        name = get_segment_name(product_id, received)
+        with self._lock:
+            try:
+                current, segment = self._segments[product_id]
+            except KeyError:
+                current, segment = None, None
+            if current != name:
+                if segment is not None:
+                    segment.close()
+                folder = os.path.join(self.directory, product_id)
+                os.makedirs(folder, exist_ok=True)
+                segment = _Segment(os.path.join(folder, name), self.block_size)
+                self._segments[product_id] = (name, segment)
+            segment.write(received, msg.get('sequence', None), raw)
+            self.count += 1
+
+    def on_message(self, msg):
+        # Lets the recorder be a GdaxFeedHub consumer.
+        self.write(json.dumps(msg, separators=(',', ':')), msg)
+
+    def flush(self):
+        """
+        Finishes the current gzip members so everything
+        recorded so far can be read.
+        """
+        with self._lock:
+            for name, segment in self._segments.values():
+                segment.end_block()
+
+    def close(self):
+        with self._lock:
+            for name, segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class GdaxFeedReader:
+    """
+    Reads frames recorded by GdaxFeedRecorder in receive
+    time order across products.
+
+        for received, raw in GdaxFeedReader('data', products=['BTC-USD'], start=t):
+            ...
+    """
+    def __init__(self, directory, products=None, start=None, end=None):
+        """
+        :param directory: (str) The GdaxFeedRecorder directory.
+        :param products: (list, default None) None reads every product recorded.
+        :param start: (float, default None) Epoch seconds to start from.
+        :param end: (float, default None) Epoch seconds to stop at.
+        """
+        self.directory = directory
+        if products is None:
+            products = sorted(p for p in os.listdir(directory)
+                              if os.path.isdir(os.path.join(directory, p)))
+        self.products = products
+        self.start = start
+        self.end = end
+
+    def get_segments(self, product_id):
+        """
+        Returns the product's segment paths in time order.
+        """
+        folder = os.path.join(self.directory, product_id)
+        if not os.path.isdir(folder):
+            return []
+        return [os.path.join(folder, f) for f in sorted(os.listdir(folder))
+                if f.endswith(SEGMENT_EXT)]
+
+    @staticmethod
+    def get_index(path):
+        """
+        :return: (list) of dicts (see INDEX_FIELDS) for the segment's gzip members.
+        """
+        try:
+            with open(path[:-len(SEGMENT_EXT)] + INDEX_EXT) as fh:
+                return [json.loads(line) for line in fh if line.endswith('\n')]
+        except FileNotFoundError:
+            return []
+
+    def find_sequence(self, product_id, sequence):
+        """
+        Returns (path, offset) of the gzip member holding a sequence or None.
+        """
+        for path in self.get_segments(product_id):
+            for block in self.get_index(path):
+                if block['first_sequence'] is not None \
+                        and block['first_sequence'] <= sequence <= block['last_sequence']:
+                    return path, block['offset']
+        return None
+
+    def read_product(self, product_id, sequence=None):
+        """
+        Yields (received, raw) frames of one product.
+        :param sequence: (int, default None)
+            Seek to the frame with this sequence instead of the start time.
+        """
+        start = (self.start if sequence is None else None)
+        offset = None
+        segments = self.get_segments(product_id)
+        if sequence is not None:
+            found = self.find_sequence(product_id, sequence)
+            if found is None:
+                return
+            segments = segments[segments.index(found[0]):]
+            offset = found[1]
+
+        for path in segments:
+            blocks = self.get_index(path)
+            if offset is None and start is not None:
+                if blocks and blocks[-1]['last_time'] < start:
+                    continue
+                # The first member that reaches the start time.
+                offset = next((b['offset'] for b in blocks if b['last_time'] >= start), None)
+
+            for received, raw in self._read_segment(path, offset or 0):
+                if start is not None and received < start:
+                    continue
+                if self.end is not None and received > self.end:
+                    return
+                if sequence is not None:
+                    # Skip to the requested sequence within its member.
+                    if json.loads(raw).get('sequence', -1) < sequence:
+                        continue
+                    sequence = None
+                yield received, raw
+            offset = None
+
+    @staticmethod
+    def _read_segment(path, offset):
+        with open(path, 'rb') as fh:
+            fh.seek(offset)
+            try:
+                with gzip.GzipFile(fileobj=fh) as gz:
+                    for line in gz:
+                        if not line.endswith(b'\n'):
+                            break
+                        received, raw = line.decode('utf8').rstrip('\n').split('\t', 1)
+                        yield float(received), raw
+            except EOFError:
+                # A member still being written (or cut off by a crash).
+                pass
+
+    def __iter__(self):
+        return heapq.merge(*[self.read_product(p) for p in self.products],
+                           key=lambda r: r[0])
+
+
+class GdaxFeedReplay:
+    """
+    Pushes recorded frames into a GdaxWebsocketClient (or subclass)
+    as if they were being received: each frame is decoded with the
+    feed's decoder and passed to feed.on_message.
+
+        replay = GdaxFeedReplay(GdaxFeedReader('data'), feed, speed=None)
+        replay.run()
+        print(replay.get_stats())
+
+    The feed itself is never started.
+    """
+    def __init__(self, reader, feed, speed=1.0):
+        """
+        :param reader: (gdax.feeds.recorder.GdaxFeedReader, iterable)
+            Yields (received, raw) frames.
+        :param feed: (gdax.feeds.websocket_client.GdaxWebsocketClient)
+        :param speed: (float, default 1.0)
+            1.0 replays at the recorded pace, 10 ten times faster.
+            None (or 0) replays as fast as possible.
+        """
+        self.reader = reader
+        self.feed = feed
+        self.speed = speed
+        self.stop = False
+        self.count = 0
+        self.elapsed = 0.0
+        self.thread = None
+
+    def run(self):
+        """
+        Replays every frame (or until GdaxFeedReplay.close is called).
+        :return: (int) The frames replayed.
+        """
+        feed = self.feed
+        decode = feed.decoder.decode
+        speed = self.speed
+        first = None
+        began = perf_counter()
+
+        for received, raw in self.reader:
+            if self.stop:
+                break
+            if speed:
+                if first is None:
+                    first = received
+                wait = (received - first) / speed - (perf_counter() - began)
+                if wait > 0:
+                    sleep(wait)
+            msg = decode(raw)
+            feed.message_count += 1
+            feed.on_message(msg)
+            self.count += 1
+
+        self.elapsed = perf_counter() - began
+        return self.count
+
+    def start(self):
+        """
+        Replays on a background thread.
+        """
+        self.stop = False
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.stop = True
+        if self.thread is not None:
+            self.thread.join(5)
+            self.thread = None
+
+    def get_stats(self):
+        return dict(count=self.count,
+                    elapsed=self.elapsed,
+                    rate=(self.count / self.elapsed if self.elapsed else 0.0))
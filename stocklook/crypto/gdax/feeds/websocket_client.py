@@ -30,6 +30,7 @@ from threading import Thread
 from time import sleep, time
 import json, base64, hmac, hashlib
 from websocket import create_connection, WebSocketConnectionClosedException
+from .decoder import GdaxMessageDecoder
 
 # Channel types supported by GdaxWebsocketClient
 HEARTBEAT = 'heartbeat'
@@ -52,6 +53,10 @@ class GdaxWebsocketClient:
     CHANNELS = [HEARTBEAT, TICKER, FULL, LEVEL2, USER, MATCHES, SUBSCRIBE]
     SUBSCRIBE_TYPES = ['done', 'received', 'open', 'match']
 
+    # The message fields subclasses need (None = all fields).
+    # See gdax.feeds.decoder.GdaxMessageDecoder(strategy='subset')
+    DECODE_FIELDS = None
+
     def __init__(self,
                  url="wss://ws-feed.gdax.com",
                  products=None,
@@ -61,7 +66,24 @@ class GdaxWebsocketClient:
                  api_secret="",
                  api_passphrase="",
                  channels=None,
+                 engine=None,
+                 decoder=None,
+                 buffer=None,
+                 recorder=None,
                  ):
+        """
+        :param engine: (gdax.feeds.engine.GdaxFeedEngine, default None)
+            Runs the feed on a shared asyncio event loop.
+            None runs the feed on its own thread.
+        :param decoder: (gdax.feeds.decoder.GdaxMessageDecoder, default None)
+            None decodes with the fastest JSON library installed.
+        :param buffer: (gdax.feeds.buffer.GdaxMessageBuffer, default None)
+            Queues messages for a separate handler thread so a slow
+            on_message doesn't hold up reading the socket.
+            None calls on_message as soon as a message is received.
+        :param recorder: (gdax.feeds.recorder.GdaxFeedRecorder, default None)
+            Records every frame as received.
+        """
 
         if products is None:
             products = ['LTC-USD']
@@ -80,12 +102,32 @@ class GdaxWebsocketClient:
         self.api_secret = api_secret
         self.api_passphrase = api_passphrase
         self.message_count = 0
+        self.reconnects = 0
+        self.engine = engine
+        self.decoder = (GdaxMessageDecoder(fields=self.DECODE_FIELDS)
+                        if decoder is None else decoder)
+        self.buffer = buffer
+        self.recorder = recorder
+        self._handler = None
+        # The GdaxFeedHub delivering messages to a feed
+        # that is never started itself (see GdaxFeedHub.register).
+        self.hub = None
 
     def start(self):
         self.stop = False
         if self.url[-1] == "/":
             self.url = self.url[:-1]
 
+        if self.buffer is not None:
+            self.buffer.open()
+            self._handler = Thread(target=self._handle, daemon=True)
+            self._handler.start()
+
+        if self.engine is not None:
+            # The engine calls on_open after each (re)subscribe.
+            self.engine.start_feed(self)
+            return
+
         def _go():
             self._connect()
             self._listen()
@@ -95,8 +137,11 @@ class GdaxWebsocketClient:
         self.thread = Thread(target=_go)
         self.thread.start()
 
-    def _connect(self):
-
+    def get_subscribe_messages(self):
+        """
+        Returns the messages sent after connecting.
+        :return: (list)
+        """
         sub_params = {'type': 'subscribe'}
 
         if self.channels:
@@ -121,11 +166,14 @@ class GdaxWebsocketClient:
             sub_params['passphrase'] = self.api_passphrase
             sub_params['timestamp'] = timestamp
 
-        self.ws = create_connection(self.url)
-        self.ws.send(json.dumps(sub_params))
-
+        messages = [sub_params]
         if self.type == HEARTBEAT:
-            sub_params = {"type": HEARTBEAT, "on": True}
+            messages.append({"type": HEARTBEAT, "on": True})
+        return messages
+
+    def _connect(self):
+        self.ws = create_connection(self.url)
+        for sub_params in self.get_subscribe_messages():
             self.ws.send(json.dumps(sub_params))
 
     def _listen(self):
@@ -143,10 +191,10 @@ class GdaxWebsocketClient:
                     self._connect()
 
                 res = self.ws.recv()
-                msg = json.loads(res)
+                msg = self.decoder.decode(res)
                 decode_errs = 0
 
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 # JSONDecodeErrors seem to occur every ~200K messages
                 # We will fail it once we reach 3.
                 print("Ignored decode error: {}"
@@ -172,9 +220,39 @@ class GdaxWebsocketClient:
 
             else:
                 self.message_count += 1
+                if self.recorder is not None:
+                    self.recorder.write(res, msg)
+                if self.buffer is None:
+                    self.on_message(msg)
+                else:
+                    self.buffer.put(msg)
+
+    def _handle(self):
+        # Runs on_message for buffered messages until
+        # the feed is closed or restarted.
+        me = self._handler
+        while not self.stop and self._handler is me:
+            msg = self.buffer.get(timeout=1)
+            if msg is None:
+                continue
+            try:
                 self.on_message(msg)
+            except Exception as e:
+                self.on_error(e)
 
     def close(self):
+        if self.buffer is not None:
+            self.buffer.close()
+        if self.recorder is not None:
+            self.recorder.flush()
+
+        if self.engine is not None:
+            if not self.stop:
+                self.on_close()
+                self.stop = True
+            self.engine.stop_feed(self)
+            return
+
         if not self.stop:
             if self.type == HEARTBEAT:
                 msg = {"type": HEARTBEAT, "on": False}
@@ -207,6 +285,15 @@ class GdaxWebsocketClient:
     def on_open(self):
         print("-- Subscribed! --\n")
 
+    def resync(self):
+        """
+        Called by the GdaxFeedHub delivering messages to this feed
+        (and by on_error) when messages may have been missed.
+        Feeds keeping state built from messages rebuild it here
+        without touching the connection. Does nothing by default.
+        """
+        pass
+
     def on_close(self):
         print("\n-- Socket Closed --")
 
@@ -220,6 +307,16 @@ class GdaxWebsocketClient:
         :return:
         """
         print("Initial Error: {} - attempting to recover.".format(e))
+        if self.hub is not None:
+            # The hub owns the connection.
+            self.resync()
+            return
+
+        if self.engine is not None:
+            # The engine reconnects with a backoff.
+            self.engine.restart(self)
+            return
+
         sleep(1)
 
         try:
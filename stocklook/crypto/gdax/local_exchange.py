@@ -0,0 +1,1005 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import json
+import math
+import uuid
+import base64
+import random
+import socket
+import struct
+import hashlib
+import hmac
+from time import time, sleep
+from queue import Queue
+from datetime import datetime
+from collections import OrderedDict, deque
+from threading import Thread, Lock, Event
+from urllib.parse import urlsplit, parse_qsl
+from socketserver import ThreadingMixIn, TCPServer, StreamRequestHandler
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from stocklook.utils.timetools import timestamp_to_utc_int
+import logging as lg
+logger = lg.getLogger(__name__)
+
+# Sizes are kept as integers of this many units per coin
+# so fills and cancels add up exactly.
+SIZE_UNITS = 10 ** 8
+
+# Message types sent on each websocket channel.
+CHANNEL_TYPES = {
+    'full': {'received', 'open', 'done', 'match', 'change'},
+    'matches': {'match'},
+    'ticker': {'ticker'},
+    'heartbeat': {'heartbeat'},
+    'level2': {'snapshot', 'l2update'},
+}
+
+# Credentials of GdaxLocalExchange.get_gdax, checked when check_auth is True.
+LOCAL_KEY = 'local'
+LOCAL_SECRET = base64.b64encode(b'local').decode('utf8')
+LOCAL_PASSPHRASE = 'local'
+
+# Endpoints that don't need a signature.
+PUBLIC_ROOTS = ('products', 'currencies', 'time')
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+WS_TEXT = 0x1
+WS_CLOSE = 0x8
+WS_PING = 0x9
+WS_PONG = 0xA
+
+
+def iso_time(seconds=None):
+    if seconds is None:
+        seconds = time()
+    return datetime.utcfromtimestamp(seconds).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def format_size(units):
+    return '{:.8f}'.format(units / SIZE_UNITS)
+
+
+class SyntheticMarket:
+    """
+    A random limit order book for one product that
+    produces the same messages as the Gdax full channel.
+
+    Every message changes the book so a client that applies
+    them in sequence order to a level 3 snapshot
+    (SyntheticMarket.get_book(level=3)) ends up with the same book.
+    """
+    def __init__(self, product_id, price=100.0, tick=0.01, depth=20, seed=None, max_orders=None):
+        """
+        :param product_id: (str) 'ETH-USD'
+        :param price: (float, default 100.0) The starting mid price.
+        :param tick: (float, default 0.01) The price increment.
+        :param depth: (int, default 20)
+            Orders are placed up to this many ticks from the touch.
+        :param seed: (int, default None) Makes the market repeatable.
+        :param max_orders: (int, default None)
+            Orders are cancelled to keep the book below this size.
+            None allows depth * 6 orders.
+        """
+        self.product_id = product_id
+        self.tick = tick
+        self.depth = depth
+        self.max_orders = (depth * 6 if max_orders is None else max_orders)
+        self.random = random.Random(seed)
+        self.sequence = 0
+        self.trade_id = 0
+        self.orders = dict()                        # order_id: [side, ticks, size_units]
+        self.levels = {'buy': dict(), 'sell': dict()}   # ticks: OrderedDict(order_id=None)
+        self.trades = deque(maxlen=100)
+        self.open_price = price
+        self.last_price = price
+        self.high = price
+        self.low = price
+        self.volume = 0
+        self.lock = Lock()
+
+        mid = int(round(price / tick))
+        for i in range(1, depth + 1):
+            for _ in range(self.random.randint(1, 3)):
+                self._add('buy', mid - i, self._random_size())
+                self._add('sell', mid + i, self._random_size())
+
+    def _random_size(self):
+        return self.random.randint(1, 500) * SIZE_UNITS // 100
+
+    def _new_id(self):
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def _price(self, ticks):
+        return '{:.2f}'.format(ticks * self.tick)
+
+    def _add(self, side, ticks, size):
+        order_id = self._new_id()
+        self.orders[order_id] = [side, ticks, size]
+        self.levels[side].setdefault(ticks, OrderedDict())[order_id] = None
+        return order_id
+
+    def _remove(self, order_id):
+        side, ticks, size = self.orders.pop(order_id)
+        level = self.levels[side][ticks]
+        del level[order_id]
+        if not level:
+            del self.levels[side][ticks]
+
+    def best(self, side):
+        """
+        Returns the best price in ticks for 'buy' or 'sell' or None.
+        """
+        levels = self.levels[side]
+        if not levels:
+            return None
+        return max(levels) if side == 'buy' else min(levels)
+
+    def _message(self, msg_type, **kwargs):
+        self.sequence += 1
+        kwargs.update(type=msg_type,
+                      sequence=self.sequence,
+                      product_id=self.product_id,
+                      time=iso_time())
+        return kwargs
+
+    def step(self):
+        """
+        Makes one random change to the book.
+        :return: (list) The full channel messages (plus a ticker on trades).
+        """
+        with self.lock:
+            r = self.random.random()
+            if r < 0.2 and self.levels['buy'] and self.levels['sell']:
+                return self._step_match()
+            n = len(self.orders)
+            if r < 0.45 and n > self.max_orders // 3:
+                return self._step_cancel()
+            if r < 0.5 and n:
+                return self._step_change()
+            if n > self.max_orders:
+                # Keeps the book from growing forever.
+                return self._step_cancel()
+            return self._step_add()
+
+    def _step_add(self):
+        side = self.random.choice(('buy', 'sell'))
+        bid, ask = self.best('buy'), self.best('sell')
+        last = int(round(self.last_price / self.tick))
+        offset = self.random.randint(1, self.depth)
+        if side == 'buy':
+            ticks = (ask if ask is not None else last + 1) - offset
+        else:
+            ticks = (bid if bid is not None else last - 1) + offset
+        size = self._random_size()
+        order_id = self._add(side, ticks, size)
+        price = self._price(ticks)
+        return [self._message('received', order_id=order_id, order_type='limit',
+                              side=side, price=price, size=format_size(size)),
+                self._message('open', order_id=order_id, side=side, price=price,
+                              remaining_size=format_size(size))]
+
+    def _step_cancel(self):
+        order_id = self.random.choice(list(self.orders))
+        side, ticks, size = self.orders[order_id]
+        self._remove(order_id)
+        return [self._message('done', order_id=order_id, side=side, price=self._price(ticks),
+                              remaining_size=format_size(size), reason='canceled')]
+
+    def _step_change(self):
+        order_id = self.random.choice(list(self.orders))
+        order = self.orders[order_id]
+        old = order[2]
+        new = max(1, old // 2)
+        order[2] = new
+        return [self._message('change', order_id=order_id, side=order[0],
+                              price=self._price(order[1]),
+                              old_size=format_size(old), new_size=format_size(new))]
+
+    def _step_match(self):
+        taker_side = self.random.choice(('buy', 'sell'))
+        maker_side = ('sell' if taker_side == 'buy' else 'buy')
+        ticks = self.best(maker_side)
+        maker_id = next(iter(self.levels[maker_side][ticks]))
+        maker = self.orders[maker_id]
+        size = (maker[2] if self.random.random() < 0.5
+                else self.random.randint(1, maker[2]))
+        taker_id = self._new_id()
+        price = self._price(ticks)
+
+        msgs = [self._message('received', order_id=taker_id, order_type='market',
+                              side=taker_side, size=format_size(size))]
+        self.trade_id += 1
+        msgs.append(self._message('match', trade_id=self.trade_id, maker_order_id=maker_id,
+                                  taker_order_id=taker_id, side=maker_side,
+                                  price=price, size=format_size(size)))
+        maker[2] -= size
+        if not maker[2]:
+            self._remove(maker_id)
+            msgs.append(self._message('done', order_id=maker_id, side=maker_side, price=price,
+                                      remaining_size=format_size(0), reason='filled'))
+        msgs.append(self._message('done', order_id=taker_id, side=taker_side, reason='filled'))
+
+        self.last_price = float(price)
+        self.high = max(self.high, self.last_price)
+        self.low = min(self.low, self.last_price)
+        self.volume += size
+        trade = {'time': msgs[1]['time'], 'trade_id': self.trade_id, 'price': price,
+                 'size': format_size(size), 'side': maker_side}
+        self.trades.appendleft(trade)
+
+        bid, ask = self.best('buy'), self.best('sell')
+        # Tickers don't take part in the full channel sequence.
+        msgs.append({'type': 'ticker', 'trade_id': self.trade_id, 'sequence': self.sequence,
+                     'product_id': self.product_id, 'time': msgs[1]['time'],
+                     'price': price, 'side': taker_side, 'last_size': format_size(size),
+                     'best_bid': (self._price(bid) if bid is not None else None),
+                     'best_ask': (self._price(ask) if ask is not None else None)})
+        return msgs
+
+    def heartbeat(self):
+        with self.lock:
+            return {'type': 'heartbeat', 'sequence': self.sequence,
+                    'last_trade_id': self.trade_id, 'product_id': self.product_id,
+                    'time': iso_time()}
+
+    def get_book(self, level=2):
+        """
+        Returns the book like GET /products/<product-id>/book.
+        """
+        with self.lock:
+            book = {'sequence': self.sequence}
+            for side, key in (('buy', 'bids'), ('sell', 'asks')):
+                prices = sorted(self.levels[side], reverse=(side == 'buy'))
+                if level == 1:
+                    prices = prices[:1]
+                elif level == 2:
+                    prices = prices[:50]
+                rows = list()
+                for ticks in prices:
+                    ids = self.levels[side][ticks]
+                    if level == 3:
+                        rows.extend([self._price(ticks), format_size(self.orders[o][2]), o]
+                                    for o in ids)
+                    else:
+                        rows.append([self._price(ticks),
+                                     format_size(sum(self.orders[o][2] for o in ids)),
+                                     len(ids)])
+                book[key] = rows
+            return book
+
+    def _level_size(self, side, ticks):
+        ids = self.levels[side].get(ticks, ())
+        return format_size(sum(self.orders[o][2] for o in ids))
+
+    def get_level2_snapshot(self):
+        """
+        Returns the level2 channel's snapshot message (every level, best first).
+        """
+        with self.lock:
+            msg = {'type': 'snapshot', 'product_id': self.product_id}
+            for side, key in (('buy', 'bids'), ('sell', 'asks')):
+                prices = sorted(self.levels[side], reverse=(side == 'buy'))
+                msg[key] = [[self._price(t), self._level_size(side, t)] for t in prices]
+            return msg
+
+    def get_level2_update(self, msgs):
+        """
+        Returns the level2 channel's l2update message for the
+        levels changed by full channel messages (from SyntheticMarket.step)
+        or None if no level changed.
+        """
+        changes = list()
+        with self.lock:
+            seen = set()
+            for msg in msgs:
+                if msg['type'] not in ('open', 'done', 'match', 'change') or 'price' not in msg:
+                    continue
+                level = (msg['side'], int(round(float(msg['price']) / self.tick)))
+                if level in seen:
+                    continue
+                seen.add(level)
+                changes.append([level[0], self._price(level[1]), self._level_size(*level)])
+        if not changes:
+            return None
+        return {'type': 'l2update', 'product_id': self.product_id,
+                'time': iso_time(), 'changes': changes}
+
+    def get_ticker(self):
+        with self.lock:
+            bid, ask = self.best('buy'), self.best('sell')
+            return {'trade_id': self.trade_id,
+                    'price': '{:.2f}'.format(self.last_price),
+                    'size': (self.trades[0]['size'] if self.trades else format_size(0)),
+                    'bid': (self._price(bid) if bid is not None else None),
+                    'ask': (self._price(ask) if ask is not None else None),
+                    'volume': format_size(self.volume),
+                    'time': iso_time()}
+
+    def get_stats(self):
+        with self.lock:
+            return {'open': '{:.2f}'.format(self.open_price),
+                    'high': '{:.2f}'.format(self.high),
+                    'low': '{:.2f}'.format(self.low),
+                    'last': '{:.2f}'.format(self.last_price),
+                    'volume': format_size(self.volume),
+                    'volume_30day': format_size(self.volume)}
+
+    def get_candles(self, start, end, granularity):
+        """
+        Returns repeatable candles (newest first) for any time range.
+        """
+        rows = list()
+        start += -start % granularity
+        for t in range(end - end % granularity, start - 1, -granularity):
+            r = random.Random('{}-{}-{}'.format(self.product_id, granularity, t))
+            o = self.open_price * (1 + 0.1 * math.sin(t / 86400.0))
+            c = o * (1 + r.uniform(-0.01, 0.01))
+            rows.append([t, round(min(o, c) * 0.995, 2), round(max(o, c) * 1.005, 2),
+                         round(o, 2), round(c, 2), round(r.uniform(1, 100), 8)])
+        return rows
+
+
+class LocalAPIError(Exception):
+    def __init__(self, status, message):
+        super(LocalAPIError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _RESTHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, fmt, *args):
+        logger.debug(fmt % args)
+
+    def _handle(self, method):
+        exchange = self.server.exchange
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        length = int(self.headers.get('Content-Length', 0) or 0)
+        body = self.rfile.read(length) if length else b''
+        headers = dict()
+        try:
+            status, data, headers = exchange.handle_rest(method, url.path, params, body,
+                                                         self.headers, self.path)
+        except LocalAPIError as e:
+            status, data = e.status, {'message': e.message}
+        except Exception as e:
+            logger.exception(e)
+            status, data = 500, {'message': str(e)}
+
+        payload = json.dumps(data).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for k, v in headers.items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._handle('get')
+
+    def do_POST(self):
+        self._handle('post')
+
+    def do_DELETE(self):
+        self._handle('delete')
+
+
+class _RESTServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def ws_encode(payload, opcode=WS_TEXT):
+    """
+    Returns an unmasked (server to client) websocket frame.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf8')
+    n = len(payload)
+    if n < 126:
+        header = struct.pack('!BB', 0x80 | opcode, n)
+    elif n < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, n)
+    return header + payload
+
+
+def ws_read_frame(rfile):
+    """
+    Reads one websocket frame.
+    :return: (tuple) (opcode, payload bytes) or (None, None) when the socket closed.
+    """
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None, None
+    b1, b2 = head
+    n = b2 & 0x7F
+    if n == 126:
+        n = struct.unpack('!H', rfile.read(2))[0]
+    elif n == 127:
+        n = struct.unpack('!Q', rfile.read(8))[0]
+    mask = (rfile.read(4) if b2 & 0x80 else None)
+    payload = rfile.read(n)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return b1 & 0x0F, payload
+
+
+class _WebsocketConnection:
+    """
+    One client of the local websocket feed.
+    Frames are queued by the market thread and written by the handler thread.
+    """
+    def __init__(self, request):
+        self.request = request
+        self.queue = Queue()
+        self.products = set()
+        self.channels = set()
+        self.closed = Event()
+
+    def subscribe(self, msg):
+        products = set(msg.get('product_ids') or [])
+        channels = msg.get('channels') or ['full']
+        for c in channels:
+            if isinstance(c, dict):
+                self.channels.add(c['name'])
+                products.update(c.get('product_ids') or [])
+            else:
+                self.channels.add(c)
+        self.products.update(products)
+
+    def wants(self, msg):
+        if msg['product_id'] not in self.products:
+            return False
+        t = msg['type']
+        return any(t in CHANNEL_TYPES.get(c, ()) for c in self.channels)
+
+    def send(self, frame):
+        if not self.closed.is_set():
+            self.queue.put(frame)
+
+    def close(self):
+        if not self.closed.is_set():
+            self.closed.set()
+            self.queue.put(None)
+            try:
+                self.request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _WebsocketHandler(StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        exchange = self.server.exchange
+        headers = dict()
+        line = self.rfile.readline()
+        while line and line not in (b'\r\n', b'\n'):
+            line = self.rfile.readline()
+            if b':' in line:
+                k, v = line.decode('latin-1').split(':', 1)
+                headers[k.strip().lower()] = v.strip()
+        key = headers.get('sec-websocket-key')
+        if not key:
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode('ascii')).digest())
+        self.wfile.write(b'HTTP/1.1 101 Switching Protocols\r\n'
+                         b'Upgrade: websocket\r\n'
+                         b'Connection: Upgrade\r\n'
+                         b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+
+        conn = _WebsocketConnection(self.request)
+        exchange._connections.add(conn)
+        reader = Thread(target=self._read, args=(conn,), daemon=True)
+        reader.start()
+        try:
+            while True:
+                frame = conn.queue.get()
+                if frame is None:
+                    break
+                self.wfile.write(frame)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+            exchange._connections.discard(conn)
+
+    def _read(self, conn):
+        try:
+            while not conn.closed.is_set():
+                opcode, payload = ws_read_frame(self.rfile)
+                if opcode is None or opcode == WS_CLOSE:
+                    break
+                if opcode == WS_PING:
+                    conn.send(ws_encode(payload, WS_PONG))
+                elif opcode == WS_TEXT:
+                    msg = json.loads(payload.decode('utf8'))
+                    if msg.get('type') == 'subscribe':
+                        conn.subscribe(msg)
+                        conn.send(ws_encode(json.dumps(
+                            {'type': 'subscriptions',
+                             'channels': [{'name': c, 'product_ids': sorted(conn.products)}
+                                          for c in sorted(conn.channels)]})))
+                        if 'level2' in conn.channels:
+                            self.server.exchange.send_level2_snapshots(conn, conn.products)
+                    elif msg.get('type') == 'heartbeat':
+                        if msg.get('on', True):
+                            conn.channels.add('heartbeat')
+                        else:
+                            conn.channels.discard('heartbeat')
+        except (OSError, ValueError):
+            pass
+        finally:
+            conn.close()
+
+
+class _WebsocketServer(ThreadingMixIn, TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class GdaxLocalExchange:
+    """
+    A local stand-in for the Gdax REST API and websocket feed
+    so that the feeds, loaders and market maker can be
+    tested and benchmarked without a network connection.
+
+    REST endpoints (signatures are only checked when check_auth is True):
+        products, products/<id>/book|ticker|trades|stats|candles,
+        currencies, time, accounts, accounts/<id>, accounts/<id>/ledger,
+        orders (GET/POST/DELETE), orders/<id>, fills.
+        Lists are paged with the after/limit parameters and the cb-after header.
+
+    The websocket feed sends full, matches, ticker, heartbeat and level2 channel
+    messages generated by one SyntheticMarket per product at GdaxLocalExchange.rate
+    messages per second per product. Gaps and disconnects can be injected
+    with GdaxLocalExchange.inject_gap and GdaxLocalExchange.disconnect.
+
+        with GdaxLocalExchange(rate=500) as ex:
+            gdax = ex.get_gdax()
+            gdax.get_book('ETH-USD', level=3)
+            feed = GdaxBookFeed('ETH-USD', gdax=gdax, auth=False)
+            feed.url = ex.ws_url
+            feed.start()
+    """
+    def __init__(self, products=None, host='127.0.0.1', rest_port=0, ws_port=0,
+                 rate=50, heartbeat_interval=1.0, seed=None, check_auth=False):
+        """
+        :param products: (list, default None)
+            None defaults to gdax.product.GdaxProducts.LIST.
+        :param host: (str, default '127.0.0.1')
+        :param rest_port: (int, default 0) 0 picks a free port.
+        :param ws_port: (int, default 0) 0 picks a free port.
+        :param rate: (float, default 50)
+            Market changes per second per product. 0 pauses the market.
+        :param heartbeat_interval: (float, default 1.0)
+        :param seed: (int, default None)
+        :param check_auth: (bool, default False)
+            True rejects private requests (everything but products, currencies
+            and time) that aren't signed with the credentials of
+            GdaxLocalExchange.get_gdax with a 401.
+        """
+        if products is None:
+            from .product import GdaxProducts
+            products = GdaxProducts.LIST
+        prices = {'BTC-USD': 4000.0, 'ETH-USD': 300.0, 'LTC-USD': 50.0}
+        self.markets = OrderedDict(
+            (p, SyntheticMarket(p, price=prices.get(p, 100.0),
+                                seed=(None if seed is None else seed + i)))
+            for i, p in enumerate(products))
+        self.host = host
+        self.rate = rate
+        self.heartbeat_interval = heartbeat_interval
+        self.messages_sent = 0
+        self.messages_dropped = 0
+        self.accounts = OrderedDict()
+        self.orders = OrderedDict()
+        self.fills = list()
+        self.ledgers = dict()
+        self.requests = 0
+        self.check_auth = check_auth
+        self.signed_requests = 0
+        self._errors = list()
+        self._gaps = dict()
+        self._connections = set()
+        self._lock = Lock()
+        # Held while a market step is broadcast so level2 snapshots
+        # aren't sent between a step and its l2update.
+        self._feed_lock = Lock()
+        self._running = Event()
+        self._threads = list()
+
+        self._rest = _RESTServer((host, rest_port), _RESTHandler)
+        self._rest.exchange = self
+        self._ws = _WebsocketServer((host, ws_port), _WebsocketHandler)
+        self._ws.exchange = self
+        self._setup_accounts()
+
+    def _setup_accounts(self):
+        currencies = ['USD'] + sorted({p.split('-')[0] for p in self.markets})
+        for c in currencies:
+            account_id = str(uuid.uuid4())
+            self.accounts[account_id] = {
+                'id': account_id, 'currency': c, 'profile_id': 'local',
+                'balance': '1000.0000000000000000', 'hold': '0.0000000000000000',
+                'available': '1000.0000000000000000'}
+            self.ledgers[account_id] = [
+                {'id': i, 'created_at': iso_time(time() - 3600 + i), 'amount': '1.0',
+                 'balance': '{:.1f}'.format(i), 'type': 'transfer',
+                 'details': {'transfer_id': str(i)}}
+                for i in range(250, 0, -1)]
+
+    @property
+    def rest_url(self):
+        return 'http://{}:{}/'.format(*self._rest.server_address)
+
+    @property
+    def ws_url(self):
+        return 'ws://{}:{}'.format(*self._ws.server_address)
+
+    def start(self):
+        self._running.set()
+        for target in (self._rest.serve_forever, self._ws.serve_forever, self._run_market):
+            t = Thread(target=target, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self):
+        self._running.clear()
+        self.disconnect()
+        self._rest.shutdown()
+        self._ws.shutdown()
+        self._rest.server_close()
+        self._ws.server_close()
+        for t in self._threads:
+            t.join(2)
+        self._threads = list()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def get_gdax(self, **kwargs):
+        """
+        Returns a gdax.api.Gdax pointed at the local exchange
+        with rate limiting effectively turned off.
+        """
+        from .api import Gdax, GDAX_RATE_LIMITS
+        from stocklook.utils.ratelimit import RateLimiter
+        limits = {k: (10 ** 6, 10 ** 6) + tuple(v[2:]) for k, v in GDAX_RATE_LIMITS.items()}
+        kwargs['rate_limiter'] = kwargs.get('rate_limiter', RateLimiter(limits, default='private'))
+        gdax = Gdax(kwargs.pop('key', LOCAL_KEY),
+                    kwargs.pop('secret', LOCAL_SECRET),
+                    kwargs.pop('passphrase', LOCAL_PASSPHRASE), **kwargs)
+        gdax.base_url = self.rest_url
+        return gdax
+
+    # Fault injection
+
+    def inject_gap(self, product_id=None, messages=1):
+        """
+        Drops the next messages of one (or every) product from the
+        websocket feed while still applying them to the market,
+        like a client that missed them.
+        """
+        with self._lock:
+            for p in ([product_id] if product_id else self.markets):
+                self._gaps[p] = self._gaps.get(p, 0) + messages
+
+    def disconnect(self):
+        """
+        Closes every websocket connection.
+        """
+        for conn in list(self._connections):
+            conn.close()
+
+    def inject_errors(self, status=503, count=1, path=None, retry_after=None):
+        """
+        Makes the next count REST requests (matching path
+        if given) fail with the given status.
+        """
+        with self._lock:
+            self._errors.append([status, count, path, retry_after])
+
+    @property
+    def connections(self):
+        return len(self._connections)
+
+    # Websocket feed
+
+    def _broadcast(self, msg):
+        frame = None
+        for conn in list(self._connections):
+            if conn.wants(msg):
+                if frame is None:
+                    frame = ws_encode(json.dumps(msg))
+                conn.send(frame)
+                self.messages_sent += 1
+
+    def _step_market(self, market):
+        msgs = market.step()
+        for msg in msgs:
+            with self._lock:
+                drop = self._gaps.get(market.product_id, 0)
+                if drop and msg['type'] != 'ticker':
+                    self._gaps[market.product_id] = drop - 1
+                    self.messages_dropped += 1
+                    continue
+            self._broadcast(msg)
+
+        if any('level2' in c.channels for c in list(self._connections)):
+            update = market.get_level2_update(msgs)
+            if update is not None:
+                self._broadcast(update)
+
+    def send_level2_snapshots(self, conn, products):
+        """
+        Sends a level2 snapshot of each product to a new subscriber.
+        """
+        with self._feed_lock:
+            for product_id in sorted(products):
+                market = self.markets.get(product_id, None)
+                if market is not None:
+                    conn.send(ws_encode(json.dumps(market.get_level2_snapshot())))
+
+    def _run_market(self):
+        started, generated = time(), 0
+        next_beat = started + self.heartbeat_interval
+        while self._running.is_set():
+            now = time()
+            due = (int((now - started) * self.rate) - generated if self.rate else 0)
+            if not self.rate:
+                started, generated = now, 0
+
+            for _ in range(min(due, 1000)):
+                generated += 1
+                for market in self.markets.values():
+                    with self._feed_lock:
+                        self._step_market(market)
+
+            if now >= next_beat:
+                next_beat = now + self.heartbeat_interval
+                for market in self.markets.values():
+                    self._broadcast(market.heartbeat())
+
+            if due <= 0:
+                sleep(0.001)
+
+    # REST API
+
+    def _check_errors(self, path):
+        with self._lock:
+            for err in self._errors:
+                status, count, err_path, retry_after = err
+                if err_path is None or err_path in path:
+                    err[1] -= 1
+                    if err[1] <= 0:
+                        self._errors.remove(err)
+                    headers = ({'Retry-After': retry_after} if retry_after is not None else {})
+                    return status, {'message': 'injected error'}, headers
+        return None
+
+    def _market(self, product_id):
+        try:
+            return self.markets[product_id]
+        except KeyError:
+            raise LocalAPIError(404, 'NotFound')
+
+    @staticmethod
+    def _page(records, params, key='id'):
+        """
+        Returns (page, headers) paging newest-first records
+        with the after/limit parameters like Gdax.
+        """
+        limit = min(int(params.get('limit', 100)), 100)
+        after = params.get('after', None)
+        start = 0
+        if after is not None:
+            for idx, r in enumerate(records):
+                if str(r[key]) == str(after):
+                    start = idx + 1
+                    break
+        page = records[start:start + limit]
+        headers = dict()
+        if start + limit < len(records) and page:
+            headers['cb-after'] = page[-1][key]
+        return page, headers
+
+    def _check_signature(self, method, path_qs, body, headers):
+        """
+        Raises a 401 LocalAPIError unless the request is
+        signed like gdax.api.CoinbaseExchangeAuth signs it.
+        """
+        headers = headers or {}
+        timestamp = headers.get('CB-ACCESS-TIMESTAMP', '')
+        if headers.get('CB-ACCESS-KEY') != LOCAL_KEY \
+                or headers.get('CB-ACCESS-PASSPHRASE') != LOCAL_PASSPHRASE:
+            raise LocalAPIError(401, 'invalid api key')
+        message = '{}{}{}{}'.format(timestamp, method.upper(), path_qs,
+                                    (body or b'').decode('utf8')).encode('utf8')
+        expected = base64.b64encode(hmac.new(base64.b64decode(LOCAL_SECRET),
+                                             message, hashlib.sha256).digest()).decode('utf8')
+        if not hmac.compare_digest(expected, headers.get('CB-ACCESS-SIGN', '')):
+            raise LocalAPIError(401, 'invalid signature')
+        with self._lock:
+            self.signed_requests += 1
+
+    def handle_rest(self, method, path, params, body, headers=None, path_qs=None):
+        """
+        :param headers: (dict, default None) Request headers (checked with check_auth).
+        :param path_qs: (str, default None) The path and query string that was signed.
+        :return: (tuple) (status, data, headers)
+        """
+        self.requests += 1
+        err = self._check_errors(path)
+        if err is not None:
+            return err
+
+        parts = path.strip('/').split('/')
+        root = parts[0]
+        if self.check_auth and root not in PUBLIC_ROOTS:
+            self._check_signature(method, path_qs or path, body, headers)
+
+        if method == 'get':
+            if root == 'time':
+                return 200, {'iso': iso_time(), 'epoch': time()}, {}
+            if root == 'currencies':
+                return 200, [{'id': c, 'name': c, 'min_size': '0.00000001'}
+                             for c in ['USD'] + sorted({p.split('-')[0] for p in self.markets})], {}
+            if root == 'products':
+                return (200,) + self._get_product(parts[1:], params)
+            if root == 'accounts':
+                return (200,) + self._get_accounts(parts[1:], params)
+            if root == 'orders':
+                if len(parts) > 1:
+                    try:
+                        return 200, self.orders[parts[1]], {}
+                    except KeyError:
+                        raise LocalAPIError(404, 'NotFound')
+                status = params.get('status', 'all')
+                records = [o for o in reversed(self.orders.values())
+                           if (status == 'all' or o['status'] == status)
+                           and params.get('product_id', o['product_id']) == o['product_id']]
+                return (200,) + self._page(records, params)
+            if root == 'fills':
+                records = [f for f in reversed(self.fills)
+                           if params.get('product_id', f['product_id']) == f['product_id']
+                           and params.get('order_id', f['order_id']) == f['order_id']]
+                return (200,) + self._page(records, params, key='trade_id')
+
+        elif method == 'post' and root == 'orders':
+            return 200, self._post_order(json.loads(body.decode('utf8') or '{}')), {}
+
+        elif method == 'delete' and root == 'orders':
+            if len(parts) > 1:
+                order = self.orders.get(parts[1], None)
+                if order is None or order['status'] != 'open':
+                    raise LocalAPIError(404, 'order not found')
+                order['status'] = 'done'
+                order['done_reason'] = 'canceled'
+                return 200, [order['id']], {}
+            cancelled = list()
+            for o in self.orders.values():
+                if o['status'] == 'open' and params.get('product_id', o['product_id']) == o['product_id']:
+                    o['status'] = 'done'
+                    o['done_reason'] = 'canceled'
+                    cancelled.append(o['id'])
+            return 200, cancelled, {}
+
+        raise LocalAPIError(404, 'NotFound')
+
+    def _get_product(self, parts, params):
+        if not parts:
+            return [{'id': p, 'base_currency': p.split('-')[0], 'quote_currency': p.split('-')[1],
+                     'base_min_size': '0.01', 'base_max_size': '10000',
+                     'quote_increment': '0.01', 'display_name': p.replace('-', '/')}
+                    for p in self.markets], {}
+        market = self._market(parts[0])
+        endpoint = (parts[1] if len(parts) > 1 else None)
+        if endpoint == 'book':
+            return market.get_book(int(params.get('level', 1))), {}
+        if endpoint == 'ticker':
+            return market.get_ticker(), {}
+        if endpoint == 'trades':
+            with market.lock:
+                return list(market.trades), {}
+        if endpoint == 'stats':
+            return market.get_stats(), {}
+        if endpoint == 'candles':
+            granularity = int(params.get('granularity', 60))
+            end = int(timestamp_to_utc_int(params['end'])) if 'end' in params else int(time())
+            start = (int(timestamp_to_utc_int(params['start'])) if 'start' in params
+                     else end - granularity * 299)
+            if (end - start) // granularity + 1 > 300:
+                raise LocalAPIError(400, 'granularity too small for the requested time range')
+            return market.get_candles(start, end, granularity), {}
+        raise LocalAPIError(404, 'NotFound')
+
+    def _get_accounts(self, parts, params):
+        if not parts:
+            return list(self.accounts.values()), {}
+        try:
+            account = self.accounts[parts[0]]
+        except KeyError:
+            raise LocalAPIError(404, 'NotFound')
+        if len(parts) > 1 and parts[1] == 'ledger':
+            return self._page(self.ledgers[parts[0]], params)
+        return account, {}
+
+    def _post_order(self, data):
+        product_id = data.get('product_id')
+        market = self._market(product_id)
+        if data.get('side') not in ('buy', 'sell'):
+            raise LocalAPIError(400, 'Invalid side')
+
+        client_oid = data.get('client_oid')
+        if client_oid:
+            for o in self.orders.values():
+                if o.get('client_oid') == client_oid:
+                    return o
+
+        order_type = data.get('type', 'limit')
+        price = data.get('price', '{:.2f}'.format(market.last_price))
+        size = data.get('size', '0')
+        order = {'id': str(uuid.uuid4()), 'product_id': product_id, 'side': data['side'],
+                 'type': order_type, 'price': price, 'size': size,
+                 'created_at': iso_time(), 'fill_fees': '0.0', 'filled_size': '0',
+                 'executed_value': '0', 'status': 'open', 'settled': False,
+                 'stp': data.get('stp', 'dc'), 'post_only': bool(data.get('post_only', False))}
+        if client_oid:
+            order['client_oid'] = client_oid
+
+        if order_type == 'market':
+            order.update(status='done', done_reason='filled', settled=True,
+                         filled_size=size,
+                         executed_value='{:.8f}'.format(float(size) * float(price)))
+            self.fills.append({'trade_id': len(self.fills) + 1, 'product_id': product_id,
+                               'order_id': order['id'], 'price': price, 'size': size,
+                               'side': data['side'], 'fee': '0.0', 'liquidity': 'T',
+                               'settled': True, 'created_at': order['created_at']})
+        self.orders[order['id']] = order
+        return order
+
+
+if __name__ == '__main__':
+    import sys
+    lg.basicConfig(level=lg.INFO)
+    rate = (float(sys.argv[1]) if len(sys.argv) > 1 else 50)
+    exchange = GdaxLocalExchange(rate=rate).start()
+    print("REST: {}\nWebsocket: {}".format(exchange.rest_url, exchange.ws_url))
+    try:
+        while True:
+            sleep(1)
+    except KeyboardInterrupt:
+        exchange.stop()
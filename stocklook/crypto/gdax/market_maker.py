@@ -28,6 +28,7 @@ from datetime import datetime, timedelta
 from stocklook.crypto.gdax.api import Gdax, GdaxAPIError
 from stocklook.utils.timetools import now, now_minus, timeout_check
 from stocklook.crypto.gdax.feeds.book_feed import GdaxBookFeed, BookSnapshot
+from stocklook.crypto.gdax.feeds.impact import GdaxImpactEstimator
 from stocklook.crypto.gdax.order_mm import GdaxMMOrder, GdaxOrderCancellationError, OrderLockError
 
 logger = logging.getLogger(__name__)
@@ -82,7 +83,8 @@ class GdaxMarketMaker:
                  max_open_buys=6,
                  max_open_sells=12,
                  manage_existing_orders=True,
-                 aggressive=True):
+                 aggressive=True,
+                 max_slippage=None):
         """
         Gdax market maker bot automatically trades the spreads.
 
@@ -131,6 +133,14 @@ class GdaxMarketMaker:
         :param aggressive: (bool, default True)
             The aggressive parameter is used to determine how tight or loose to manage order prices.
             An aggressive bot trades more frequently for tighter spreads/margins.
+
+        :param max_slippage: (float, default None)
+            Caps GdaxMarketMaker.position_size to what the ask side of the book
+            can fill within this fraction (0.002 = 0.2%) of the lowest ask.
+            None ignores book depth.
+            A book_feed with a top_n view (GdaxBookFeed(top_n=...)) keeps this cheap;
+            without one the whole book is copied once per interval, which can take
+            a few hundred milliseconds on a busy level 3 book.
         """
         if book_feed is None:
             book_feed = GdaxBookFeed(product_id=product_id,
@@ -157,6 +167,9 @@ class GdaxMarketMaker:
         self.max_open_sells = max_open_sells
         self.manage_existing_orders = manage_existing_orders
         self.aggressive = aggressive
+        self.max_slippage = max_slippage
+        # Created by position_size when max_slippage is set.
+        self.impact = None
         self.currency = product_id.split('-')[1]
 
         self.stop = False
@@ -399,6 +412,7 @@ class GdaxMarketMaker:
             - open sell orders v.s. GdaxMarketMaker.max_open_sells
             - open buy orders v.s GdaxMarketMaker.max_open_buys
             - currency balance.
+            - book depth v.s. GdaxMarketMaker.max_slippage
         :return:
         """
         usd_acc = self.gdax.accounts[self.currency]
@@ -407,6 +421,10 @@ class GdaxMarketMaker:
         bid = float(snap.lowest_ask[0])
         spend_avail = balance * self.spend_pct
         size_avail = spend_avail / bid
+        if self.max_slippage is not None:
+            if self.impact is None:
+                self.impact = GdaxImpactEstimator(self.book_feed, max_age=self.interval)
+            size_avail = min(size_avail, self.impact.max_size('buy', self.max_slippage))
         buy_orders = len(self.buy_orders)
         sells_open = len(self.sell_orders)
         if size_avail > 0.01 \
@@ -750,7 +768,7 @@ class GdaxMarketMaker:
                 bid_idx = None
                 for idx, data in enumerate(snap.bids):
                     price, size, o_id = data
-                    if size >= wall_size and idx >= 3:
+                    if wall_size is not None and size >= wall_size and idx >= 3:
                         bid_idx = idx-1
                         break
 
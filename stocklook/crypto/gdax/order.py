@@ -340,7 +340,11 @@ class GdaxOrder:
             data['size'] = size
             self.size = size
 
-        data.pop('client_oid', None)
+        # Lets Gdax.post retry the order safely (see gdax.retry.GdaxRetryPolicy).
+        if self.client_oid:
+            data['client_oid'] = self.client_oid
+        else:
+            data.pop('client_oid', None)
 
         # Convert all values to string
         for key in data.keys():
@@ -606,7 +610,7 @@ class GdaxTrailingStop(Thread):
 
     def __init__(self, pair, size, stop_pct=None, stop_amt=None,
                  target=None, notify=None, interval=10, gdax=None,
-                 product=None):
+                 product=None, impact=None):
         """
         :param pair: (str)
             LTC-USD, BTC-USD, or ETH-USD
@@ -633,6 +637,12 @@ class GdaxTrailingStop(Thread):
             None will generate a default Gdax API object within the GdaxTrailingStop.
             This is used to check account balance and get the current price by default.
 
+        :param impact: (gdax.feeds.impact.GdaxImpactEstimator, default None)
+            Estimates what selling the whole size would fill at against the live book.
+            When given the stop triggers on that expected average fill price
+            rather than the last price, so a thin book stops out sooner
+            instead of slipping past the sell mark.
+
         """
         assert interval >= 5
         fail = all([stop_pct, stop_amt])
@@ -666,6 +676,8 @@ class GdaxTrailingStop(Thread):
         self.price = None
         self.target = target
         self.interval = interval
+        self.impact = impact
+        self.sell_estimate = None
 
     def notify_user(self, update):
         """
@@ -706,6 +718,31 @@ class GdaxTrailingStop(Thread):
         """
         return self.product.price
 
+    def get_fill_estimate(self):
+        """
+        Returns the expected fill of a market sell of GdaxTrailingStop.size
+        against the current book or None without GdaxTrailingStop.impact.
+        :return: (gdax.feeds.impact.GdaxImpact, None)
+        """
+        if self.impact is None:
+            return None
+        return self.impact.estimate('sell', size=self.size)
+
+    def get_expected_price(self, price):
+        """
+        Returns the average price a market sell of the whole
+        size is expected to fill at, or price if that can't be estimated.
+        When the known book is too thin for the whole size the part it
+        can't fill is counted at nothing, so the shortfall pulls the
+        expected price down (below the mark once it matters).
+        """
+        est = self.get_fill_estimate()
+        if est is None:
+            return price
+        if not est.filled:
+            return min(price, est.funds / self.size)
+        return min(price, est.avg_price)
+
     def get_sell_mark(self, price):
         """
         Returns the price at which the currency should be sold
@@ -738,6 +775,11 @@ class GdaxTrailingStop(Thread):
             raise Exception("Existing sell order - "
                             "cannot re-sell: "
                             "{}".format(self.sell_order))
+        est = self.sell_estimate = self.get_fill_estimate()
+        if est is not None:
+            log.info("{} expected to fill @ avg {} (worst {}, {} levels, "
+                     "{:.3%} slippage)".format(self.pair, est.avg_price, est.worst_price,
+                                               est.levels, est.slippage))
         o = GdaxOrder(self.gdax,
                       self.pair,
                       order_type='market',
@@ -784,7 +826,7 @@ class GdaxTrailingStop(Thread):
 
             mark = self.sell_mark
 
-            if price <= mark:
+            if self.get_expected_price(price) <= mark:
                 o = self.sell()
                 break
 
@@ -812,7 +854,8 @@ def execute_trailing_stop(pair,
                           notify=None,
                           buy_needed=True,
                           gdax=None,
-                          stop_obj=None):
+                          stop_obj=None,
+                          impact=None):
     """
     A trailing stop sell order function.
 
@@ -847,6 +890,9 @@ def execute_trailing_stop(pair,
         None will generate a default Gdax API object within the GdaxTrailingStop.
         This is used to check account balance and get the current price by default.
 
+    :param impact: (gdax.feeds.impact.GdaxImpactEstimator, default None)
+        See GdaxTrailingStop.
+
     :return: (GdaxTrailingStop)
         Object will be returned and the actual stop order can be accessed
         via the GdaxTrailingStop.sell_order property.
@@ -861,7 +907,8 @@ def execute_trailing_stop(pair,
                      stop_pct=stop_pct,
                      target=target,
                      notify=notify,
-                     gdax=gdax)
+                     gdax=gdax,
+                     impact=impact)
 
     if gdax is None:
         gdax = order.gdax
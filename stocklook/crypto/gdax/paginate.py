@@ -0,0 +1,200 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pandas import Timestamp
+
+# Record fields holding times rather than ids.
+TIME_KEYS = ('created_at', 'time')
+
+
+def _cursor_value(value, is_time=False):
+    """
+    Ids come back as numeric strings or ints
+    depending on the endpoint so compare them as ints,
+    anything else compares as-is.
+
+    Times (ISO 8601 strings, datetimes, pandas Timestamps or
+    UTC epoch seconds) compare as UTC epoch nanoseconds,
+    naive times being UTC.
+    """
+    if not is_time:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return value
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value * 10 ** 9)
+    if not isinstance(value, (str, datetime)):
+        raise ValueError("Expected a time, not {!r}".format(value))
+    try:
+        ts = Timestamp(value)
+    except ValueError:
+        raise ValueError("Expected a time, not {!r}".format(value))
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC')
+    return ts.value
+
+
+def map_parallel(func, items, max_workers=4):
+    """
+    Calls func(item) for each item on a pool of threads
+    returning the results in the same order as the items.
+
+    The Gdax rate limiter is shared by the threads so this
+    only helps up to the API budget, but each request's network
+    round trip overlaps with the others.
+
+    :param func: (callable)
+    :param items: (iterable)
+    :param max_workers: (int, default 4)
+    :return: (list)
+    """
+    items = list(items)
+    if len(items) <= 1 or max_workers <= 1:
+        return [func(i) for i in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+class GdaxPaginator:
+    """
+    Walks a paginated Gdax endpoint following the cb-after header.
+
+    Iterating yields one page (list) at a time as soon as it arrives
+    while the next page is fetched on a background thread.
+
+    Gdax returns records newest first so an optional since cursor
+    stops paging once a record at or before the cursor is seen,
+    making incremental syncs cheap:
+
+        pages = GdaxPaginator(gdax, 'fills', since=last_trade_id, since_key='trade_id')
+        for page in pages:
+            load(page)
+        last_trade_id = pages.newest
+    """
+    def __init__(self, gdax, url_extension, params=None, since=None,
+                 since_key='id', prefetch=True, max_pages=None):
+        """
+        :param gdax: (gdax.api.Gdax)
+
+        :param url_extension: (str)
+            'orders', 'fills', 'accounts/<id>/ledger', etc.
+
+        :param params: (dict, default None)
+            Query parameters sent with every page request.
+
+        :param since: (int, str, datetime, default None)
+            Stop once a record's since_key value is <= since.
+            Those older records are not returned.
+            Times are parsed so an ISO 8601 string, datetime
+            or pandas.Timestamp can be given for created_at.
+
+        :param since_key: (str, default 'id')
+            The record field compared against since.
+                fills:  trade_id
+                ledger: id
+                orders: created_at
+
+        :param prefetch: (bool, default True)
+            True requests the next page while the current one is processed.
+
+        :param max_pages: (int, default None)
+            Stop after this many pages. None pages until the end.
+        """
+        self.gdax = gdax
+        self.url_extension = url_extension
+        self.params = dict(params or {})
+        self.since_key = since_key
+        self._is_time = since_key in TIME_KEYS
+        self.since = (None if since is None else _cursor_value(since, self._is_time))
+        self.prefetch = prefetch
+        self.max_pages = max_pages
+        self.pages = 0
+        self.records = 0
+        self.newest = None
+
+    def _fetch(self, after=None):
+        params = dict(self.params)
+        if after is not None:
+            params['after'] = after
+        return self.gdax.get(self.url_extension, params=params or None)
+
+    def _trim(self, page):
+        """
+        Returns (page, reached_since) dropping records
+        at or before GdaxPaginator.since.
+        """
+        if self.since is None:
+            return page, False
+
+        k = self.since_key
+        for idx, record in enumerate(page):
+            if _cursor_value(record.get(k), self._is_time) <= self.since:
+                return page[:idx], True
+        return page, False
+
+    def __iter__(self):
+        pool = (ThreadPoolExecutor(max_workers=1) if self.prefetch else None)
+        try:
+            res = self._fetch()
+            while True:
+                page, done = self._trim(list(res.json()))
+                self.pages += 1
+                self.records += len(page)
+
+                if self.newest is None and page:
+                    self.newest = page[0].get(self.since_key)
+
+                after = res.headers.get('cb-after', None)
+                done = done \
+                       or after is None \
+                       or (self.max_pages and self.pages >= self.max_pages)
+
+                if done:
+                    if page:
+                        yield page
+                    break
+
+                if pool is not None:
+                    nxt = pool.submit(self._fetch, after)
+                    yield page
+                    res = nxt.result()
+                else:
+                    yield page
+                    res = self._fetch(after)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    def all(self):
+        """
+        Returns every record from every page in one list.
+        """
+        data = list()
+        for page in self:
+            data.extend(page)
+        return data
@@ -0,0 +1,204 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import json
+import random
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from threading import Lock
+from requests import exceptions as req_exc
+
+# Responses worth another attempt: rate limited or the exchange is struggling.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Errors raised before a response was received.
+RETRY_EXCEPTIONS = (req_exc.ConnectionError, req_exc.Timeout, req_exc.ChunkedEncodingError,
+                    ConnectionError, TimeoutError)
+try:
+    # Raised by gdax.aio.AsyncGdax
+    import asyncio
+    import aiohttp
+    RETRY_EXCEPTIONS += (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                         asyncio.TimeoutError)
+except ImportError:
+    pass
+
+# Methods that can be repeated without side effects.
+IDEMPOTENT_METHODS = ('get', 'delete', 'head', 'options')
+
+
+def get_retry_after(headers):
+    """
+    Returns the seconds requested by a Retry-After header
+    (delay-seconds or an HTTP date) or None.
+    :param headers: (dict, default None)
+    :return: (float, None)
+    """
+    if not headers:
+        return None
+    value = headers.get('Retry-After', None)
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def has_client_oid(body):
+    """
+    Returns True if a request body (dict or JSON string)
+    contains a client_oid.
+    """
+    if isinstance(body, bytes):
+        body = body.decode('utf8')
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            return False
+    return isinstance(body, dict) and bool(body.get('client_oid', None))
+
+
+class GdaxRetryPolicy:
+    """
+    Decides whether a failed Gdax API request is retried
+    and how long to wait before the next attempt.
+
+    - Network errors (see RETRY_EXCEPTIONS) and
+      429/5xx responses (see RETRY_STATUSES) are retried.
+    - Waits grow exponentially (backoff * 2 ** (attempt - 1)) up to max_backoff
+      with "full jitter" so clients don't retry in lockstep.
+    - A Retry-After header overrides the computed wait
+      (still capped at max_backoff).
+    - POST requests are only retried when their body has a client_oid,
+      which lets the exchange reject duplicates of an order
+      that was received before the connection failed.
+
+    One policy may be shared between threads and
+    counts retries for gdax.retry.GdaxRetryPolicy.get_stats().
+    """
+    def __init__(self, max_attempts=4, backoff=0.5, max_backoff=30.0, jitter=True,
+                 statuses=RETRY_STATUSES, exceptions=RETRY_EXCEPTIONS):
+        """
+        :param max_attempts: (int, default 4)
+            The total number of attempts including the first.
+            1 disables retrying.
+        :param backoff: (float, default 0.5)
+            Seconds to wait before the first retry.
+        :param max_backoff: (float, default 30.0)
+            The most seconds to wait between attempts.
+        :param jitter: (bool, default True)
+            True waits a random time between 0 and the backoff.
+        :param statuses: (tuple, default gdax.retry.RETRY_STATUSES)
+        :param exceptions: (tuple, default gdax.retry.RETRY_EXCEPTIONS)
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = statuses
+        self.exceptions = exceptions
+        self._lock = Lock()
+        self.retries = 0
+        self.give_ups = 0
+        self.reasons = dict()           # status_code or exception name: retries
+
+    def is_safe(self, method, body=None):
+        """
+        Returns True if repeating the request can't
+        duplicate its side effects.
+        """
+        method = method.lower()
+        return method in IDEMPOTENT_METHODS \
+            or (method == 'post' and has_client_oid(body))
+
+    def should_retry(self, attempt, method, body=None, status=None, error=None):
+        """
+        :param attempt: (int) The attempt that just failed (starting at 1).
+        :param method: (str)
+        :param body: (dict, str, default None)
+            The request body; checked for a client_oid on POST.
+        :param status: (int, default None)
+            The response status code.
+        :param error: (Exception, default None)
+            The exception raised before a response was received.
+        :return: (bool)
+        """
+        if error is not None:
+            retryable = isinstance(error, self.exceptions)
+            reason = type(error).__name__
+        else:
+            retryable = status in self.statuses
+            reason = status
+
+        if not retryable or not self.is_safe(method, body):
+            return False
+
+        with self._lock:
+            if attempt >= self.max_attempts:
+                self.give_ups += 1
+                return False
+            self.retries += 1
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        return True
+
+    def get_delay(self, attempt, headers=None):
+        """
+        Returns the seconds to wait before the next attempt.
+        :param attempt: (int) The attempt that just failed (starting at 1).
+        :param headers: (dict, default None)
+            Response headers checked for Retry-After.
+        :return: (float)
+        """
+        retry_after = get_retry_after(headers)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def get_stats(self):
+        with self._lock:
+            return dict(retries=self.retries,
+                        give_ups=self.give_ups,
+                        reasons=dict(self.reasons))
+
+    def reset_stats(self):
+        with self._lock:
+            self.retries = 0
+            self.give_ups = 0
+            self.reasons.clear()
+
+
+# Shared by every Gdax object unless one is given.
+GDAX_RETRY_POLICY = GdaxRetryPolicy()
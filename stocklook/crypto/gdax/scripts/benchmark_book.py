@@ -0,0 +1,209 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import sys
+import tracemalloc
+from time import perf_counter, sleep
+from bintrees import RBTree
+from stocklook.crypto.gdax.feeds.book_feed import GdaxBookFeed
+from stocklook.crypto.gdax.local_exchange import SyntheticMarket
+from stocklook.crypto.gdax.tests.helpers import SnapshotClient, make_snapshot
+
+
+class ListScanBookFeed(GdaxBookFeed):
+    """
+    The baseline: GdaxBookFeed as it was before orders were indexed by id.
+    Each price level is a list of order dicts that remove, match and
+    change scan (and rebuild) to find an order.
+    """
+    def _build(self, res):
+        asks = RBTree()
+        bids = RBTree()
+        for key, side, tree in (('bids', 'buy', bids), ('asks', 'sell', asks)):
+            for price, size, order_id in res[key]:
+                price = float(price)
+                level = tree.get(price)
+                if level is None:
+                    level = list()
+                    tree.insert(price, level)
+                level.append({'id': order_id, 'side': side,
+                              'price': price, 'size': float(size)})
+        return asks, bids, dict()
+
+    def add(self, order):
+        order = {
+            'id': order.get('order_id') or order['id'],
+            'side': order['side'],
+            'price': float(order['price']),
+            'size': float(order.get('size') or order['remaining_size'])
+        }
+        if order['side'] == 'buy':
+            bids = self.get_bids(order['price'])
+            if bids is None:
+                bids = [order]
+            else:
+                bids.append(order)
+            self.set_bids(order['price'], bids)
+        else:
+            asks = self.get_asks(order['price'])
+            if asks is None:
+                asks = [order]
+            else:
+                asks.append(order)
+            self.set_asks(order['price'], asks)
+
+    def remove(self, order):
+        price = float(order['price'])
+        if order['side'] == 'buy':
+            bids = self.get_bids(price)
+            if bids is not None:
+                bids = [o for o in bids if o['id'] != order['order_id']]
+                if len(bids) > 0:
+                    self.set_bids(price, bids)
+                else:
+                    self.remove_bids(price)
+        else:
+            asks = self.get_asks(price)
+            if asks is not None:
+                asks = [o for o in asks if o['id'] != order['order_id']]
+                if len(asks) > 0:
+                    self.set_asks(price, asks)
+                else:
+                    self.remove_asks(price)
+
+    def match(self, order):
+        size = float(order['size'])
+        price = float(order['price'])
+
+        if order['side'] == 'buy':
+            bids = self.get_bids(price)
+            if not bids:
+                return
+            assert bids[0]['id'] == order['maker_order_id']
+            if bids[0]['size'] == size:
+                self.set_bids(price, bids[1:])
+            else:
+                bids[0]['size'] -= size
+                self.set_bids(price, bids)
+        else:
+            asks = self.get_asks(price)
+            if not asks:
+                return
+            assert asks[0]['id'] == order['maker_order_id']
+            if asks[0]['size'] == size:
+                self.set_asks(price, asks[1:])
+            else:
+                asks[0]['size'] -= size
+                self.set_asks(price, asks)
+
+    def change(self, order):
+        try:
+            new_size = float(order['new_size'])
+        except KeyError:
+            return
+
+        price = float(order['price'])
+        orders = (self.get_bids(price) if order['side'] == 'buy' else self.get_asks(price))
+        if orders is None or not any(o['id'] == order['order_id'] for o in orders):
+            return
+        index = [o['id'] for o in orders].index(order['order_id'])
+        orders[index]['size'] = new_size
+
+
+def generate_session(count=200000, depth=5, max_orders=3000, seed=1):
+    """
+    Returns (snapshot, messages) from a SyntheticMarket
+    whose book is first filled to max_orders.
+    With the defaults busy levels hold a few hundred orders.
+    """
+    market = SyntheticMarket('BTC-USD', depth=depth, max_orders=max_orders, seed=seed)
+    while len(market.orders) < max_orders:
+        market.step()
+    snapshot = market.get_book(level=3)
+    messages = list()
+    while len(messages) < count:
+        messages.extend(m for m in market.step() if m['type'] != 'ticker')
+    return snapshot, messages[:count]
+
+
+def benchmark_book(snapshot, messages, feed_class=GdaxBookFeed, **kwargs):
+    """
+    Applies messages to a GdaxBookFeed loaded with the snapshot.
+    :param feed_class: (type, default GdaxBookFeed) ListScanBookFeed for the baseline.
+    :param kwargs: GdaxBookFeed(**kwargs)
+    :return: (float) messages per second.
+    """
+    feed = feed_class('BTC-USD', gdax=SnapshotClient(snapshot), auth=False, **kwargs)
+    feed.on_message(messages[0])
+    while getattr(feed, 'state', 'live') != 'live':
+        sleep(0.01)
+
+    on_message = feed.on_message
+    t = perf_counter()
+    for msg in messages[1:]:
+        on_message(msg)
+    return (len(messages) - 1) / (perf_counter() - t)
+
+
+def measure_load(snapshot, feed_class=GdaxBookFeed, **kwargs):
+    """
+    Loads a snapshot into a GdaxBookFeed.
+    :param feed_class: (type, default GdaxBookFeed) ListScanBookFeed for the baseline.
+    :param kwargs: GdaxBookFeed(**kwargs)
+    :return: (tuple) seconds taken, bytes held by the book.
+    """
+    feed = feed_class('BTC-USD', gdax=SnapshotClient(snapshot), auth=False, **kwargs)
+    t = perf_counter()
+    feed._load(snapshot)
+    elapsed = perf_counter() - t
+
+    tracemalloc.start()
+    feed._load(snapshot)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, size
+
+
+if __name__ == '__main__':
+    """
+    python -m stocklook.crypto.gdax.scripts.benchmark_book [messages] [max_orders] [depth]
+    """
+    count = (int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
+    max_orders = (int(sys.argv[2]) if len(sys.argv) > 2 else 3000)
+    depth = (int(sys.argv[3]) if len(sys.argv) > 3 else 5)
+    snapshot, messages = generate_session(count, depth=depth, max_orders=max_orders)
+    print("{:,} messages, {:,} resting orders".format(
+        len(messages), len(snapshot['bids']) + len(snapshot['asks'])))
+    print("{:<8} {:>10,.0f} msgs/sec".format(
+        'list', benchmark_book(snapshot, messages, feed_class=ListScanBookFeed)))
+    for backend in ('rbtree', 'array'):
+        print("{:<8} {:>10,.0f} msgs/sec".format(
+            backend, benchmark_book(snapshot, messages, backend=backend)))
+
+    snapshot = make_snapshot()
+    print("Loading a {:,} order snapshot".format(len(snapshot['bids']) + len(snapshot['asks'])))
+    runs = [('list', dict(feed_class=ListScanBookFeed))]
+    runs.extend((backend, dict(backend=backend)) for backend in ('rbtree', 'array'))
+    for backend, kwargs in runs:
+        elapsed, size = measure_load(snapshot, **kwargs)
+        print("{:<8} {:>6.2f}s {:>8.1f} MB".format(backend, elapsed, size / 2 ** 20))
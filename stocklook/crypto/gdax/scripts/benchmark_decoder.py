@@ -0,0 +1,86 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import gzip
+import json
+import sys
+from time import perf_counter
+from stocklook.crypto.gdax.feeds.book_feed import GdaxBookFeed
+from stocklook.crypto.gdax.feeds.decoder import GdaxMessageDecoder, JSON_BACKENDS, FULL, SUBSET
+from stocklook.crypto.gdax.local_exchange import SyntheticMarket
+
+
+def generate_frames(count=100000, product_id='BTC-USD', seed=1):
+    """
+    Returns compact full channel frames like the ones
+    sent by the exchange.
+    """
+    market = SyntheticMarket(product_id, seed=seed)
+    frames = list()
+    while len(frames) < count:
+        for msg in market.step():
+            if msg['type'] != 'ticker':
+                frames.append(json.dumps(msg, separators=(',', ':')))
+    return frames[:count]
+
+
+def read_frames(path):
+    """
+    Reads recorded frames (one per line, optionally gzipped).
+    """
+    opener = (gzip.open if path.endswith('.gz') else open)
+    with opener(path, 'rt') as fh:
+        return [line.strip() for line in fh if line.strip()]
+
+
+def benchmark_decoder(frames, fields=GdaxBookFeed.DECODE_FIELDS):
+    """
+    Times every installed backend with and without the
+    subset strategy.
+    :return: (list) of (backend, strategy, messages per second)
+    """
+    results = list()
+    for backend in JSON_BACKENDS:
+        for strategy in (FULL, SUBSET):
+            try:
+                decoder = GdaxMessageDecoder(backend=backend, fields=fields, strategy=strategy)
+            except ImportError:
+                continue
+            decode = decoder.decode
+            t = perf_counter()
+            for frame in frames:
+                decode(frame)
+            elapsed = perf_counter() - t
+            results.append((backend, strategy, len(frames) / elapsed))
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        frames = read_frames(sys.argv[1])
+    else:
+        frames = generate_frames()
+
+    print("{} frames".format(len(frames)))
+    for backend, strategy, rate in benchmark_decoder(frames):
+        print("{:<8} {:<8} {:>12,.0f} msgs/sec".format(backend, strategy, rate))
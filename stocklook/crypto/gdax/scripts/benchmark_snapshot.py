@@ -0,0 +1,126 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import sys
+from time import perf_counter
+from stocklook.crypto.gdax.tests.helpers import make_snapshot, get_book_snapshot
+
+
+# The BookSnapshot methods as they were before the NumPy arrays,
+# kept to compare results and timings against.
+
+def list_bid_depth(bids, to_price):
+    depth = 0
+    for price, size, _ in bids:
+        if price < to_price:
+            break
+        depth += size
+    return depth
+
+
+def list_ask_depth(asks, to_price):
+    depth = 0
+    for price, size, _ in asks:
+        if price > to_price:
+            break
+        depth += size
+    return depth
+
+
+def list_walls(bids, asks, size, within_percent=0.01):
+    best_bid, best_ask = bids[0][0], asks[0][0]
+    bid_walls = [b for b in bids
+                 if b[0] >= best_bid - best_bid * within_percent and b[1] >= size]
+    ask_walls = [a for a in asks
+                 if a[0] <= best_ask + best_ask * within_percent and a[1] >= size]
+    return bid_walls, ask_walls
+
+
+def list_wall_size(bids, asks, min_size=20, within_percent=0.01, measure_size=7):
+    bid_walls, ask_walls = list_walls(bids, asks, min_size, within_percent)
+    walls = sorted(bid_walls + ask_walls, key=lambda w: w[1], reverse=True)[-measure_size:]
+    return sum(w[1] for w in walls) / len(walls)
+
+
+def list_vwap(rows, size):
+    filled = notional = 0
+    for price, qty, _ in rows:
+        take = min(qty, size - filled)
+        filled += take
+        notional += take * price
+        if filled >= size:
+            return notional / size
+    return None
+
+
+def timeit(func, *args, repeat=20):
+    t = perf_counter()
+    for _ in range(repeat):
+        res = func(*args)
+    return (perf_counter() - t) / repeat, res
+
+
+def benchmark_snapshot(snap, repeat=20):
+    """
+    Times the list-based calculations against BookSnapshot's.
+    :return: (list) (name, list seconds, numpy seconds) per calculation.
+    """
+    bids, asks = snap.bids, snap.asks
+    bid, ask = bids[0][0], asks[0][0]
+    low, high = bid * 0.98, ask * 1.02
+    wall = sorted(b[1] for b in bids)[-len(bids) // 20]
+    size = sum(a[1] for a in asks) / 4
+
+    t = perf_counter()
+    snap._get_sides()
+    build = perf_counter() - t
+
+    cases = [
+        ('bid depth', (list_bid_depth, bids, low), (snap.calculate_bid_depth, low)),
+        ('ask depth', (list_ask_depth, asks, high), (snap.calculate_ask_depth, high)),
+        ('walls', (list_walls, bids, asks, wall), (snap.get_walls, wall)),
+        ('wall size', (list_wall_size, bids, asks, wall), (snap.calculate_wall_size, None, wall)),
+        ('vwap', (list_vwap, asks, size), (snap.get_vwap, 'buy', size)),
+    ]
+    results = [('build arrays', None, build)]
+    for name, old, new in cases:
+        old_t, old_res = timeit(*old, repeat=repeat)
+        new_t, new_res = timeit(*new, repeat=repeat)
+        assert str(old_res) == str(new_res) or abs(old_res - new_res) < 1e-6, name
+        results.append((name, old_t, new_t))
+    return results
+
+
+if __name__ == '__main__':
+    """
+    python -m stocklook.crypto.gdax.scripts.benchmark_snapshot [orders]
+    """
+    orders = (int(sys.argv[1]) if len(sys.argv) > 1 else 300000)
+    snap = get_book_snapshot(make_snapshot(orders))
+    print("{:,} bids, {:,} asks".format(len(snap.bids), len(snap.asks)))
+    for name, old_t, new_t in benchmark_snapshot(snap):
+        if old_t is None:
+            print("{:<12} {:>10} {:>9.3f}ms".format(name, '', new_t * 1000))
+        else:
+            print("{:<12} {:>9.3f}ms {:>9.3f}ms {:>7.1f}x".format(
+                name, old_t * 1000, new_t * 1000, old_t / new_t))
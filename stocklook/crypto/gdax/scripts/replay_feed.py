@@ -0,0 +1,73 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import sys
+import json
+from tempfile import mkdtemp
+from time import time
+from stocklook.crypto.gdax.feeds.recorder import GdaxFeedRecorder, GdaxFeedReader, GdaxFeedReplay
+from stocklook.crypto.gdax.feeds.websocket_client import GdaxWebsocketClient
+from stocklook.crypto.gdax.local_exchange import SyntheticMarket
+
+
+class CountingFeed(GdaxWebsocketClient):
+    def __init__(self):
+        super(CountingFeed, self).__init__()
+        self.types = dict()
+
+    def on_message(self, msg):
+        t = msg['type']
+        self.types[t] = self.types.get(t, 0) + 1
+
+
+def record_synthetic(directory, count=500000, products=('BTC-USD', 'ETH-USD'), rate=1000):
+    """
+    Records frames from SyntheticMarkets as if received at rate messages/sec.
+    """
+    markets = [SyntheticMarket(p, seed=i) for i, p in enumerate(products)]
+    t = time() - count / rate
+    with GdaxFeedRecorder(directory) as recorder:
+        for i in range(count):
+            for msg in markets[i % len(markets)].step():
+                t += 1 / rate
+                recorder.write(json.dumps(msg, separators=(',', ':')), msg, received=t)
+    return directory
+
+
+if __name__ == '__main__':
+    """
+    python -m stocklook.crypto.gdax.scripts.replay_feed [directory] [speed]
+
+    Replays a GdaxFeedRecorder directory (or freshly recorded synthetic frames)
+    into a feed and prints the replay rate. Speed defaults to as fast as possible.
+    """
+    directory = (sys.argv[1] if len(sys.argv) > 1 else record_synthetic(mkdtemp()))
+    speed = (float(sys.argv[2]) if len(sys.argv) > 2 else None)
+
+    feed = CountingFeed()
+    replay = GdaxFeedReplay(GdaxFeedReader(directory), feed, speed=speed)
+    replay.run()
+    stats = replay.get_stats()
+    print("Replayed {:,} frames in {:.2f}s: {:,.0f} msgs/min".format(
+        stats['count'], stats['elapsed'], stats['rate'] * 60))
+    print(feed.types)
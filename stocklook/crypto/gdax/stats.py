@@ -0,0 +1,177 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from bisect import bisect_left
+from threading import Lock
+
+# Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf')]
+
+
+class LatencyHistogram:
+    """
+    Counts durations into fixed buckets (see LATENCY_BUCKETS).
+    """
+    __slots__ = ['counts', 'count', 'total', 'max']
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, pct):
+        """
+        Returns the upper bound of the bucket containing
+        the given percentile (0-100).
+        """
+        if not self.count:
+            return 0.0
+        target = self.count * pct / 100.0
+        seen = 0
+        for bound, c in zip(LATENCY_BUCKETS, self.counts):
+            seen += c
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def get_stats(self):
+        return dict(count=self.count,
+                    total=round(self.total, 6),
+                    mean=round(self.total / self.count, 6) if self.count else 0.0,
+                    max=round(self.max, 6),
+                    p50=self.percentile(50),
+                    p90=self.percentile(90),
+                    p99=self.percentile(99),
+                    buckets={str(b): c for b, c in zip(LATENCY_BUCKETS, self.counts) if c})
+
+
+class EndpointStats:
+    """
+    Counters for one method + endpoint template.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.statuses = dict()          # status_code: count
+        self.wait = LatencyHistogram()  # Time spent waiting on the rate limiter
+        self.flight = LatencyHistogram()  # Time from sending the request to receiving the response
+        self.decode = LatencyHistogram()  # Time spent in Response.json()
+
+    def get_stats(self):
+        return dict(calls=self.calls,
+                    errors=self.errors,
+                    retries=self.retries,
+                    statuses=dict(self.statuses),
+                    wait=self.wait.get_stats(),
+                    flight=self.flight.get_stats(),
+                    decode=self.decode.get_stats())
+
+
+class GdaxAPIStats:
+    """
+    Per-endpoint instrumentation for gdax.api.gdax_call_api.
+
+    Disabled by default; while disabled, recording costs a single
+    attribute check per request.
+
+        gdax.stats.enable()
+        ...
+        print(gdax.stats.snapshot()['GET products/{}/book'])
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._endpoints = dict()
+        self._lock = Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def _get(self, method, template):
+        key = '{} {}'.format(method.upper(), template)
+        try:
+            return self._endpoints[key]
+        except KeyError:
+            e = EndpointStats()
+            self._endpoints[key] = e
+            return e
+
+    def record(self, method, template, wait, flight, status=None, error=None):
+        """
+        Records one request.
+
+        :param method: (str)
+        :param template: (str) see gdax.api.get_endpoint_template
+        :param wait: (float) Seconds waited on the rate limiter.
+        :param flight: (float) Seconds in flight.
+        :param status: (int, default None) The HTTP status code.
+        :param error: (Exception, default None)
+            An exception raised before a response was received.
+        :return: None
+        """
+        with self._lock:
+            e = self._get(method, template)
+            e.calls += 1
+            e.wait.add(wait)
+            e.flight.add(flight)
+            if error is not None:
+                e.errors += 1
+                status = type(error).__name__
+            elif status != 200:
+                e.errors += 1
+            e.statuses[status] = e.statuses.get(status, 0) + 1
+
+    def record_retry(self, method, template):
+        with self._lock:
+            self._get(method, template).retries += 1
+
+    def record_decode(self, method, template, seconds):
+        with self._lock:
+            self._get(method, template).decode.add(seconds)
+
+    def snapshot(self):
+        """
+        Returns a dictionary of {'METHOD template': EndpointStats.get_stats()}
+        """
+        with self._lock:
+            return {k: e.get_stats() for k, e in self._endpoints.items()}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+# Shared by every Gdax object unless one is given.
+GDAX_API_STATS = GdaxAPIStats()
@@ -0,0 +1,19 @@
+"""
+Fixtures shared by the gdax tests.
+"""
+import pytest
+from stocklook.crypto.gdax.local_exchange import GdaxLocalExchange
+from stocklook.crypto.gdax.feeds import GdaxFeedEngine
+
+
+@pytest.fixture
+def exchange():
+    with GdaxLocalExchange(products=['ETH-USD', 'LTC-USD'], rate=200, seed=2, check_auth=True) as ex:
+        yield ex
+
+
+@pytest.fixture
+def engine():
+    e = GdaxFeedEngine(backoff=0.05).start()
+    yield e
+    e.stop()
@@ -0,0 +1,137 @@
+"""
+Helpers and test doubles shared by the gdax tests
+and the benchmark scripts.
+"""
+import random
+import uuid
+from time import sleep, time
+from stocklook.crypto.gdax.api import Gdax, MAX_CANDLES
+from stocklook.crypto.gdax.feeds import GdaxWebsocketClient
+from stocklook.utils.timetools import timestamp_to_utc_int
+def wait_for(condition, timeout=10):
+    end = time() + timeout
+    while time() < end:
+        if condition():
+            return True
+        sleep(0.02)
+    return False
+
+
+def book_orders(book):
+    """
+    Returns a level 3 book's order ids: asks in book order, bids sorted.
+    """
+    return [o[2] for o in book['asks']], sorted(o[2] for o in book['bids'])
+
+
+class FakeResponse:
+    """
+    Stands in for a requests.Response.
+    """
+    def __init__(self, data=None, status_code=200, headers=None, url=''):
+        self._data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.url = url
+
+    def json(self):
+        return ({} if self._data is None else self._data)
+
+
+class CandleGdax(Gdax):
+    """
+    Serves one candle per granularity like the API does
+    (newest first, inclusive of start and end,
+    at most 300 per request).
+    """
+    def __init__(self):
+        super(CandleGdax, self).__init__('key', 'c2VjcmV0', 'phrase', response_cache=False)
+        self.requests = list()
+
+    def get(self, url_extension, **kwargs):
+        p = kwargs['params']
+        self.requests.append(p)
+        start = timestamp_to_utc_int(p['start'])
+        end = timestamp_to_utc_int(p['end'])
+        g = p['granularity']
+        rows = [[t, t - 1, t + 1, t, t, 1.0]
+                for t in range(start - start % g, end + 1, g)
+                if t >= start]
+        assert len(rows) <= MAX_CANDLES
+        return FakeResponse(rows[::-1])
+
+
+class CollectingFeed(GdaxWebsocketClient):
+    def __init__(self, **kwargs):
+        super(CollectingFeed, self).__init__(**kwargs)
+        self.messages = list()
+        self.opened = 0
+        self.closed = 0
+
+    def on_open(self):
+        self.opened += 1
+
+    def on_close(self):
+        self.closed += 1
+
+    def on_message(self, msg):
+        self.messages.append(msg)
+
+
+class SnapshotClient:
+    """
+    Stands in for gdax.api.Gdax, returning one level 3 snapshot.
+    """
+    api_key = api_secret = api_passphrase = ''
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def get_book(self, product_id, level=3, cache=True):
+        return self.snapshot
+
+
+class MarketClient:
+    """
+    Stands in for gdax.api.Gdax, returning the current book
+    of a gdax.local_exchange.SyntheticMarket at any level.
+    """
+    api_key = api_secret = api_passphrase = ''
+
+    def __init__(self, market):
+        self.market = market
+
+    def get_book(self, product_id, level=2, cache=True):
+        return self.market.get_book(level=level)
+
+
+def make_snapshot(orders=300000, levels=20000, seed=1):
+    """
+    Returns a level 3 snapshot the size of a busy BTC-USD book.
+    """
+    r = random.Random(seed)
+    mid = 1000000
+    book = {'sequence': 1, 'bids': [], 'asks': []}
+    for i in range(orders):
+        side = ('bids' if i % 2 else 'asks')
+        offset = int(r.expovariate(1.0 / (levels / 8))) % (levels // 2) + 1
+        ticks = (mid - offset if side == 'bids' else mid + offset)
+        book[side].append(['{:.2f}'.format(ticks / 100), '{:.8f}'.format(r.uniform(0.001, 5)),
+                           str(uuid.UUID(int=r.getrandbits(128), version=4))])
+    # Sorted by price like the exchange's snapshots.
+    book['bids'].sort(key=lambda row: -float(row[0]))
+    book['asks'].sort(key=lambda row: float(row[0]))
+    return book
+
+
+def get_book_snapshot(snapshot):
+    """
+    Returns a gdax.feeds.book_feed.BookSnapshot of a GdaxBookFeed loaded
+    with a level 3 snapshot, built the way GdaxMarketMaker builds it.
+    """
+    from stocklook.crypto.gdax.feeds.book_feed import GdaxBookFeed, BookSnapshot
+    feed = GdaxBookFeed('BTC-USD', gdax=SnapshotClient(snapshot), auth=False)
+    feed._load(snapshot)
+    book = feed.get_current_book()
+    book['bids'].reverse()
+    return BookSnapshot(book, feed)
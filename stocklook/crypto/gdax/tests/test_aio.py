@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from time import perf_counter
+from pandas import Timestamp
+from stocklook.utils.ratelimit import RateLimiter
+from stocklook.crypto.gdax.aio import AsyncGdax
+from stocklook.crypto.gdax.api import GdaxAPIError
+from stocklook.crypto.gdax.retry import GdaxRetryPolicy
+from stocklook.crypto.gdax.stats import GdaxAPIStats
+
+
+def run(gdax, coro_func, **kwargs):
+    async def main():
+        async with AsyncGdax(gdax=gdax, **kwargs) as g:
+            return await coro_func(g)
+    return asyncio.run(main())
+
+
+def test_signed_requests(exchange):
+    order = {'product_id': 'ETH-USD', 'side': 'buy', 'type': 'limit', 'price': '100.00', 'size': '1'}
+
+    async def post_and_get(g):
+        posted = await g.post_order(order)
+        return posted, await g.get_orders(posted['id'])
+
+    posted, fetched = run(exchange.get_gdax(), post_and_get)
+    assert fetched['id'] == posted['id']
+    assert exchange.signed_requests == 2
+
+    with pytest.raises(GdaxAPIError, match='401'):
+        run(exchange.get_gdax(secret='YmFk'), lambda g: g.get_accounts())
+
+
+def test_paginated_calls(exchange):
+    gdax = exchange.get_gdax()
+    for _ in range(150):
+        gdax.post_order({'product_id': 'LTC-USD', 'side': 'sell', 'type': 'limit',
+                         'price': '90.00', 'size': '1'})
+    account_id = next(iter(exchange.accounts))
+
+    async def fetch(g):
+        return await asyncio.gather(g.get_orders(), g.get_orders(paginate=False),
+                                    g.get_account_history(account_id))
+
+    stats = GdaxAPIStats(enabled=True)
+    orders, first_page, ledger = run(gdax, fetch, stats=stats)
+    assert len(orders) == 150 and len(first_page) == 100
+    assert len({o['id'] for o in orders}) == 150
+    assert len(ledger) == 250
+    assert stats.snapshot()['GET orders']['calls'] == 3
+
+
+def test_retries_429_and_5xx(exchange):
+    exchange.inject_errors(429, count=1, path='ticker', retry_after=0)
+    exchange.inject_errors(503, count=1, path='ticker')
+    policy = GdaxRetryPolicy(backoff=0)
+    stats = GdaxAPIStats(enabled=True)
+    ticker = run(exchange.get_gdax(), lambda g: g.get_ticker('ETH-USD'),
+                 retry_policy=policy, stats=stats)
+    assert float(ticker['price']) > 0
+    assert policy.get_stats()['reasons'] == {429: 1, 503: 1}
+    recorded = stats.snapshot()['GET products/{}/ticker']
+    assert recorded['retries'] == 2 and recorded['statuses'] == {429: 1, 503: 1, 200: 1}
+
+    # Orders without a client_oid are never repeated.
+    exchange.inject_errors(503, count=1, path='orders')
+    with pytest.raises(GdaxAPIError, match='503'):
+        run(exchange.get_gdax(), lambda g: g.post_order({'product_id': 'ETH-USD', 'side': 'buy',
+                                                         'price': '1.00', 'size': '1'}),
+            retry_policy=policy)
+
+
+def test_rate_limiter_throttles(exchange):
+    limiter = RateLimiter({'public': (20, 1)}, default='public')
+
+    async def tickers(g):
+        return await asyncio.gather(*[g.get_ticker('ETH-USD') for _ in range(6)])
+
+    t = perf_counter()
+    assert len(run(exchange.get_gdax(), tickers, rate_limiter=limiter)) == 6
+    # One token up front, then one every 50ms.
+    assert perf_counter() - t >= 0.24
+    stats = limiter.get_stats()['public']
+    assert stats['calls'] == 6 and stats['waits'] == 5
+
+
+def test_candles_are_windowed(exchange):
+    gdax = exchange.get_gdax()
+    start, end = Timestamp('2017-10-01'), Timestamp('2017-10-01 16:00:00')
+    before = exchange.requests
+    res = run(gdax, lambda g: g.get_candles('ETH-USD', start, end, granularity=60))
+
+    # 961 minutes needs 4 requests of 300.
+    assert exchange.requests - before == 4
+    assert len(res) == 16 * 60 + 1
+    assert res == gdax.get_candles('ETH-USD', start, end, granularity=60)
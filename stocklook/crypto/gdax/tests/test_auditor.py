@@ -0,0 +1,74 @@
+import pytest
+from stocklook.crypto.gdax.feeds import GdaxBookFeed, GdaxBookAuditor
+from stocklook.crypto.gdax.feeds.auditor import compare_levels
+from stocklook.crypto.gdax.feeds.book_feed import BOOK_LIVE
+from stocklook.crypto.gdax.local_exchange import SyntheticMarket
+from stocklook.crypto.gdax.tests.helpers import MarketClient, wait_for
+
+
+def feed_steps(feed, market, steps):
+    for _ in range(steps):
+        for msg in market.step():
+            feed.on_message(msg)
+
+
+def test_compare_levels():
+    remote = [['101', '2', 1], ['100', '1', 1], ['99', '3', 2]]
+    res = compare_levels('buy', remote, [(101.0, 2.0), (100.5, 1.0), (99.0, 2.5), (98.0, 7.0)])
+    assert res == dict(levels=3, missing=1, extra=1, changed=1, size=6.0, size_diff=2.5)
+
+
+@pytest.mark.parametrize('top_n', [None, 50])
+def test_auditor_resyncs_a_drifted_book(top_n):
+    market = SyntheticMarket('BTC-USD', seed=3)
+    feed = GdaxBookFeed('BTC-USD', gdax=MarketClient(market), auth=False, top_n=top_n)
+    feed_steps(feed, market, 20)
+    assert wait_for(lambda: feed.state == BOOK_LIVE)
+    feed_steps(feed, market, 20)
+
+    auditor = GdaxBookAuditor(feed, sequence_tolerance=0, max_drift=0.05)
+    assert auditor.audit(feed)['drift'] == 0
+
+    # Corrupt the best bid's size without a message.
+    price, level = feed._bids.nlargest(1)[0]
+    level.resize(next(iter(level.orders)), level.size + 1000)
+    if top_n:
+        feed._touch('buy', level)
+        feed.view.version += 2
+    assert auditor.audit(feed)['drift'] > 0.05
+    assert feed.resyncs == 1
+    assert auditor.audit(feed)['drift'] > 0.05
+    assert wait_for(lambda: feed.resyncs == 2)
+    assert auditor.audit(feed)['drift'] == 0
+
+    # Too far apart to compare.
+    market.step()
+    assert auditor.audit(feed) is None
+
+    stats = auditor.get_stats()['BTC-USD']
+    assert (stats['audits'], stats['skipped'], stats['mismatches'], stats['resyncs']) == (4, 1, 2, 1)
+    assert stats['sequence_lag'] < 0 and stats['missed_matches'] == 0
+
+
+def test_auditor_bypasses_the_response_cache(exchange, engine):
+    gdax = exchange.get_gdax()
+    feed = GdaxBookFeed('ETH-USD', gdax=gdax, auth=False)
+    feed.url = exchange.ws_url
+    engine.add(feed)
+    assert wait_for(lambda: feed.state == BOOK_LIVE)
+    exchange.rate = 0
+    market = exchange.markets['ETH-USD']
+    assert wait_for(lambda: feed._sequence == market.sequence)
+
+    # Other callers share a cached level 2 book...
+    requests = exchange.requests
+    gdax.get_book('ETH-USD', level=2)
+    gdax.get_book('ETH-USD', level=2)
+    assert exchange.requests == requests + 1
+
+    # ...but every audit fetches its own.
+    auditor = GdaxBookAuditor(feed, sequence_tolerance=0)
+    assert auditor.audit(feed)['drift'] == 0
+    assert auditor.audit(feed)['drift'] == 0
+    assert exchange.requests == requests + 3
+    assert auditor.get_stats()['ETH-USD']['skipped'] == 0
@@ -0,0 +1,224 @@
+import pytest
+import warnings
+import numpy as np
+from threading import Thread, Event
+from time import sleep, perf_counter
+from stocklook.crypto.gdax.feeds import GdaxFeedHub, GdaxBookFeed
+from stocklook.crypto.gdax.feeds.book_feed import BOOK_LIVE, GdaxPriceArray, GdaxPriceLevel
+from stocklook.crypto.gdax.local_exchange import SyntheticMarket
+from stocklook.crypto.gdax.tests.helpers import SnapshotClient, make_snapshot, get_book_snapshot, wait_for, book_orders
+
+
+def test_gap_resyncs_one_product_without_reconnecting(exchange, engine):
+    gdax = exchange.get_gdax()
+    get_book = gdax.get_book
+
+    def slow_get_book(*args, **kwargs):
+        # Messages keep arriving while the snapshot is fetched.
+        sleep(0.3)
+        return get_book(*args, **kwargs)
+    gdax.get_book = slow_get_book
+
+    hub = GdaxFeedHub(url=exchange.ws_url, products=['ETH-USD', 'LTC-USD'], channels=['full'])
+    eth = GdaxBookFeed('ETH-USD', gdax=gdax, auth=False)
+    ltc = GdaxBookFeed('LTC-USD', gdax=gdax, auth=False)
+    hub.register(eth, products=['ETH-USD'])
+    hub.register(ltc, products=['LTC-USD'])
+    engine.add(hub)
+    assert wait_for(lambda: eth.state == ltc.state == BOOK_LIVE)
+    assert eth._pending == [] and eth.resyncs == 1
+
+    exchange.inject_gap('ETH-USD', messages=3)
+    # The hub finds the gap and resyncs only the ETH-USD book.
+    assert wait_for(lambda: hub.product_gaps == {'ETH-USD': 1} and eth.resyncs == 2)
+    assert ltc.resyncs == 1 and eth.gaps == ltc.gaps == 0
+    assert eth.resync_seconds >= 0.3
+    assert exchange.connections == 1 and hub.reconnects == 0
+
+    exchange.rate = 0
+    for feed in (eth, ltc):
+        market = exchange.markets[feed.product_id]
+        assert wait_for(lambda: feed._sequence == market.sequence)
+        assert book_orders(feed.get_current_book()) == book_orders(market.get_book(level=3))
+
+
+class StaleClient(SnapshotClient):
+    """
+    Returns each snapshot in turn (the last one from then on).
+    """
+    def __init__(self, *snapshots):
+        super(StaleClient, self).__init__(snapshots[-1])
+        self.snapshots = list(snapshots)
+        self.times = list()
+
+    def get_book(self, product_id, level=3, cache=True):
+        self.times.append(perf_counter())
+        return (self.snapshots.pop(0) if len(self.snapshots) > 1 else self.snapshot)
+
+
+def test_sync_backs_off_and_caps_buffer():
+    stale = {'sequence': 5, 'bids': [], 'asks': []}
+    client = StaleClient(stale, stale, {'sequence': 10, 'bids': [['99.00', '1', 'b']],
+                                        'asks': [['101.00', '1', 'a']]})
+    feed = GdaxBookFeed('ETH-USD', gdax=client, auth=False)
+    feed.snapshot_retry = 0.05
+    feed.max_pending = 4
+    for seq in range(8, 14):
+        feed.on_message({'type': 'received', 'product_id': 'ETH-USD', 'sequence': seq})
+
+    assert wait_for(lambda: feed.state == BOOK_LIVE)
+    assert feed._sequence == 13 and feed.pending_dropped == 2
+    # Stale snapshots are refetched with a growing delay.
+    t = client.times
+    assert len(t) == 3 and t[1] - t[0] >= 0.05 and t[2] - t[1] >= 0.1
+
+    # A full channel message without a sequence resyncs the book in place.
+    feed.on_message({'type': 'open', 'product_id': 'ETH-USD'})
+    assert wait_for(lambda: feed.resyncs == 2 and feed.state == BOOK_LIVE)
+    assert feed._sequence == 10 and feed.thread is None
+
+
+@pytest.mark.parametrize('backend', ['rbtree', 'array'])
+def test_order_index_and_level_sizes(backend):
+    market = SyntheticMarket('BTC-USD', depth=5, max_orders=600, seed=3)
+    while len(market.orders) < 600:
+        market.step()
+    feed = GdaxBookFeed('BTC-USD', gdax=SnapshotClient(market.get_book(level=3)),
+                        auth=False, backend=backend)
+    feed.resync()
+    assert wait_for(lambda: feed.state == BOOK_LIVE)
+
+    for _ in range(20000):
+        for msg in market.step():
+            feed.on_message(msg)
+
+    assert book_orders(feed.get_current_book()) == book_orders(market.get_book(level=3))
+    assert len(feed._orders) == len(market.orders)
+    for row in market.get_book(level=2)['bids'][:10]:
+        level = feed.get_bids(float(row[0]))
+        assert len(level) == row[2]
+        assert abs(level.size - float(row[1])) < 1e-6
+
+    order_id, (side, ticks, size) = next(iter(market.orders.items()))
+    order = feed.get_order(order_id)
+    assert order['side'] == side and order.price == float(market._price(ticks))
+    assert feed.get_orders_matching_ids([order_id, 'missing']) == [order]
+
+
+def test_price_array():
+    tree = GdaxPriceArray(tick=0.01)
+    for price in (100.02, 99.99, 100.01):
+        tree.insert(price, GdaxPriceLevel(price))
+    assert list(tree) == [99.99, 100.01, 100.02]
+    assert tree.min_key() == 99.99 and tree.max_key() == 100.02
+    assert tree.get(100.01000001).price == 100.01 and tree.get(100.0) is None
+    tree.remove(100.01)
+    assert list(tree) == [99.99, 100.02] and len(tree) == 2
+    with pytest.raises(KeyError):
+        tree.remove(100.01)
+    with pytest.raises(ValueError):
+        GdaxPriceArray().min_key()
+
+
+@pytest.mark.parametrize('backend', ['rbtree', 'array'])
+def test_top_book_view(backend):
+    market = SyntheticMarket('BTC-USD', depth=30, max_orders=300, seed=4)
+    while len(market.orders) < 300:
+        market.step()
+    feed = GdaxBookFeed('BTC-USD', gdax=SnapshotClient(market.get_book(level=3)),
+                        auth=False, backend=backend, top_n=10)
+    feed.resync()
+    assert wait_for(lambda: feed.state == BOOK_LIVE)
+
+    for i in range(20000):
+        for msg in market.step():
+            feed.on_message(msg)
+        if i % 1000 == 0:
+            expected = market.get_book(level=2)
+            view = feed.view.to_dict()
+            for key in ('bids', 'asks'):
+                rows = expected[key][:10]
+                assert [r[0] for r in view[key]] == [float(r[0]) for r in rows]
+                assert [r[2] for r in view[key]] == [r[2] for r in rows]
+                assert all(abs(a[1] - float(b[1])) < 1e-6 for a, b in zip(view[key], rows))
+
+    prices, sizes, counts = feed.get_top_book()['asks']
+    assert prices[0] == feed.get_ask() and len(prices) == 10
+
+
+def test_snapshots_are_consistent_and_stamped():
+    market = SyntheticMarket('BTC-USD', depth=30, max_orders=300, seed=5)
+    while len(market.orders) < 300:
+        market.step()
+    feed = GdaxBookFeed('BTC-USD', gdax=SnapshotClient(market.get_book(level=3)),
+                        auth=False, top_n=10)
+    feed.resync()
+    assert wait_for(lambda: feed.state == BOOK_LIVE)
+
+    snap = feed.get_snapshot()
+    assert snap is feed.get_snapshot()
+    assert snap.get_staleness() == (0, 0.0)
+    with pytest.raises(ValueError):
+        snap.bids[0][0] = 1
+
+    done = Event()
+
+    def write():
+        for _ in range(30000):
+            for msg in market.step():
+                feed.on_message(msg)
+        done.set()
+
+    writer = Thread(target=write)
+    writer.start()
+    seen = 0
+    while not done.is_set():
+        s = feed.get_snapshot()
+        for prices, sizes, counts in (s.bids, s.asks):
+            assert len(prices) == 10 and counts.min() > 0
+        assert (np.diff(s.bids[0]) < 0).all() and (np.diff(s.asks[0]) > 0).all()
+        assert s.best_bid < s.best_ask
+        seen += 1
+    writer.join()
+    assert seen > 10
+
+    messages, ms = snap.get_staleness()
+    assert messages > 30000 and ms > 0
+    assert feed.get_snapshot().sequence == feed._sequence
+
+
+def test_book_snapshot_calculations():
+    snap = get_book_snapshot(make_snapshot(4000, levels=400))
+    bids, asks = snap.bids, snap.asks
+    assert bids[0][0] > bids[-1][0] and asks[0][0] < asks[-1][0]
+    for price in (bids[0][0], bids[50][0], bids[-1][0] - 1):
+        expected = sum(b[1] for b in bids if b[0] >= price)
+        assert snap.calculate_bid_depth(price) == pytest.approx(expected)
+    for price in (asks[0][0] - 1, asks[50][0], asks[-1][0]):
+        expected = sum(a[1] for a in asks if a[0] <= price)
+        assert snap.calculate_ask_depth(price) == pytest.approx(expected)
+
+    bid_walls, ask_walls = snap.get_walls(4, 0.002)
+    assert bid_walls == [b for b in bids if b[0] >= bids[0][0] * 0.998 and b[1] >= 4]
+    assert ask_walls == [a for a in asks if a[0] <= asks[0][0] * 1.002 and a[1] >= 4]
+    smallest = sorted(w[1] for w in bid_walls + ask_walls)[:7]
+    assert snap.calculate_wall_size(None, 4, 0.002) == pytest.approx(sum(smallest) / 7)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        # No walls this big.
+        assert snap.calculate_wall_size(None, 10 ** 9, 0.002) is None
+        assert snap.calculate_wall_size(([], [])) is None
+    assert snap.get_spread() == pytest.approx(asks[0][0] - bids[0][0])
+
+    # All of the best ask and half of the next.
+    size = asks[0][1] + asks[1][1] / 2
+    vwap = (asks[0][0] * asks[0][1] + asks[1][0] * asks[1][1] / 2) / size
+    assert snap.get_vwap('buy', size) == pytest.approx(vwap)
+    assert snap.get_vwap('sell', bids[0][1]) == pytest.approx(bids[0][0])
+    assert snap.get_vwap('buy', 10 ** 9) is None
+
+    # Arrays are rebuilt on refresh.
+    sides = snap._get_sides()
+    snap.refresh()
+    assert snap._get_sides() is not sides
+    assert snap.bids[0][0] == bids[0][0]
@@ -0,0 +1,27 @@
+from stocklook.crypto.gdax.feeds import GdaxBookManager
+from stocklook.crypto.gdax.feeds.book_feed import BOOK_LIVE
+from stocklook.crypto.gdax.tests.helpers import wait_for, book_orders
+
+
+def test_one_socket_many_books(exchange, engine):
+    manager = GdaxBookManager(['ETH-USD', 'LTC-USD'], gdax=exchange.get_gdax(),
+                              url=exchange.ws_url, top_n=5)
+    assert all(b.hub is manager for b in manager.books.values())
+    engine.add(manager)
+    assert wait_for(lambda: all(s['state'] == BOOK_LIVE
+                                for s in manager.get_sync_stats().values()))
+
+    exchange.inject_gap('LTC-USD', messages=2)
+    assert wait_for(lambda: manager['LTC-USD'].resyncs == 2)
+    stats = manager.get_sync_stats()
+    assert stats['LTC-USD']['gaps'] == 1
+    assert stats['ETH-USD']['gaps'] == 0 and stats['ETH-USD']['resyncs'] == 1
+    assert exchange.connections == 1
+
+    exchange.rate = 0
+    for product_id in ('ETH-USD', 'LTC-USD'):
+        market = exchange.markets[product_id]
+        assert wait_for(lambda: manager[product_id]._sequence == market.sequence)
+        assert book_orders(manager.get_current_book(product_id)) == \
+               book_orders(market.get_book(level=3))
+        assert manager.get_snapshot(product_id).best_ask == manager.get_ask(product_id)
@@ -0,0 +1,67 @@
+import pytest
+from threading import Thread
+from time import sleep
+from stocklook.crypto.gdax.feeds.buffer import GdaxMessageBuffer, DROP_OLDEST, DROP_BY_TYPE
+from stocklook.crypto.gdax.tests.helpers import CollectingFeed, wait_for
+
+
+def msg(i, msg_type='open'):
+    return {'type': msg_type, 'sequence': i}
+
+
+def test_drop_policies():
+    buf = GdaxMessageBuffer(capacity=3, policy=DROP_OLDEST)
+    for i in range(5):
+        assert buf.put(msg(i))
+    assert [buf.get()['sequence'] for _ in range(3)] == [2, 3, 4]
+    stats = buf.get_stats()
+    assert stats['dropped'] == 2 and stats['high_water'] == 3 and stats['size'] == 0
+
+    buf = GdaxMessageBuffer(capacity=3, policy=DROP_BY_TYPE)
+    buf.put(msg(0))
+    buf.put(msg(1, 'heartbeat'))
+    buf.put(msg(2))
+    buf.put(msg(3))                     # sheds the buffered heartbeat
+    buf.put(msg(4, 'ticker'))           # sheds itself
+    buf.put(msg(5))                     # nothing to shed: drops the oldest
+    assert [buf.get()['sequence'] for _ in range(3)] == [2, 3, 5]
+    assert buf.get_stats()['dropped_by_type'] == {'heartbeat': 1, 'ticker': 1, 'open': 1}
+
+    with pytest.raises(ValueError):
+        GdaxMessageBuffer(policy='nope')
+
+
+def test_block_policy_waits_for_room():
+    buf = GdaxMessageBuffer(capacity=2)
+    buf.put(msg(0))
+    buf.put(msg(1))
+    assert not buf.put(msg(2), block=False)
+    assert not buf.put(msg(2), timeout=0.01)
+
+    t = Thread(target=buf.put, args=(msg(2),))
+    t.start()
+    sleep(0.05)
+    assert t.is_alive() and buf.lag >= 0.05
+    assert buf.get()['sequence'] == 0
+    t.join(1)
+    assert [buf.get()['sequence'], buf.get()['sequence']] == [1, 2]
+    assert buf.get(timeout=0.01) is None
+    assert buf.get_stats()['max_lag'] >= 0.05
+
+    buf.close()
+    assert not buf.put(msg(3))
+
+
+def test_slow_handler_does_not_block_socket(exchange, engine):
+    class SlowFeed(CollectingFeed):
+        def on_message(self, m):
+            sleep(0.01)
+            super(SlowFeed, self).on_message(m)
+
+    buf = GdaxMessageBuffer(capacity=50, policy=DROP_OLDEST)
+    feed = engine.add(SlowFeed(url=exchange.ws_url, products=['ETH-USD'],
+                               channels=['full'], buffer=buf))
+    assert wait_for(lambda: buf.dropped > 0)
+    assert feed.message_count > len(feed.messages) + buf.dropped
+    assert buf.high_water == 50
+    assert feed.reconnects == 0
@@ -0,0 +1,74 @@
+import pytest
+from time import sleep
+from threading import Thread
+from stocklook.crypto.gdax.cache import GdaxResponseCache
+
+
+TICKER = 'products/{}/ticker'
+
+
+def test_cache_hits_until_ttl_expires():
+    cache = GdaxResponseCache(ttls={TICKER: 0.05})
+    calls = list()
+
+    def call():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get('a', TICKER, call) == 1
+    assert cache.get('a', TICKER, call) == 1
+    sleep(0.06)
+    assert cache.get('a', TICKER, call) == 2
+    stats = cache.get_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+
+
+def test_uncached_templates_always_call():
+    cache = GdaxResponseCache(ttls={TICKER: 10})
+    calls = list()
+    cache.get('orders', 'orders', lambda: calls.append(1))
+    cache.get('orders', 'orders', lambda: calls.append(1))
+    assert len(calls) == 2
+    assert cache.get_stats()['size'] == 0
+
+
+def test_lru_eviction():
+    cache = GdaxResponseCache(ttls={TICKER: 10}, max_size=2)
+    cache.get('a', TICKER, lambda: 'a')
+    cache.get('b', TICKER, lambda: 'b')
+    cache.get('a', TICKER, lambda: 'x')     # refresh a
+    cache.get('c', TICKER, lambda: 'c')     # evicts b
+    assert cache.get('a', TICKER, lambda: 'new') == 'a'
+    assert cache.get('b', TICKER, lambda: 'new') == 'new'
+    assert cache.evictions >= 1
+
+
+def test_concurrent_requests_are_coalesced():
+    cache = GdaxResponseCache(ttls={TICKER: 10})
+    calls, results = list(), list()
+
+    def slow():
+        calls.append(1)
+        sleep(0.1)
+        return 'ticker'
+
+    threads = [Thread(target=lambda: results.append(cache.get('k', TICKER, slow)))
+               for _ in range(8)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+
+    assert len(calls) == 1
+    assert results == ['ticker'] * 8
+    assert cache.coalesced + cache.hits == 7
+
+
+def test_errors_are_shared_and_not_cached():
+    cache = GdaxResponseCache(ttls={TICKER: 10})
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        cache.get('k', TICKER, fail)
+    assert cache.get('k', TICKER, lambda: 'ok') == 'ok'
@@ -0,0 +1,54 @@
+import os
+import pytest
+from pandas import Timestamp
+from stocklook.crypto.gdax.candle_store import GdaxCandleStore, month_ranges, merge_intervals
+from stocklook.crypto.gdax.tests.helpers import CandleGdax
+
+
+@pytest.fixture
+def store(tmpdir):
+    return GdaxCandleStore(CandleGdax(), directory=str(tmpdir))
+
+
+def test_month_ranges_split_on_month_boundaries():
+    start = int(Timestamp('2017-09-30 23:00').timestamp())
+    end = int(Timestamp('2017-11-01 01:00').timestamp())
+    months = [m[0] for m in month_ranges(start, end)]
+    assert months == ['2017-09', '2017-10', '2017-11']
+
+
+def test_merge_intervals():
+    assert merge_intervals([[5, 8], [0, 2], [2, 4]]) == [[0, 4], [5, 8]]
+
+
+def test_store_only_fetches_missing_ranges(store):
+    g = store.gdax
+    df = store.get_candles('ETH-USD', '2017-09-30 20:00', '2017-10-01 04:00',
+                           granularity=300, to_frame=True)
+    assert df.index.size == 97
+    assert df['time'].is_monotonic_decreasing
+    first_requests = len(g.requests)
+
+    # Partitioned by month.
+    assert os.path.exists(store.get_path('ETH-USD', 300, '2017-09'))
+    assert os.path.exists(store.get_path('ETH-USD', 300, '2017-10'))
+
+    # Fully covered: answered from disk.
+    again = store.get_candles('ETH-USD', '2017-09-30 22:00', '2017-10-01 02:00',
+                              granularity=300, to_frame=True)
+    assert len(g.requests) == first_requests
+    assert again.index.size == 49
+
+    # Extending the range only requests the new part.
+    assert store.get_missing('ETH-USD', '2017-09-30 20:00', '2017-10-01 06:00', 300) == \
+        [(int(Timestamp('2017-10-01 04:05').timestamp()),
+          int(Timestamp('2017-10-01 06:00').timestamp()))]
+    rows = store.get_candles('ETH-USD', '2017-09-30 20:00', '2017-10-01 06:00', granularity=300)
+    assert len(rows) == 121
+    assert len(g.requests) == first_requests + 1
+
+
+def test_store_keeps_other_granularities_apart(store):
+    store.get_candles('ETH-USD', '2017-10-01', '2017-10-01 01:00', granularity=60)
+    assert store.read('ETH-USD', '2017-10-01', '2017-10-01 01:00', granularity=300).shape == (0, 6)
+    assert store.read('ETH-USD', '2017-10-01', '2017-10-01 01:00', granularity=60).shape == (61, 6)
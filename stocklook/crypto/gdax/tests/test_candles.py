@@ -0,0 +1,42 @@
+from pandas import Timestamp
+from stocklook.crypto.gdax.api import get_candle_windows
+from stocklook.crypto.gdax.tests.helpers import FakeResponse, CandleGdax
+
+
+def test_candle_windows_cover_range():
+    windows = get_candle_windows(0, 60 * 1000, 60)
+    assert windows[0] == (0, 60 * 299)
+    assert windows[-1][1] == 60 * 1000
+    for (s1, e1), (s2, e2) in zip(windows, windows[1:]):
+        assert s2 == e1 + 60
+    assert get_candle_windows(100, 100, 60) == [(100, 100)]
+
+
+def test_get_candles_chunks_and_merges():
+    g = CandleGdax()
+    start, end = Timestamp('2017-10-01'), Timestamp('2017-10-03')
+    res = g.get_candles('ETH-USD', start, end, granularity=60)
+
+    # 2 days of minutes needs 10 requests of 300.
+    assert len(g.requests) == 10
+    times = [r[0] for r in res]
+    assert len(times) == 2 * 24 * 60 + 1
+    assert times == sorted(set(times), reverse=True)
+    assert isinstance(times[0], int)
+
+
+def test_get_candles_frame():
+    g = CandleGdax()
+    df = g.get_candles('ETH-USD', '2017-10-01', '2017-10-01 10:00:00',
+                       granularity=300, convert_dates=True, to_frame=True)
+    assert list(df.columns) == ['time', 'low', 'high', 'open', 'close', 'volume']
+    assert df['time'].iloc[0] == Timestamp('2017-10-01 10:00:00')
+    assert df['time'].is_monotonic_decreasing
+    assert df.index.size == 121
+
+
+def test_get_candles_empty():
+    g = CandleGdax()
+    g.get = lambda ext, **kwargs: FakeResponse([])
+    df = g.get_candles('ETH-USD', 0, 600, to_frame=True)
+    assert df.empty
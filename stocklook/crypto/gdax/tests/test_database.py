@@ -21,8 +21,11 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
+import os
 import pytest
+from sqlalchemy import create_engine
 from stocklook.crypto.gdax.db import GdaxOHLCViewer, GdaxDatabase
+from stocklook.crypto.gdax.local_exchange import GdaxLocalExchange
 from pandas import Timestamp, DateOffset, DataFrame
 
 from stocklook.utils.timetools import now, now_minus, now_plus, timestamp_to_local, timestamp_from_utc
@@ -42,13 +45,22 @@ def get_sample_chart(size=31, price_factor=1.25, minute_interval=5):
                      index=range(len(data)))
 
 
-def test_ohlc_database():
-    pair = 'LTC-USD'
-    v = GdaxOHLCViewer()
-    v.set_pair(pair)
-    v.sync_ohlc(months=6, thread=False)
-
-
+@pytest.fixture
+def exchange():
+    with GdaxLocalExchange(rate=0) as ex:
+        yield ex
 
 
+def test_ohlc_database(exchange, tmpdir):
+    pair = 'LTC-USD'
+    engine = create_engine('sqlite:///' + os.path.join(str(tmpdir), 'gdax.sqlite3'))
+    db = GdaxDatabase(gdax=exchange.get_gdax(), engine=engine)
+    v = GdaxOHLCViewer(db=db)
+    v.set_pair(pair)
+    v.sync_ohlc(months=1, thread=False)
 
+    session = db.get_session()
+    min_time, max_time = v.get_min_max_times(session)
+    session.close()
+    assert min_time is not None
+    assert (max_time - min_time).days >= 29
@@ -0,0 +1,29 @@
+import json
+import pytest
+from stocklook.crypto.gdax.feeds.book_feed import GdaxBookFeed
+from stocklook.crypto.gdax.feeds.decoder import GdaxMessageDecoder, SUBSET
+from stocklook.crypto.gdax.scripts.benchmark_decoder import generate_frames
+
+
+def test_subset_matches_full_decode():
+    fields = GdaxBookFeed.DECODE_FIELDS
+    full = GdaxMessageDecoder(backend='json')
+    subset = GdaxMessageDecoder(backend='json', fields=fields, strategy=SUBSET)
+    for frame in generate_frames(2000):
+        expected = full.decode(frame)
+        expected = {k: v for k, v in expected.items() if k in fields}
+        assert subset.decode(frame) == expected
+        assert subset.decode(frame.encode('utf8')) == expected
+
+
+def test_subset_falls_back_and_rejects():
+    subset = GdaxMessageDecoder(backend='json', fields=['type'], strategy=SUBSET)
+    nested = {'type': 'subscriptions', 'channels': [{'name': 'full'}]}
+    assert subset.decode(json.dumps(nested)) == nested
+    assert subset.decode('{"type": "done", "price": null, "ok": true}') == {'type': 'done'}
+    with pytest.raises(ValueError):
+        subset.decode('{"message": "x"}')
+    with pytest.raises(ValueError):
+        GdaxMessageDecoder(strategy=SUBSET)
+    with pytest.raises(ValueError):
+        GdaxMessageDecoder().decode('{"type": ')
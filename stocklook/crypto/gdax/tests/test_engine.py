@@ -0,0 +1,86 @@
+from threading import current_thread
+from stocklook.crypto.gdax.feeds import GdaxBookFeed
+from stocklook.crypto.gdax.tests.helpers import CollectingFeed, wait_for
+
+
+def test_many_feeds_share_one_loop(exchange, engine):
+    feeds = [engine.add(CollectingFeed(url=exchange.ws_url, products=[p], channels=['full']))
+             for p in ('ETH-USD', 'LTC-USD') for _ in range(3)]
+    assert wait_for(lambda: all(len(f.messages) > 20 for f in feeds))
+    assert all(f.thread is None for f in feeds)
+    assert {f.messages[-1]['product_id'] for f in feeds[3:]} == {'LTC-USD'}
+
+    # Reconnects with backoff when the exchange drops the connections.
+    exchange.disconnect()
+    assert wait_for(lambda: all(f.reconnects >= 1 for f in feeds))
+    counts = [len(f.messages) for f in feeds]
+    assert wait_for(lambda: all(len(f.messages) > c for f, c in zip(feeds, counts)))
+
+    engine.remove(feeds[0])
+    assert feeds[0].closed == 1 and feeds[0].stop
+
+
+def test_on_open_after_each_subscribe(exchange, engine):
+    class OpenFeed(CollectingFeed):
+        def on_open(self):
+            super(OpenFeed, self).on_open()
+            self.open_threads.append(current_thread())
+            self.seen = len(self.messages)
+
+    feed = OpenFeed(url=exchange.ws_url, products=['ETH-USD'], channels=['full'])
+    feed.open_threads = list()
+    engine.add(feed)
+    assert wait_for(lambda: feed.opened == 1 and len(feed.messages) > 5)
+    assert feed.seen == 0
+
+    exchange.disconnect()
+    assert wait_for(lambda: feed.opened == 2)
+    assert feed.reconnects == 1
+    assert all(t is engine._thread for t in feed.open_threads)
+
+
+def test_reconnects_after_feed_errors(exchange, engine):
+    class FailingRecorder:
+        def __init__(self):
+            self.writes = 0
+
+        def write(self, raw, msg):
+            self.writes += 1
+            if self.writes == 3:
+                raise IOError('disk full')
+
+        def flush(self):
+            pass
+
+    class FailingFeed(CollectingFeed):
+        def on_error(self, e):
+            raise RuntimeError('on_error failed')
+
+    recorded = engine.add(CollectingFeed(url=exchange.ws_url, products=['ETH-USD'],
+                                         channels=['full'], recorder=FailingRecorder()))
+    failing = engine.add(FailingFeed(url=exchange.ws_url, products=['ETH-USD'],
+                                     channels=['full']))
+
+    def bad_frame(data):
+        raise ValueError('bad frame')
+    # Enough undecodable frames call on_error, which raises.
+    failing.decoder.decode = bad_frame
+    assert wait_for(lambda: recorded.reconnects >= 1 and failing.reconnects >= 1)
+    assert wait_for(lambda: recorded.opened >= 2 and len(recorded.messages) > 5)
+
+
+def test_book_feed_runs_on_engine(exchange, engine):
+    gdax = exchange.get_gdax()
+    feed = GdaxBookFeed('ETH-USD', gdax=gdax, auth=False)
+    feed.url = exchange.ws_url
+    engine.add(feed)
+    assert wait_for(lambda: feed._sequence > 0)
+
+    exchange.rate = 0
+    market = exchange.markets['ETH-USD']
+    assert wait_for(lambda: feed._sequence == market.sequence)
+
+    book = feed.get_current_book()
+    expected = market.get_book(level=3)
+    assert [o[2] for o in book['asks']] == [o[2] for o in expected['asks']]
+    assert {o[2] for o in book['bids']} == {o[2] for o in expected['bids']}
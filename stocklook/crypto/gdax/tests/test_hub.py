@@ -0,0 +1,82 @@
+from queue import Queue
+from multiprocessing import Process, Queue as ProcessQueue
+from stocklook.crypto.gdax.feeds import GdaxFeedHub, GdaxFeedHubClient, GdaxBookFeed, GdaxL2BookFeed
+from stocklook.crypto.gdax.feeds.book_feed import BOOK_LIVE
+from stocklook.crypto.gdax.tests.helpers import wait_for
+
+
+def count_matches(address, out):
+    client = GdaxFeedHubClient(address, products=['LTC-USD'], types=['match'])
+    seen = [client.recv(timeout=10) for _ in range(5)]
+    out.put([(m['product_id'], m['type']) for m in seen])
+    client.close()
+
+
+def test_hub_fans_out_one_subscription(exchange, engine):
+    hub = GdaxFeedHub(url=exchange.ws_url, products=['ETH-USD', 'LTC-USD'], channels=['full'])
+    calls = list()
+    matches = Queue()
+    hub.register(calls.append, products=['ETH-USD'])
+    hub.register(matches, types=['match'])
+
+    book = GdaxBookFeed('ETH-USD', gdax=exchange.get_gdax(), auth=False)
+    hub.register(book, products=['ETH-USD'])
+
+    out = ProcessQueue()
+    p = Process(target=count_matches, args=(hub.listen(), out))
+    p.start()
+    engine.add(hub)
+
+    assert out.get(timeout=20) == [('LTC-USD', 'match')] * 5
+    p.join(5)
+    assert wait_for(lambda: matches.qsize() > 5 and len(calls) > 20)
+    assert {m['product_id'] for m in calls} == {'ETH-USD'}
+    assert exchange.connections == 1
+
+    exchange.rate = 0
+    market = exchange.markets['ETH-USD']
+    assert wait_for(lambda: book._sequence == market.sequence == hub.sequences['ETH-USD'])
+    assert [o[2] for o in book.get_current_book()['asks']] == \
+           [o[2] for o in market.get_book(level=3)['asks']]
+    assert hub.gaps == 0
+
+
+def test_hub_routes_consumer_errors(exchange, engine):
+    hub = GdaxFeedHub(url=exchange.ws_url, products=['ETH-USD'], channels=['full', 'level2'])
+    book = GdaxBookFeed('ETH-USD', gdax=exchange.get_gdax(), auth=False)
+    l2 = GdaxL2BookFeed('ETH-USD', url=exchange.ws_url)
+    hub.register(book, products=['ETH-USD'])
+    hub.register(l2, products=['ETH-USD'])
+    assert book.hub is hub and l2.hub is hub
+    engine.add(hub)
+    assert wait_for(lambda: book.state == BOOK_LIVE and l2.snapshots == 1)
+
+    # A failing book is rebuilt from a snapshot, not reconnected.
+    apply = book._apply
+
+    def fail_once(msg):
+        book._apply = apply
+        raise ValueError('bad message')
+    book._apply = fail_once
+    assert wait_for(lambda: book.resyncs == 2 and book.state == BOOK_LIVE)
+    assert hub.reconnects == 0 and exchange.connections == 1
+    assert book.thread is None and book.engine is None
+
+    # The level2 book needs a new subscription: the hub reconnects.
+    l2.on_error(ValueError('bad update'))
+    assert wait_for(lambda: l2.snapshots == 2 and l2.ready)
+    assert hub.reconnects == 1 and l2.thread is None
+    assert wait_for(lambda: exchange.connections == 1)
+
+    hub.unregister(book)
+    assert book.hub is None
+
+
+def test_sparse_channels_have_no_gaps(exchange, engine):
+    hub = GdaxFeedHub(url=exchange.ws_url, products=['ETH-USD'], channels=['ticker', 'matches'])
+    calls = list()
+    hub.register(calls.append)
+    engine.add(hub)
+    assert wait_for(lambda: sum(m['type'] == 'match' for m in calls) > 20
+                    and sum(m['type'] == 'ticker' for m in calls) > 20)
+    assert hub.gaps == 0 and hub.sequences == {}
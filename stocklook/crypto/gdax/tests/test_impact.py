@@ -0,0 +1,99 @@
+import pytest
+from types import SimpleNamespace
+from stocklook.crypto.gdax.feeds import GdaxBookFeed, GdaxImpactEstimator
+from stocklook.crypto.gdax.market_maker import GdaxMarketMaker
+from stocklook.crypto.gdax.order import GdaxTrailingStop
+from stocklook.crypto.gdax.tests.helpers import SnapshotClient, make_snapshot
+
+
+BOOK = {'sequence': 7,
+        'bids': [['99', '1', 'a'], ['100', '2', 'b'], ['98', '5', 'c'], ['100', '1', 'd']],
+        'asks': [['101', '1', 'e'], ['102', '2', 'f'], ['101', '1', 'g'], ['105', '10', 'h']]}
+
+
+def test_estimates_against_levels():
+    impact = GdaxImpactEstimator(None, max_age=10 ** 6)
+    impact.load_book(BOOK)
+    assert list(impact.bids.prices) == [100, 99, 98]
+    assert list(impact.bids.sizes) == [3, 1, 5]
+
+    est = impact.estimate('buy', size=3)
+    assert (est.funds, est.worst_price, est.levels, est.filled) == (304, 102, 2, True)
+    assert est.avg_price == pytest.approx(304 / 3)
+    assert est.slippage == pytest.approx((304 / 3 - 101) / 101)
+
+    est = impact.estimate('sell', funds=399)
+    assert est.size == pytest.approx(4) and est.avg_price == pytest.approx(99.75)
+    assert est.levels == 2
+
+    est = impact.estimate('sell', size=100)
+    assert not est.filled and est.size == 9 and est.worst_price == 98
+
+    # Within 0.5%: 2 @ 101, 2 @ 102 and x @ 105 where (406 + 105x) / (4 + x) = 101.505
+    assert impact.max_size('buy', 0.005) == pytest.approx(4 + 0.02 / 3.495)
+    assert impact.max_size('sell', 0) == 3
+    assert impact.max_size('buy', 1) == 14
+    assert impact.max_size('buy', -0.01) == impact.max_size('sell', -0.01) == 0
+
+
+def test_top_n_feed_matches_full_book():
+    snapshot = make_snapshot(20000, levels=2000)
+    full = GdaxBookFeed('BTC-USD', gdax=SnapshotClient(snapshot), auth=False)
+    top = GdaxBookFeed('BTC-USD', gdax=SnapshotClient(snapshot), auth=False, top_n=100)
+    full._load(snapshot)
+    top._load(snapshot)
+    a, b = GdaxImpactEstimator(full), GdaxImpactEstimator(top)
+    for side in ('buy', 'sell'):
+        x, y = a.estimate(side, size=40), b.estimate(side, size=40)
+        assert x.avg_price == pytest.approx(y.avg_price)
+        assert (x.worst_price, x.levels) == (y.worst_price, y.levels)
+
+    # Only a market maker with max_slippage pays for estimates,
+    # and only once it sizes a position.
+    gdax = SimpleNamespace(accounts={'USD': SimpleNamespace(balance=10 ** 12)})
+    mm = GdaxMarketMaker(book_feed=top, product_id='BTC-USD', gdax=gdax)
+    mm.position_size
+    assert mm.impact is None
+    mm = GdaxMarketMaker(book_feed=top, product_id='BTC-USD', gdax=gdax, max_slippage=0.01)
+    assert mm.impact is None
+    size = mm.position_size
+    assert mm.impact.book_feed is top
+    assert 0 < size == pytest.approx(mm.impact.max_size('buy', 0.01))
+
+    # The top_n arrays are only rebuilt when the view changes.
+    bids = b.bids
+    b.estimate('sell', size=1)
+    assert b.bids is bids
+    assert not b.estimate('buy', size=10 ** 6).filled
+
+
+def test_trailing_stop_triggers_on_expected_fill():
+    impact = GdaxImpactEstimator(None, max_age=10 ** 6)
+    impact.load_book(BOOK)
+    stop = GdaxTrailingStop('BTC-USD', 4, stop_pct=0.01, gdax=object(), product=object(),
+                            impact=impact)
+    mark = stop.get_sell_mark(100)
+    assert mark == 99
+    # 3 @ 100 and 1 @ 99 averages 99.75, but 9 would average 98.67.
+    assert stop.get_expected_price(100) == pytest.approx(99.75)
+    stop.size = 9
+    assert stop.get_expected_price(100) < mark
+    assert GdaxTrailingStop('BTC-USD', 9, stop_pct=0.01, gdax=object(),
+                            product=object()).get_expected_price(100) == 100
+
+
+def test_trailing_stop_on_thin_book():
+    impact = GdaxImpactEstimator(None, max_age=10 ** 6)
+    impact.load_book({'sequence': 1, 'bids': [['100', '1', 'a'], ['99.5', '1', 'b']],
+                      'asks': [['101', '1', 'c']]})
+    stop = GdaxTrailingStop('BTC-USD', 50, stop_pct=0.01, gdax=object(), product=object(),
+                            impact=impact)
+    mark = stop.get_sell_mark(100)
+    est = stop.get_fill_estimate()
+    # The known levels average above the mark but only fill 2 of 50.
+    assert not est.filled and est.avg_price > mark
+    assert stop.get_expected_price(100) == pytest.approx(199.5 / 50)
+
+    # A small shortfall only lowers the price a little.
+    stop.size = 2.01
+    assert mark < stop.get_expected_price(100) == pytest.approx(199.5 / 2.01)
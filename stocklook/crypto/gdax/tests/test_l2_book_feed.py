@@ -0,0 +1,32 @@
+from stocklook.crypto.gdax.feeds import GdaxL2BookFeed
+from stocklook.crypto.gdax.tests.helpers import wait_for
+
+
+def levels(book, market_book):
+    asks = [(p, round(s, 8)) for p, s, _ in book['asks'][:50]]
+    bids = [(p, round(s, 8)) for p, s, _ in reversed(book['bids'])][:50]
+    expected = {key: [(float(p), float(s)) for p, s, n in market_book[key]]
+                for key in ('asks', 'bids')}
+    return (asks, bids) == (expected['asks'], expected['bids'])
+
+
+def test_l2_book_tracks_market(exchange, engine):
+    feed = engine.add(GdaxL2BookFeed('ETH-USD', url=exchange.ws_url))
+    assert wait_for(lambda: feed.ready and feed.updates > 50)
+    assert feed.snapshots == 1
+    assert feed.get_current_ticker()['type'] == 'match'
+
+    exchange.rate = 0
+    market = exchange.markets['ETH-USD']
+    assert wait_for(lambda: levels(feed.get_current_book(), market.get_book(level=2)))
+    book = feed.get_current_book()
+    assert book['sequence'] is None and book['updates'] == feed.updates
+    assert feed.get_bid() == float(market.get_book(level=1)['bids'][0][0])
+    assert feed.get_ask() < float(market.get_book(level=1)['asks'][0][0]) + 0.001
+
+    # A reconnect replaces the book with a new snapshot.
+    exchange.rate = 200
+    exchange.disconnect()
+    assert wait_for(lambda: feed.snapshots == 2)
+    exchange.rate = 0
+    assert wait_for(lambda: levels(feed.get_current_book(), market.get_book(level=2)))
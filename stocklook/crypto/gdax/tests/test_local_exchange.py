@@ -0,0 +1,82 @@
+import json
+import pytest
+from websocket import create_connection
+from stocklook.crypto.gdax.local_exchange import SyntheticMarket
+from stocklook.crypto.gdax.retry import GdaxRetryPolicy
+
+
+def apply(book, msg):
+    """
+    Applies a full channel message to {order_id: [side, price, size]}
+    """
+    t = msg['type']
+    if t == 'open':
+        book[msg['order_id']] = [msg['side'], msg['price'], float(msg['remaining_size'])]
+    elif t == 'done' and 'price' in msg:
+        book.pop(msg['order_id'], None)
+    elif t == 'match':
+        book[msg['maker_order_id']][2] -= float(msg['size'])
+    elif t == 'change':
+        book[msg['order_id']][2] = float(msg['new_size'])
+
+
+def to_orders(snapshot):
+    return {o[2]: [side, o[0], float(o[1])]
+            for side, key in (('buy', 'bids'), ('sell', 'asks'))
+            for o in snapshot[key]}
+
+
+def test_messages_rebuild_the_level3_book():
+    market = SyntheticMarket('ETH-USD', seed=7)
+    book = to_orders(market.get_book(level=3))
+    seq = market.sequence
+    for _ in range(2000):
+        for msg in market.step():
+            if msg['type'] != 'ticker':
+                assert msg['sequence'] == seq + 1
+                seq = msg['sequence']
+            apply(book, msg)
+
+    expected = to_orders(market.get_book(level=3))
+    assert set(book) == set(expected)
+    for order_id, (side, price, size) in expected.items():
+        assert book[order_id][:2] == [side, price]
+        assert book[order_id][2] == pytest.approx(size)
+
+
+def test_rest_endpoints(exchange):
+    gdax = exchange.get_gdax()
+    assert gdax.get_book('ETH-USD', level=3)['bids']
+    assert float(gdax.get_ticker('ETH-USD')['price']) > 0
+
+    for _ in range(150):
+        gdax.post_order({'product_id': 'ETH-USD', 'side': 'buy', 'type': 'limit',
+                         'price': '100.00', 'size': '1'})
+    assert len(gdax.get_orders()) == 150
+    assert len(gdax.cancel_all('ETH-USD')) == 150
+
+    rows = gdax.get_candles('ETH-USD', '2017-10-01', '2017-10-02', granularity=60)
+    assert len(rows) == 24 * 60 + 1
+
+
+def test_injected_errors_are_retried(exchange):
+    gdax = exchange.get_gdax(retry_policy=GdaxRetryPolicy(backoff=0))
+    exchange.inject_errors(503, count=2, path='ticker', retry_after=0)
+    assert gdax.get_ticker('LTC-USD')['trade_id'] >= 0
+    assert gdax.retry_policy.get_stats()['reasons'] == {503: 2}
+
+
+def test_websocket_gaps_and_disconnects(exchange):
+    ws = create_connection(exchange.ws_url)
+    ws.send(json.dumps({'type': 'subscribe', 'product_ids': ['ETH-USD'], 'channels': ['full']}))
+    assert json.loads(ws.recv())['type'] == 'subscriptions'
+
+    seqs = [json.loads(ws.recv())['sequence'] for _ in range(10)]
+    exchange.inject_gap('ETH-USD', 5)
+    seqs += [json.loads(ws.recv())['sequence'] for _ in range(50)]
+    assert sum(b - a - 1 for a, b in zip(seqs, seqs[1:])) == 5
+
+    exchange.disconnect()
+    with pytest.raises(Exception):
+        for _ in range(10000):
+            ws.recv()
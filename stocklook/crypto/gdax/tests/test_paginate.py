@@ -0,0 +1,102 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from threading import current_thread
+from stocklook.crypto.gdax.api import Gdax
+from stocklook.crypto.gdax.paginate import GdaxPaginator, map_parallel
+from stocklook.crypto.gdax.tests.helpers import FakeResponse
+
+
+class FakeGdax:
+    """
+    Serves 5 pages of 3 fills each, newest trade_id first.
+    """
+    def __init__(self, pages=5, per_page=3):
+        self.calls = list()
+        ids = list(range(pages * per_page, 0, -1))
+        self.pages = [ids[i:i + per_page] for i in range(0, len(ids), per_page)]
+
+    def get(self, ext, params=None):
+        params = params or {}
+        self.calls.append((ext, dict(params), current_thread().name))
+        idx = int(params.get('after', 0))
+        after = (str(idx + 1) if idx + 1 < len(self.pages) else None)
+        headers = ({'cb-after': after} if after is not None else None)
+        return FakeResponse([{'trade_id': i} for i in self.pages[idx]], headers=headers)
+
+
+class RecordGdax(Gdax):
+    """
+    Serves one page of records per product (newest first):
+    fills with per-product trade_ids and orders created a minute apart.
+    """
+    START = datetime(2018, 1, 1, 12, tzinfo=timezone.utc)
+
+    def __init__(self):
+        super(RecordGdax, self).__init__('key', 'c2VjcmV0', 'phrase', response_cache=False)
+
+    def get(self, url_extension, **kwargs):
+        p = kwargs.get('params') or {}
+        if url_extension == 'fills':
+            first = {'ETH-USD': 100, 'LTC-USD': 5000}[p['product_id']]
+            data = [{'trade_id': i, 'product_id': p['product_id']}
+                    for i in range(first + 9, first - 1, -1)]
+        else:
+            data = [{'id': str(i), 'created_at': (self.START + timedelta(minutes=i)).isoformat()}
+                    for i in range(9, -1, -1)]
+        return FakeResponse(data)
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_paginator_yields_all_pages(prefetch):
+    g = FakeGdax()
+    pages = list(GdaxPaginator(g, 'fills', params={'product_id': 'ETH-USD'},
+                               since_key='trade_id', prefetch=prefetch))
+    assert len(pages) == 5
+    assert [r['trade_id'] for p in pages for r in p] == list(range(15, 0, -1))
+    # Filters are kept on every page request.
+    assert all(c[1]['product_id'] == 'ETH-USD' for c in g.calls)
+
+
+def test_paginator_since_stops_early():
+    g = FakeGdax()
+    p = GdaxPaginator(g, 'fills', since='10', since_key='trade_id')
+    data = p.all()
+    assert [r['trade_id'] for r in data] == [15, 14, 13, 12, 11]
+    assert p.newest == 15
+    # Page 2 contained the cursor so page 3 was never requested.
+    assert len(g.calls) == 2
+
+
+def test_get_fills_since_per_product():
+    g = RecordGdax()
+    fills = g.get_fills(product_id=['ETH-USD', 'LTC-USD'],
+                        since={'ETH-USD': 105, 'LTC-USD': 5007})
+    assert [f['trade_id'] for f in fills] == [109, 108, 107, 106, 5009, 5008]
+
+    # Products without a cursor are fetched in full.
+    assert len(g.get_fills(product_id=['ETH-USD', 'LTC-USD'], since={'LTC-USD': 5007})) == 12
+    assert len(g.get_fills(product_id=['ETH-USD'], since=105)) == 4
+
+    # One trade_id can't apply to several products.
+    with pytest.raises(ValueError):
+        g.get_fills(product_id=['ETH-USD', 'LTC-USD'], since=105)
+
+
+@pytest.mark.parametrize('since', ['2018-01-01T12:06:00Z',
+                                   '2018-01-01 07:06:00-05:00',
+                                   datetime(2018, 1, 1, 12, 6),
+                                   RecordGdax.START + timedelta(minutes=6),
+                                   RecordGdax.START.timestamp() + 360])
+def test_get_orders_since_parses_times(since):
+    orders = RecordGdax().get_orders(since=since)
+    assert [o['id'] for o in orders] == ['9', '8', '7']
+
+
+def test_paginator_max_pages():
+    g = FakeGdax()
+    assert len(GdaxPaginator(g, 'fills', max_pages=2).all()) == 6
+
+
+def test_map_parallel_keeps_order():
+    assert map_parallel(lambda x: x * 2, range(10), max_workers=4) == list(range(0, 20, 2))
+    assert map_parallel(lambda x: x, []) == []
@@ -0,0 +1,61 @@
+import os
+import json
+from time import perf_counter
+from stocklook.crypto.gdax.feeds.recorder import GdaxFeedRecorder, GdaxFeedReader, GdaxFeedReplay
+from stocklook.crypto.gdax.local_exchange import SyntheticMarket
+from stocklook.crypto.gdax.tests.helpers import CollectingFeed
+
+HOUR = 1514764800.0                     # 2018-01-01 00:00 UTC
+
+
+def record(directory, count=3000):
+    markets = [SyntheticMarket('BTC-USD', seed=1), SyntheticMarket('ETH-USD', seed=2)]
+    frames = list()
+    t = HOUR - 1.5
+    with GdaxFeedRecorder(directory, block_size=100) as recorder:
+        for i in range(count):
+            for msg in markets[i % 2].step():
+                t += 0.001
+                raw = json.dumps(msg)
+                recorder.write(raw, msg, received=t)
+                frames.append((t, raw))
+        recorder.write('{"type":"subscriptions"}', {'type': 'subscriptions'})
+    return frames
+
+
+def test_segments_index_and_seek(tmpdir):
+    directory = str(tmpdir)
+    frames = record(directory)
+    assert sorted(os.listdir(os.path.join(directory, 'BTC-USD'))) == [
+        'BTC-USD_2017123123.idx', 'BTC-USD_2017123123.jsonl.gz',
+        'BTC-USD_2018010100.idx', 'BTC-USD_2018010100.jsonl.gz']
+
+    reader = GdaxFeedReader(directory)
+    assert [(round(t, 6), raw) for t, raw in reader] == [(round(t, 6), raw) for t, raw in frames]
+
+    index = reader.get_index(reader.get_segments('ETH-USD')[1])
+    assert index[0]['offset'] == 0 and index[1]['offset'] > 0
+    assert index[0]['last_sequence'] < index[1]['first_sequence']
+
+    reader = GdaxFeedReader(directory, products=['ETH-USD'], start=HOUR + 1, end=HOUR + 2)
+    times = [t for t, raw in reader]
+    assert times and HOUR + 1 <= times[0] < HOUR + 1.01 and times[-1] <= HOUR + 2
+
+    sequence = index[1]['first_sequence'] + 7
+    t, raw = next(reader.read_product('ETH-USD', sequence=sequence))
+    assert json.loads(raw)['sequence'] == sequence
+
+
+def test_replay_speeds(tmpdir):
+    directory = str(tmpdir)
+    frames = record(directory, count=500)
+
+    feed = CollectingFeed()
+    replay = GdaxFeedReplay(GdaxFeedReader(directory), feed, speed=None)
+    assert replay.run() == len(frames)
+    assert feed.messages == [json.loads(raw) for t, raw in frames]
+
+    # ~0.6s of recorded frames at 4x.
+    t = perf_counter()
+    GdaxFeedReplay(GdaxFeedReader(directory), CollectingFeed(), speed=4).run()
+    assert 0.1 < perf_counter() - t < 1
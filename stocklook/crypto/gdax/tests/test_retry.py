@@ -0,0 +1,87 @@
+import pytest
+from requests.exceptions import ConnectionError, InvalidURL
+from stocklook.utils.ratelimit import RateLimiter
+from stocklook.crypto.gdax.api import gdax_call_api, GdaxAPIError
+from stocklook.crypto.gdax.retry import GdaxRetryPolicy, get_retry_after
+from stocklook.crypto.gdax.stats import GdaxAPIStats
+from stocklook.crypto.gdax.tests.helpers import FakeResponse
+
+
+class FakeSession:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def _next(self, url, **kwargs):
+        self.calls += 1
+        res = self.results.pop(0)
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+    get = post = delete = _next
+
+
+def call(session, policy, method='get', **kwargs):
+    stats = GdaxAPIStats(enabled=True)
+    res = gdax_call_api('https://api.gdax.com/orders', method=method, session=session,
+                        limiter=RateLimiter({'private': (1000, 1000)}),
+                        endpoint_class='private', stats=stats, retry_policy=policy, **kwargs)
+    return res, stats
+
+
+def test_classifies_errors_and_statuses():
+    p = GdaxRetryPolicy()
+    assert p.should_retry(1, 'get', status=429)
+    assert p.should_retry(1, 'get', status=503)
+    assert not p.should_retry(1, 'get', status=400)
+    assert p.should_retry(1, 'get', error=ConnectionError())
+    assert not p.should_retry(1, 'get', error=InvalidURL())
+    assert not p.should_retry(p.max_attempts, 'get', status=503)
+    assert p.get_stats() == {'retries': 3, 'give_ups': 1,
+                             'reasons': {429: 1, 503: 1, 'ConnectionError': 1}}
+
+
+def test_post_only_retried_with_client_oid():
+    p = GdaxRetryPolicy()
+    assert not p.should_retry(1, 'post', body={'size': '1'}, status=503)
+    assert p.should_retry(1, 'post', body={'client_oid': 'abc'}, status=503)
+    assert p.should_retry(1, 'post', body='{"client_oid": "abc"}', error=ConnectionError())
+
+
+def test_backoff_and_retry_after():
+    p = GdaxRetryPolicy(backoff=1, max_backoff=5, jitter=False)
+    assert [p.get_delay(a) for a in (1, 2, 3, 4)] == [1, 2, 4, 5]
+    assert p.get_delay(1, {'Retry-After': '0.25'}) == 0.25
+    assert p.get_delay(1, {'Retry-After': '3600'}) == 5
+    assert get_retry_after({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}) == 0.0
+    assert get_retry_after({}) is None
+
+
+def test_call_api_retries_until_success():
+    policy = GdaxRetryPolicy(backoff=0, jitter=False)
+    session = FakeSession(ConnectionError('reset'),
+                          FakeResponse(status_code=429, headers={'Retry-After': '0'}),
+                          FakeResponse())
+    res, stats = call(session, policy)
+    assert res.status_code == 200
+    assert session.calls == 3
+    orders = stats.snapshot()['GET orders']
+    assert orders['retries'] == 2
+    assert orders['statuses'] == {'ConnectionError': 1, 429: 1, 200: 1}
+
+
+def test_call_api_gives_up():
+    policy = GdaxRetryPolicy(max_attempts=2, backoff=0)
+    session = FakeSession(FakeResponse(status_code=502), FakeResponse(status_code=502),
+                          FakeResponse())
+    with pytest.raises(GdaxAPIError):
+        call(session, policy)
+    assert session.calls == 2
+    assert policy.give_ups == 1
+
+    # Plain POSTs are never repeated.
+    session = FakeSession(FakeResponse(status_code=503), FakeResponse())
+    with pytest.raises(GdaxAPIError):
+        call(session, policy, method='post', json={'size': '1'})
+    assert session.calls == 1
@@ -0,0 +1,54 @@
+import pytest
+from stocklook.utils.ratelimit import RateLimiter
+from stocklook.crypto.gdax.api import gdax_call_api, GdaxAPIError
+from stocklook.crypto.gdax.stats import GdaxAPIStats, LatencyHistogram
+from stocklook.crypto.gdax.tests.helpers import FakeResponse
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def get(self, url, **kwargs):
+        return self.responses.pop(0)
+
+
+def call(stats, session):
+    return gdax_call_api('https://api.gdax.com/products/ETH-USD/book', session=session,
+                         limiter=RateLimiter({'public': (1000, 1000)}),
+                         endpoint_class='public', stats=stats)
+
+
+def test_disabled_stats_record_nothing():
+    stats = GdaxAPIStats()
+    call(stats, FakeSession(FakeResponse(data=[])))
+    assert stats.snapshot() == {}
+
+
+def test_records_by_template_and_status():
+    stats = GdaxAPIStats(enabled=True)
+    session = FakeSession(FakeResponse(data={'bids': []}),
+                          FakeResponse(status_code=404, data={'message': 'NotFound'}))
+
+    assert call(stats, session).json() == {'bids': []}
+    with pytest.raises(GdaxAPIError):
+        call(stats, session)
+
+    book = stats.snapshot()['GET products/{}/book']
+    assert book['calls'] == 2
+    assert book['errors'] == 1
+    assert book['statuses'] == {200: 1, 404: 1}
+    assert book['wait']['count'] == book['flight']['count'] == 2
+    assert book['decode']['count'] == 2
+
+    stats.reset()
+    assert stats.snapshot() == {}
+
+
+def test_histogram_percentiles():
+    h = LatencyHistogram()
+    for s in [0.002] * 90 + [0.3] * 10:
+        h.add(s)
+    assert h.percentile(50) == 0.0025
+    assert h.percentile(99) == 0.3
+    assert h.get_stats()['count'] == 100
@@ -30,6 +30,7 @@ import json
 import time
 import hmac, hashlib
 import urllib.request as urllib2
+from stocklook.utils.ratelimit import RateLimiter
 from stocklook.utils.timetools import (timestamp_from_utc,
                                        timestamp_to_utc_int as timestamp_to_utc,
                                        create_timestamp, today, one_week_ago)
@@ -54,6 +55,12 @@ POLONIEX_DATA_TYPE_MAP = {
 
 }
 
+# Poloniex allows 6 calls per second
+# across public and private endpoints.
+POLONIEX_RATE_LIMITER = RateLimiter({'api': (6, 6),
+                                     'public': (6, 6, 'api'),
+                                     'private': (6, 6, 'api')})
+
 # Currency Pairs
 USDT_BTC = 'USDT_BTC'
 USDT_ETH = 'USDT_ETH'
@@ -118,6 +125,8 @@ def poloniex_return_chart_data(currency_pair,
               'end': end_unix,
               'period': str(period_unix)}
 
+    POLONIEX_RATE_LIMITER.acquire('public')
+
     res = requests.get('https://poloniex.com/public?'
                        'command=returnChartData',
                        params=params).json()
@@ -138,9 +147,10 @@ def poloniex_return_chart_data(currency_pair,
 
 
 class Poloniex:
-    def __init__(self, key, secret):
+    def __init__(self, key, secret, rate_limiter=None):
         self.api_key = key
         self.secret = secret
+        self.rate_limiter = (POLONIEX_RATE_LIMITER if rate_limiter is None else rate_limiter)
 
     def post_process(self, before):
         after = before
@@ -170,6 +180,10 @@ class Poloniex:
 
         :return:
         """
+        public = command in ("returnTicker", "return24hVolume",
+                             "returnOrderBook", "returnMarketTradeHistory")
+        self.rate_limiter.acquire('public' if public else 'private')
+
         if command == "returnTicker" or command == "return24hVolume":
             url = 'https://poloniex.com/public?command=' + command
             ret = urllib2.urlopen(urllib2.Request(url))
@@ -1,17 +1,20 @@
-import time
+from stocklook.utils.ratelimit import TokenBucket, RateLimiter
 
 
-def rate_limited(maxPerSecond):
-    minInterval = 1.0 / float(maxPerSecond)
+def rate_limited(maxPerSecond, burst=1):
+    """
+    Decorator limiting calls to the wrapped function
+    to maxPerSecond across all threads.
+    :param maxPerSecond: (int, float)
+    :param burst: (int, default 1)
+        The number of calls allowed back-to-back before limiting.
+    :return:
+    """
     def decorate(func):
-        lastTimeCalled = [0.0]
+        bucket = TokenBucket(maxPerSecond, burst)
         def rateLimitedFunction(*args,**kargs):
-            elapsed = time.clock() - lastTimeCalled[0]
-            leftToWait = minInterval - elapsed
-            if leftToWait>0:
-                time.sleep(leftToWait)
-            ret = func(*args,**kargs)
-            lastTimeCalled[0] = time.clock()
-            return ret
+            bucket.acquire()
+            return func(*args,**kargs)
+        rateLimitedFunction.bucket = bucket
         return rateLimitedFunction
-    return decorate
\ No newline at end of file
+    return decorate
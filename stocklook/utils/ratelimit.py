@@ -0,0 +1,250 @@
+"""
+MIT License
+
+Copyright (c) 2017 Zeke Barge
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import asyncio
+from threading import Lock
+from time import monotonic, sleep
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket.
+
+    Tokens refill continuously at TokenBucket.rate per second
+    up to TokenBucket.burst tokens. Callers reserve tokens under a
+    short lock and then sleep (outside of the lock) until their
+    reservation comes due, so waiting callers are served in order
+    and never spin.
+    """
+    def __init__(self, rate, burst=None):
+        """
+        :param rate: (int, float)
+            The number of tokens added per second.
+
+        :param burst: (int, float, default None)
+            The maximum number of tokens that can be spent at once.
+            None defaults to the rate (minimum 1).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive: {}".format(rate))
+        if burst is None:
+            burst = max(1, rate)
+
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = self.burst
+        self._updated = monotonic()
+        self._lock = Lock()
+
+        self.calls = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def reserve(self, tokens=1):
+        """
+        Spends tokens now (allowing the balance to go negative)
+        and returns the number of seconds the caller must wait
+        before the reservation is honored.
+        :param tokens: (int, default 1)
+        :return: (float)
+        """
+        with self._lock:
+            now = monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._tokens -= tokens
+            self.calls += 1
+
+            if self._tokens >= 0:
+                return 0.0
+
+            wait = -self._tokens / self.rate
+            self.waits += 1
+            self.wait_time += wait
+            return wait
+
+    def try_acquire(self, tokens=1):
+        """
+        Spends tokens only if they're available right now.
+        :param tokens: (int, default 1)
+        :return: (bool)
+            True if the tokens were spent.
+        """
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            self.calls += 1
+            return True
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until the tokens are available.
+        :param tokens: (int, default 1)
+        :return: (float)
+            The number of seconds spent waiting.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens=1):
+        """
+        Same as TokenBucket.acquire but yields to the
+        event loop while waiting.
+        :param tokens: (int, default 1)
+        :return: (float)
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    @property
+    def tokens(self):
+        with self._lock:
+            elapsed = monotonic() - self._updated
+            return min(self.burst, self._tokens + elapsed * self.rate)
+
+    def get_stats(self):
+        return dict(rate=self.rate,
+                    burst=self.burst,
+                    calls=self.calls,
+                    waits=self.waits,
+                    wait_time=round(self.wait_time, 6))
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = 0
+            self.waits = 0
+            self.wait_time = 0.0
+
+
+class RateLimiter:
+    """
+    A collection of TokenBuckets keyed by endpoint class.
+
+    A bucket can name a parent bucket so that (for example)
+    order entry calls are limited on their own and also
+    count against the private API budget.
+
+    Example:
+        limiter = RateLimiter({'public': (3, 6),
+                               'private': (5, 10),
+                               'order': (5, 10, 'private')})
+        limiter.acquire('order')
+    """
+    def __init__(self, limits=None, default=None):
+        """
+        :param limits: (dict, default None)
+            {key: (rate, burst)} or {key: (rate, burst, parent_key)}
+
+        :param default: (str, default None)
+            The bucket key to use when RateLimiter.acquire
+            is called with an unknown key. None raises a KeyError.
+        """
+        self.buckets = dict()
+        self.parents = dict()
+        self.default = default
+
+        if limits:
+            for key, limit in limits.items():
+                self.add_bucket(key, *limit)
+
+    def add_bucket(self, key, rate, burst=None, parent=None):
+        """
+        Adds (or replaces) the TokenBucket for a key.
+        :param key: (str)
+        :param rate: (int, float)
+        :param burst: (int, float, default None)
+        :param parent: (str, default None)
+            Another bucket key that is also spent from on every acquire.
+        :return: (TokenBucket)
+        """
+        bucket = TokenBucket(rate, burst)
+        self.buckets[key] = bucket
+        self.parents[key] = parent
+        return bucket
+
+    def get_buckets(self, key):
+        """
+        Returns the TokenBucket for a key along with
+        the buckets of each of its parents.
+        :param key: (str)
+        :return: (list)
+        """
+        if key not in self.buckets:
+            if self.default is None:
+                raise KeyError("No rate limit configured for '{}'".format(key))
+            key = self.default
+
+        buckets = list()
+        while key is not None:
+            buckets.append(self.buckets[key])
+            key = self.parents[key]
+        return buckets
+
+    def reserve(self, key, tokens=1):
+        return max(b.reserve(tokens) for b in self.get_buckets(key))
+
+    def acquire(self, key, tokens=1):
+        """
+        Blocks until a call for the given key is allowed.
+        :param key: (str)
+        :param tokens: (int, default 1)
+        :return: (float)
+            The number of seconds spent waiting.
+        """
+        wait = self.reserve(key, tokens)
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    async def acquire_async(self, key, tokens=1):
+        """
+        Waits without blocking the event loop until a call
+        for the given key is allowed.
+        :param key: (str)
+        :param tokens: (int, default 1)
+        :return: (float)
+        """
+        wait = self.reserve(key, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def get_stats(self):
+        """
+        Returns a dictionary of {key: TokenBucket.get_stats()}
+        :return:
+        """
+        return {k: b.get_stats() for k, b in self.buckets.items()}
+
+    def reset_stats(self):
+        for b in self.buckets.values():
+            b.reset_stats()
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from threading import Thread
+from time import monotonic
+from stocklook.utils import rate_limited
+from stocklook.utils.ratelimit import TokenBucket, RateLimiter
+
+
+def test_bucket_allows_burst_then_limits():
+    bucket = TokenBucket(rate=50, burst=5)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits == [0.0] * 5
+    assert bucket.reserve() > 0
+    assert bucket.waits == 1
+    assert bucket.calls == 6
+
+
+def test_bucket_threads_respect_rate():
+    bucket = TokenBucket(rate=100, burst=1)
+    start = monotonic()
+
+    def work():
+        for _ in range(10):
+            bucket.acquire()
+
+    threads = [Thread(target=work) for _ in range(4)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+
+    # 40 calls with 1 free token at 100/s needs ~0.39 seconds.
+    assert monotonic() - start >= 0.35
+    assert bucket.calls == 40
+
+
+def test_try_acquire():
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_limiter_parent_buckets():
+    limiter = RateLimiter({'private': (100, 2),
+                           'order': (100, 10, 'private')})
+    limiter.acquire('order')
+    limiter.acquire('order')
+    # The order bucket has tokens left but private is spent.
+    assert limiter.reserve('order') > 0
+    assert limiter.buckets['private'].waits == 1
+
+    with pytest.raises(KeyError):
+        limiter.acquire('unknown')
+
+
+def test_limiter_default_and_async():
+    limiter = RateLimiter({'api': (200, 1)}, default='api')
+
+    async def run():
+        for _ in range(3):
+            await limiter.acquire_async('anything')
+
+    asyncio.run(run())
+    stats = limiter.get_stats()
+    assert stats['api']['calls'] == 3
+    assert stats['api']['wait_time'] > 0
+
+    limiter.reset_stats()
+    assert limiter.get_stats()['api']['calls'] == 0
+
+
+def test_rate_limited_decorator():
+    @rate_limited(100)
+    def f(x):
+        return x * 2
+
+    assert [f(i) for i in range(3)] == [0, 2, 4]
+    assert f.bucket.calls == 3
+
+
+def test_poloniex_public_and_private_share_api_budget():
+    from stocklook.crypto.poloniex import POLONIEX_RATE_LIMITER as limiter
+    assert limiter.default is None
+    for key in ('public', 'private'):
+        assert limiter.get_buckets(key)[-1] is limiter.buckets['api']